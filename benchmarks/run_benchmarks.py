@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+"""
+Benchmark the bulk_* operations against a local Postgres (i.e. the db service in docker-compose.yml).
+
+Every case runs in a fresh process, so the peak RSS reported only covers that case. Results are printed and
+optionally saved as JSON, so runs of different releases can be compared with --compare.
+
+    ./benchmarks/run_benchmarks.py --counts 1000,100000 --output results.json
+    ./benchmarks/run_benchmarks.py --counts 1000,100000 --compare results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import product
+from time import monotonic
+from uuid import UUID
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.test_project.settings")
+
+OPERATIONS = [
+    "insert",
+    "update",
+    "upsert",
+    "upsert_on_conflict",
+    "insert_changed",
+    "select_model_dicts",
+]
+DATASETS = ["complex", "types"]
+DEFAULT_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_WIDTHS = [10, 1_000]
+
+class PhaseTimer:
+    """
+    Collect the durations sent by bulk_load_phase_finished. Queries are reported separately by their index
+    """
+
+    def __init__(self):
+        self.durations = {}
+
+    def __call__(self, sender, phase, duration, query_index=None, **kwargs):
+        if query_index is not None:
+            phase = f"{phase}_{query_index}"
+        self.durations[phase] = self.durations.get(phase, 0) + duration
+
+    def phases(self):
+        return dict(self.durations)
+
+
+def _string(i: int, width: int) -> str:
+    return str(i).ljust(width, "x")[:width]
+
+
+def make_models(dataset: str, count: int, width: int, version: str = "", with_ids: bool = True):
+    from tests.test_project.models import TestComplexModel, TestTypesModel
+
+    created = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    if dataset == "complex":
+        return [
+            TestComplexModel(
+                id=i + 1 if with_ids else None,
+                integer_field=i,
+                string_field=_string(i, width) + version,
+                json_field=dict(i=i, value=_string(i, width)),
+                datetime_field=created + timedelta(seconds=i),
+            )
+            for i in range(count)
+        ]
+    elif dataset == "types":
+        return [
+            TestTypesModel(
+                id=i + 1 if with_ids else None,
+                small_integer_field=i % 32_000,
+                boolean_field=i % 2 == 0,
+                float_field=i / 7,
+                decimal_field=Decimal(i) / 100,
+                date_field=date(2020, 1, 1) + timedelta(days=i % 1000),
+                # CharField is limited to 100 characters
+                char_field=(_string(i, width) + version)[-100:],
+                uuid_field=UUID(int=i),
+            )
+            for i in range(count)
+        ]
+    raise ValueError(f"Unknown dataset {dataset}")
+
+
+def run_operation(
+    operation: str,
+    dataset: str,
+    count: int,
+    width: int,
+    binary_copy: bool,
+    timer: PhaseTimer,
+):
+    from django_bulk_load import (
+        bulk_insert_changed_models,
+        bulk_insert_models,
+        bulk_select_model_dicts,
+        bulk_update_models,
+        bulk_upsert_models,
+    )
+
+    key_field_name = "integer_field" if dataset == "complex" else "uuid_field"
+    compare_field_name = "string_field" if dataset == "complex" else "char_field"
+
+    # Load the existing rows outside of the timed section
+    if operation in ("update", "select_model_dicts"):
+        bulk_insert_models(make_models(dataset, count, width), binary_copy=binary_copy)
+    elif operation in ("upsert", "upsert_on_conflict", "insert_changed"):
+        # These operations insert new rows, so the existing ids need to come from the sequence too
+        existing_count = count if operation == "insert_changed" else count // 2
+        bulk_insert_models(
+            make_models(dataset, existing_count, width, with_ids=False),
+            binary_copy=binary_copy,
+        )
+
+    if operation == "select_model_dicts":
+        model_class = make_models(dataset, 1, width)[0].__class__
+        filter_data = [(i + 1,) for i in range(count)]
+        timer.durations.clear()
+        start = monotonic()
+        bulk_select_model_dicts(
+            model_class=model_class,
+            filter_field_names=["id"],
+            select_field_names=[compare_field_name],
+            filter_data=filter_data,
+        )
+        return monotonic() - start
+
+    if operation == "insert_changed":
+        # Change every other model, so half of them are inserted
+        models = (
+            make_models(dataset, count, width, version="changed", with_ids=False)[::2]
+            + make_models(dataset, count, width, with_ids=False)[1::2]
+        )
+    else:
+        models = make_models(dataset, count, width, version="updated")
+        if operation in ("upsert", "upsert_on_conflict"):
+            # Half of the models match existing rows and the other half are inserted
+            for model in models[count // 2:]:
+                model.id = None
+
+    timer.durations.clear()
+    start = monotonic()
+    if operation == "insert":
+        bulk_insert_models(models, binary_copy=binary_copy)
+    elif operation == "update":
+        bulk_update_models(models, binary_copy=binary_copy)
+    elif operation == "upsert":
+        bulk_upsert_models(models, binary_copy=binary_copy)
+    elif operation == "upsert_on_conflict":
+        bulk_upsert_models(models, binary_copy=binary_copy, upsert_strategy="on_conflict")
+    elif operation == "insert_changed":
+        bulk_insert_changed_models(
+            models,
+            pk_field_names=[key_field_name],
+            compare_field_names=[compare_field_name],
+            binary_copy=binary_copy,
+        )
+    else:
+        raise ValueError(f"Unknown operation {operation}")
+    return monotonic() - start
+
+
+def _max_rss_mb() -> float:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_case(case: dict, db_name: str, results_queue):
+    import django
+    from django.conf import settings
+
+    django.setup()
+    # Use the database created by the parent process
+    settings.DATABASES["default"]["NAME"] = db_name
+
+    from django.db import connection
+    from django_bulk_load.metrics import bulk_load_phase_finished
+
+    timer = PhaseTimer()
+    bulk_load_phase_finished.connect(timer)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "TRUNCATE test_project_testcomplexmodel, test_project_testtypesmodel RESTART IDENTITY CASCADE"
+        )
+
+    duration = run_operation(**case, timer=timer)
+    results_queue.put(
+        dict(
+            case,
+            duration=duration,
+            rows_per_second=case["count"] / duration if duration else None,
+            phases=timer.phases(),
+            peak_rss_mb=_max_rss_mb(),
+        )
+    )
+
+
+def run_benchmarks(cases, db_name: str):
+    # Spawn a new process per case, so the peak RSS of a case isn't affected by the previous ones
+    context = multiprocessing.get_context("spawn")
+    results_queue = context.Queue()
+    for case in cases:
+        process = context.Process(target=run_case, args=(case, db_name, results_queue))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"Benchmark failed: {case}")
+        result = results_queue.get()
+        print(format_result(result), flush=True)
+        yield result
+
+
+def _case_key(result: dict):
+    return tuple(
+        result[key] for key in ("operation", "dataset", "count", "width", "binary_copy")
+    )
+
+
+def format_result(result: dict, baseline: dict = None) -> str:
+    phases = " ".join(
+        f"{phase}={duration:.3f}s" for phase, duration in result["phases"].items()
+    )
+    line = (
+        f"{result['operation']:<18} {result['dataset']:<8} count={result['count']:<9,} "
+        f"width={result['width']:<5} binary={str(result['binary_copy']):<5} "
+        f"duration={result['duration']:.3f}s rows/s={result['rows_per_second']:,.0f} "
+        f"peak_rss={result['peak_rss_mb']:.0f}MB {phases}"
+    )
+    if baseline:
+        change = result["rows_per_second"] / baseline["rows_per_second"] - 1
+        line += f" vs baseline={change:+.1%}"
+    return line
+
+
+def _environment(connection) -> dict:
+    from django import get_version
+
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW server_version")
+        server_version = cursor.fetchone()[0]
+
+    return dict(
+        python=platform.python_version(),
+        django=get_version(),
+        driver=connection.Database.__name__,
+        driver_version=connection.Database.__version__,
+        postgres=server_version,
+        platform=platform.platform(),
+        timestamp=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+def _csv(cast):
+    return lambda value: [cast(item) for item in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--operations", type=_csv(str), default=OPERATIONS)
+    parser.add_argument("--datasets", type=_csv(str), default=DATASETS)
+    parser.add_argument(
+        "--counts",
+        type=_csv(int),
+        default=DEFAULT_COUNTS,
+        help="Comma separated row counts, i.e. 1000,10000000",
+    )
+    parser.add_argument(
+        "--widths",
+        type=_csv(int),
+        default=DEFAULT_WIDTHS,
+        help="Comma separated lengths of the string columns",
+    )
+    parser.add_argument(
+        "--binary-copy",
+        action="store_true",
+        help="Also run every case with binary_copy=True",
+    )
+    parser.add_argument("--output", help="Save the results to this JSON file")
+    parser.add_argument(
+        "--compare", help="Compare rows/s with the results in this JSON file"
+    )
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_databases, teardown_databases
+
+    baselines = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baselines = {_case_key(result): result for result in json.load(f)["results"]}
+
+    cases = [
+        dict(
+            operation=operation,
+            dataset=dataset,
+            count=count,
+            width=width,
+            binary_copy=binary_copy,
+        )
+        for operation, dataset, count, width, binary_copy in product(
+            args.operations,
+            args.datasets,
+            args.counts,
+            args.widths,
+            [False, True] if args.binary_copy else [False],
+        )
+        # Selects don't use COPY
+        if not (binary_copy and operation == "select_model_dicts")
+    ]
+
+    old_config = setup_databases(verbosity=1, interactive=False)
+    try:
+        environment = _environment(connection)
+        print(json.dumps(environment), flush=True)
+        results = list(run_benchmarks(cases, connection.settings_dict["NAME"]))
+    finally:
+        connection.close()
+        teardown_databases(old_config, verbosity=1)
+
+    if baselines:
+        print("\nCompared to", args.compare)
+        for result in results:
+            print(format_result(result, baselines.get(_case_key(result))))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(environment=environment, results=results), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,19 @@
+from .async_bulk_load import (
+    abulk_insert_changed_models,
+    abulk_insert_models,
+    abulk_load_models_with_queries,
+    abulk_select_model_dicts,
+    abulk_select_model_dicts_iterator,
+    abulk_update_models,
+    abulk_upsert_models,
+)
 from .bulk_load import (
+    BulkLoadCounts,
+    SelectTuples,
     bulk_insert_changed_models,
     bulk_load_models_with_queries,
     bulk_select_model_dicts,
+    bulk_select_model_dicts_iterator,
     bulk_insert_models,
     bulk_update_models,
     bulk_upsert_models,
@@ -14,11 +26,21 @@ from .queries import (
 
 __all__ = [
     "bulk_select_model_dicts",
+    "bulk_select_model_dicts_iterator",
     "bulk_insert_models",
     "bulk_update_models",
     "bulk_upsert_models",
     "bulk_insert_changed_models",
     "bulk_load_models_with_queries",
+    "abulk_select_model_dicts",
+    "abulk_select_model_dicts_iterator",
+    "abulk_insert_models",
+    "abulk_update_models",
+    "abulk_upsert_models",
+    "abulk_insert_changed_models",
+    "abulk_load_models_with_queries",
+    "BulkLoadCounts",
+    "SelectTuples",
     "generate_distinct_condition",
     "generate_greater_than_condition"
 ]
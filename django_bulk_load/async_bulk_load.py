@@ -0,0 +1,843 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from asgiref.sync import sync_to_async
+from django.db import connections, router
+from django.db.models import Field, Model
+from psycopg2.sql import Composable
+
+from .bulk_load import (
+    DICTS_RESULT_FORMAT,
+    MERGE_UPSERT_STRATEGY,
+    MODELS_RETURN_FORMAT,
+    UPDATE_THEN_INSERT_UPSERT_STRATEGY,
+    SelectTuples,
+    _build_counts,
+    _check_upsert_strategy_supported,
+    _filter_unchanged_models,
+    _no_models_result,
+    _prepare_dedupe,
+    _prepare_bulk_insert_changed_models,
+    _prepare_bulk_insert_models,
+    _prepare_bulk_select_model_dicts,
+    _prepare_bulk_update_models,
+    _prepare_bulk_upsert_models,
+    _format_select_rows,
+    _prepare_skip_unchanged,
+    _records_to_results,
+    _SelectLoadingTable,
+    generate_analyze_loading_table_queries,
+)
+from .django import (
+    get_fields_and_names,
+    models_to_copy_chunks,
+    peek_models,
+)
+from .drivers import paginate_values_query, to_psycopg_query
+from .metrics import (
+    ANALYZE_PHASE,
+    COMMIT_PHASE,
+    COPY_PHASE,
+    CREATE_TEMP_TABLE_PHASE,
+    DESERIALIZE_PHASE,
+    FETCH_PHASE,
+    LOAD_MODELS_WITH_QUERIES_OPERATION,
+    QUERY_PHASE,
+    SELECT_MODEL_DICTS_OPERATION,
+    SKIP_UNCHANGED_PHASE,
+    ByteCounter,
+    PhaseMetrics,
+)
+from .queries import (
+    copy_query,
+    create_temp_table,
+    set_local_extra_float_digits,
+    show_extra_float_digits,
+)
+from .utils import (
+    ANALYZE_THRESHOLD,
+    COPY_BUFFER_SIZE,
+    SELECT_CHUNK_SIZE,
+)
+
+try:
+    import psycopg
+    from psycopg import sql as psycopg_sql
+    from psycopg.types.string import TextLoader
+except ImportError:
+    psycopg = None
+
+logger = logging.getLogger(__name__)
+
+
+def _check_psycopg_installed():
+    if psycopg is None:
+        raise ImportError(
+            "The async API requires psycopg 3. Install it with `pip install django-bulk-load[async]`"
+        )
+
+
+@asynccontextmanager
+async def _connect(
+    db_name: str, connection: Optional["psycopg.AsyncConnection"]
+) -> AsyncIterator["psycopg.AsyncConnection"]:
+    if connection is not None:
+        yield connection
+        return
+
+    django_connection = connections[db_name]
+    conn_params = django_connection.get_connection_params()
+    # Django's cursor_factory is synchronous and can't be used with an async connection
+    conn_params.pop("cursor_factory", None)
+    if "database" in conn_params:
+        conn_params["dbname"] = conn_params.pop("database")
+
+    connection = await psycopg.AsyncConnection.connect(autocommit=True, **conn_params)
+    try:
+        # Use the same time zone as Django's connections, so naive datetimes are interpreted the same way
+        await connection.execute(
+            psycopg_sql.SQL("SET TIME ZONE {}").format(
+                psycopg_sql.Literal(django_connection.timezone_name)
+            )
+        )
+        yield connection
+    finally:
+        await connection.close()
+
+
+async def _pg_version(db_name: str, connection: Optional["psycopg.AsyncConnection"]) -> int:
+    if connection is not None:
+        return connection.info.server_version
+    # Django caches the version of its connection, so this only queries the server once per thread
+    return await sync_to_async(lambda: connections[db_name].pg_version)()
+
+
+def _cursor(connection: "psycopg.AsyncConnection", name: str = "") -> "psycopg.AsyncCursor":
+    # Named cursors are server-side cursors
+    cursor = connection.cursor(name)
+    # Django fields deserialize JSON themselves, so load it as text like Django's connections do
+    cursor.adapters.register_loader("json", TextLoader)
+    cursor.adapters.register_loader("jsonb", TextLoader)
+    return cursor
+
+
+async def abulk_load_models_with_queries(
+    *,
+    models: Iterable[Model],
+    loading_table_name: str,
+    load_queries: Sequence[Composable],
+    field_names: Sequence[str] = None,
+    return_models: bool = False,
+    return_counts: bool = False,
+    query_counts: Sequence[Optional[str]] = None,
+    copy_buffer_size: int = COPY_BUFFER_SIZE,
+    model_class: Type[Model] = None,
+    binary_copy: bool = False,
+    serialization_processes: Optional[int] = None,
+    connection: Optional["psycopg.AsyncConnection"] = None,
+    operation: str = LOAD_MODELS_WITH_QUERIES_OPERATION,
+    reuse_loading_tables: bool = False,
+    analyze_threshold: Optional[int] = None,
+    index_field_names: Sequence[str] = None,
+    dedupe: Optional[str] = None,
+    partition_field_names: Sequence[str] = None,
+    skip_unchanged_field_names: Sequence[str] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+):
+    """
+    Async version of bulk_load_models_with_queries. The models are serialized in a thread, so the event loop
+    is free to run other loads while they are serialized and sent to the DB
+    """
+    _check_psycopg_installed()
+    start_time = monotonic()
+    model_class, models = peek_models(models, model_class)
+    if models is None:
+        raise ValueError("No models passed. Can't load without models")
+    if return_models and return_counts:
+        raise ValueError("return_models and return_counts can't be used together")
+    if dedupe is not None:
+        models = _prepare_dedupe(models, partition_field_names, model_class, dedupe)
+
+    db_name = router.db_for_write(model_class)
+    django_connection = connections[db_name]
+    model_meta = model_class._meta
+    table_name = model_meta.db_table
+    fields, field_names = get_fields_and_names(
+        field_names, model_meta, include_auto_fields=True
+    )
+
+    logger.info(
+        "Starting loading models",
+        extra=dict(table_name=table_name),
+    )
+    metrics = PhaseMetrics(model_class, operation)
+    loop = asyncio.get_running_loop()
+
+    skipped_count = 0
+    if skip_unchanged_field_names:
+        models = list(models)
+        changed_models = await _askip_unchanged_models(
+            models,
+            model_class,
+            partition_field_names,
+            skip_unchanged_field_names,
+            db_name,
+            connection,
+            metrics,
+        )
+        skipped_count = len(models) - len(changed_models)
+        models = changed_models
+        if not models:
+            logger.info(
+                "Skipped loading unchanged models",
+                extra=dict(model_count=skipped_count, table_name=table_name),
+            )
+            if return_counts:
+                return _build_counts(skipped_count, [], query_counts)
+            return None
+
+    copy_chunks = ByteCounter(
+        metrics.time_iterator(
+            models_to_copy_chunks(
+                models,
+                model_class,
+                fields,
+                connection=django_connection,
+                binary_copy=binary_copy,
+                serialization_processes=serialization_processes,
+                chunk_size=copy_buffer_size,
+            )
+        )
+    )
+    copy_chunks_iterator = iter(copy_chunks)
+
+    results = None
+    query_rowcounts = []
+    has_query_returning_results = False
+    # Raise Django's DB exceptions, like the sync functions do
+    with django_connection.wrap_database_errors:
+        async with _connect(db_name, connection) as conn:
+            async with conn.transaction(), _cursor(conn) as cursor:
+                with metrics.time(CREATE_TEMP_TABLE_PHASE):
+                    await cursor.execute(
+                        to_psycopg_query(
+                            create_temp_table(
+                                temp_table_name=loading_table_name,
+                                source_table_name=table_name,
+                                column_names=[field.column for field in fields],
+                                reusable=reuse_loading_tables,
+                            )
+                        )
+                    )
+                with metrics.time(COPY_PHASE) as copy_metrics:
+                    async with cursor.copy(
+                        to_psycopg_query(copy_query(loading_table_name, binary=binary_copy))
+                    ) as copy:
+                        while True:
+                            chunk = await loop.run_in_executor(
+                                None, next, copy_chunks_iterator, None
+                            )
+                            if chunk is None:
+                                break
+                            await copy.write(chunk)
+                    copy_metrics.update(
+                        rowcount=cursor.rowcount, byte_count=copy_chunks.byte_count
+                    )
+                model_count = cursor.rowcount
+                if analyze_threshold is not None and model_count >= analyze_threshold:
+                    with metrics.time(ANALYZE_PHASE, rowcount=model_count):
+                        for query in generate_analyze_loading_table_queries(
+                            loading_table_name, model_class, index_field_names
+                        ):
+                            await cursor.execute(to_psycopg_query(query))
+
+                logger.info(
+                    "Starting execution of queries on loading table",
+                    extra=dict(
+                        table_name=table_name,
+                        loading_table_name=loading_table_name,
+                    ),
+                )
+                for query_index, query in enumerate(load_queries):
+                    with metrics.time(QUERY_PHASE, query_index=query_index) as query_metrics:
+                        await cursor.execute(to_psycopg_query(query))
+                        query_metrics["rowcount"] = cursor.rowcount
+                    query_rowcounts.append(cursor.rowcount)
+                    if return_models and cursor.description:
+                        has_query_returning_results = True
+                        columns = [col.name for col in cursor.description]
+                        with metrics.time(FETCH_PHASE) as fetch_metrics:
+                            records = await cursor.fetchall()
+                            fetch_metrics["rowcount"] = len(records)
+                        with metrics.time(DESERIALIZE_PHASE, rowcount=len(records)):
+                            results = (results or []) + _records_to_results(
+                                records, columns, model_class, django_connection, return_format
+                            )
+                commit_start = monotonic()
+            metrics.send(COMMIT_PHASE, monotonic() - commit_start)
+
+    if return_models and not has_query_returning_results:
+        raise ValueError(
+            "No queries return results. abulk_load_models_with_queries expects at least 1 query"
+            " to return results. Use RETURNING or a SELECT to return models"
+        )
+
+    logger.info(
+        "Finished loading models",
+        extra=dict(
+            model_count=model_count,
+            table_name=table_name,
+            duration=monotonic() - start_time,
+        ),
+    )
+
+    if return_counts:
+        return _build_counts(model_count + skipped_count, query_rowcounts, query_counts)
+    return results
+
+
+async def _askip_unchanged_models(
+    models: List[Model],
+    model_class: Type[Model],
+    key_field_names: Sequence[str],
+    compare_field_names: Sequence[str],
+    db_name: str,
+    connection: Optional["psycopg.AsyncConnection"],
+    metrics: PhaseMetrics,
+) -> List[Model]:
+    """
+    Async version of bulk_load._skip_unchanged_models. The models are hashed in a thread
+    """
+    with metrics.time(SKIP_UNCHANGED_PHASE) as skip_metrics:
+        query, keys, model_hashes = await asyncio.get_running_loop().run_in_executor(
+            None,
+            _prepare_skip_unchanged,
+            models,
+            model_class,
+            key_field_names,
+            compare_field_names,
+            connections[db_name],
+        )
+        rows = []
+        if keys:
+            # Raise Django's DB exceptions, like the sync functions do
+            with connections[db_name].wrap_database_errors:
+                async with _connect(db_name, connection) as conn, conn.transaction():
+                    async with _cursor(conn) as cursor:
+                        # Restored after the lookup, since SET LOCAL lasts until the end of the caller's transaction
+                        await cursor.execute(to_psycopg_query(show_extra_float_digits()))
+                        (extra_float_digits,) = await cursor.fetchone()
+                        await cursor.execute(to_psycopg_query(set_local_extra_float_digits()))
+                        query_string = to_psycopg_query(query).as_string(conn)
+                        for page_query, page_params in paginate_values_query(query_string, keys):
+                            await cursor.execute(page_query, page_params)
+                            rows += await cursor.fetchall()
+                        await cursor.execute(
+                            to_psycopg_query(set_local_extra_float_digits(extra_float_digits))
+                        )
+        changed_models = _filter_unchanged_models(model_hashes, rows)
+        skip_metrics.update(
+            rowcount=len(rows), skipped_count=len(model_hashes) - len(changed_models)
+        )
+    return changed_models
+
+
+async def _abulk_load(
+    load_options: Dict[str, Any],
+    return_counts: bool,
+    binary_copy: bool,
+    serialization_processes: Optional[int],
+    connection: Optional["psycopg.AsyncConnection"],
+    analyze_threshold: Optional[int] = None,
+    dedupe: Optional[str] = None,
+):
+    return await abulk_load_models_with_queries(
+        **load_options,
+        return_counts=return_counts,
+        binary_copy=binary_copy,
+        serialization_processes=serialization_processes,
+        connection=connection,
+        analyze_threshold=analyze_threshold,
+        dedupe=dedupe,
+    )
+
+
+async def abulk_insert_models(
+    models: Iterable[Model],
+    ignore_conflicts: bool = False,
+    return_models: bool = False,
+    return_counts: bool = False,
+    model_class: Type[Model] = None,
+    binary_copy: bool = False,
+    serialization_processes: Optional[int] = None,
+    connection: Optional["psycopg.AsyncConnection"] = None,
+    reuse_loading_tables: bool = False,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+):
+    """
+    Async version of bulk_insert_models
+
+    :param connection: psycopg 3 AsyncConnection to load the models with. The load runs in a transaction
+    (or savepoint if one is already open). By default, a new connection is opened with the model's DB settings
+    :param return_field_names: Only return these fields (and the pk) of the models with return_models
+    :param return_format: Shape of the returned rows with return_models. "models", "dicts" or "tuples"
+    :return: None, List[Model] or BulkLoadCounts depending upon the returns_models and return_counts params
+    """
+    model_class, models = peek_models(models, model_class)
+    if models is None:
+        logger.warning("No models passed to abulk_insert_models")
+        return _no_models_result(return_models, return_counts)
+
+    return await _abulk_load(
+        _prepare_bulk_insert_models(
+            model_class=model_class,
+            reuse_loading_tables=reuse_loading_tables,
+            models=models,
+            ignore_conflicts=ignore_conflicts,
+            return_models=return_models,
+            return_field_names=return_field_names,
+            return_format=return_format,
+        ),
+        return_counts=return_counts,
+        binary_copy=binary_copy,
+        serialization_processes=serialization_processes,
+        connection=connection,
+    )
+
+
+async def abulk_update_models(
+    models: Iterable[Model],
+    update_field_names: Sequence[str] = None,
+    pk_field_names: Sequence[str] = None,
+    model_changed_field_names: Sequence[str] = None,
+    update_if_null_field_names: Sequence[str] = None,
+    update_where: Callable[[Sequence[Field], str, str], Composable] = None,
+    return_models: bool = False,
+    return_counts: bool = False,
+    model_class: Type[Model] = None,
+    binary_copy: bool = False,
+    serialization_processes: Optional[int] = None,
+    connection: Optional["psycopg.AsyncConnection"] = None,
+    reuse_loading_tables: bool = False,
+    analyze_threshold: Optional[int] = ANALYZE_THRESHOLD,
+    index_loading_table: bool = False,
+    dedupe: Optional[str] = None,
+    skip_unchanged: bool = False,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+):
+    """
+    Async version of bulk_update_models
+
+    :param connection: psycopg 3 AsyncConnection to load the models with. The load runs in a transaction
+    (or savepoint if one is already open). By default, a new connection is opened with the model's DB settings
+    :param analyze_threshold: ANALYZE the loading table before running the queries when at least this many models
+    are loaded. None never analyzes it
+    :param index_loading_table: Also index the loading table on pk_field_names when it's analyzed
+    :param dedupe: Keep only the "first" or "last" of the models with the same pk_field_names
+    :param skip_unchanged: Only load the models whose compared fields hash differently than their row in the DB
+    :param return_field_names: Only return these fields (and the pk) of the models with return_models
+    :param return_format: Shape of the returned rows with return_models. "models", "dicts" or "tuples"
+    :return: None, List[Model] or BulkLoadCounts depending upon the returns_models and return_counts params
+    """
+    model_class, models = peek_models(models, model_class)
+    if models is None:
+        logger.warning("No models passed to abulk_update_models")
+        return _no_models_result(return_models, return_counts)
+
+    return await _abulk_load(
+        _prepare_bulk_update_models(
+            model_class=model_class,
+            reuse_loading_tables=reuse_loading_tables,
+            index_loading_table=index_loading_table,
+            models=models,
+            update_field_names=update_field_names,
+            pk_field_names=pk_field_names,
+            model_changed_field_names=model_changed_field_names,
+            update_if_null_field_names=update_if_null_field_names,
+            update_where=update_where,
+            return_models=return_models,
+            return_field_names=return_field_names,
+            return_format=return_format,
+            skip_unchanged=skip_unchanged,
+        ),
+        return_counts=return_counts,
+        binary_copy=binary_copy,
+        serialization_processes=serialization_processes,
+        connection=connection,
+        analyze_threshold=analyze_threshold,
+        dedupe=dedupe,
+    )
+
+
+async def abulk_upsert_models(
+    models: Iterable[Model],
+    pk_field_names: Sequence[str] = None,
+    insert_only_field_names: Sequence[str] = None,
+    model_changed_field_names: Sequence[str] = None,
+    update_if_null_field_names: Sequence[str] = None,
+    update_where: Callable[[Sequence[Field], str, str], Composable] = None,
+    return_models: bool = False,
+    return_counts: bool = False,
+    model_class: Type[Model] = None,
+    binary_copy: bool = False,
+    serialization_processes: Optional[int] = None,
+    connection: Optional["psycopg.AsyncConnection"] = None,
+    upsert_strategy: str = UPDATE_THEN_INSERT_UPSERT_STRATEGY,
+    reuse_loading_tables: bool = False,
+    analyze_threshold: Optional[int] = ANALYZE_THRESHOLD,
+    index_loading_table: bool = False,
+    dedupe: Optional[str] = None,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+):
+    """
+    Async version of bulk_upsert_models
+
+    :param connection: psycopg 3 AsyncConnection to load the models with. The load runs in a transaction
+    (or savepoint if one is already open). By default, a new connection is opened with the model's DB settings
+    :param analyze_threshold: ANALYZE the loading table before running the queries when at least this many models
+    are loaded. None never analyzes it
+    :param index_loading_table: Also index the loading table on pk_field_names when it's analyzed
+    :param dedupe: Keep only the "first" or "last" of the models with the same pk_field_names
+    :param return_field_names: Only return these fields (and the pk) of the models with return_models
+    :param return_format: Shape of the returned rows with return_models. "models", "dicts" or "tuples"
+    :return: None, List[Model] or BulkLoadCounts depending upon the returns_models and return_counts params
+    """
+    model_class, models = peek_models(models, model_class)
+    if models is None:
+        logger.warning("No models passed to abulk_upsert_models")
+        return _no_models_result(return_models, return_counts)
+    if upsert_strategy == MERGE_UPSERT_STRATEGY:
+        _check_upsert_strategy_supported(
+            upsert_strategy, await _pg_version(router.db_for_write(model_class), connection)
+        )
+
+    return await _abulk_load(
+        _prepare_bulk_upsert_models(
+            model_class=model_class,
+            reuse_loading_tables=reuse_loading_tables,
+            index_loading_table=index_loading_table,
+            models=models,
+            pk_field_names=pk_field_names,
+            insert_only_field_names=insert_only_field_names,
+            model_changed_field_names=model_changed_field_names,
+            update_if_null_field_names=update_if_null_field_names,
+            update_where=update_where,
+            return_models=return_models,
+            return_field_names=return_field_names,
+            return_format=return_format,
+            return_counts=return_counts,
+            upsert_strategy=upsert_strategy,
+        ),
+        return_counts=return_counts,
+        binary_copy=binary_copy,
+        serialization_processes=serialization_processes,
+        connection=connection,
+        analyze_threshold=analyze_threshold,
+        dedupe=dedupe,
+    )
+
+
+async def abulk_insert_changed_models(
+    models: Iterable[Model],
+    pk_field_names: Sequence[str],
+    compare_field_names: Sequence[str],
+    order_field_name=None,
+    return_models=None,
+    return_counts: bool = False,
+    model_class: Type[Model] = None,
+    binary_copy: bool = False,
+    serialization_processes: Optional[int] = None,
+    connection: Optional["psycopg.AsyncConnection"] = None,
+    reuse_loading_tables: bool = False,
+    analyze_threshold: Optional[int] = ANALYZE_THRESHOLD,
+    index_loading_table: bool = False,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+):
+    """
+    Async version of bulk_insert_changed_models
+
+    :param connection: psycopg 3 AsyncConnection to load the models with. The load runs in a transaction
+    (or savepoint if one is already open). By default, a new connection is opened with the model's DB settings
+    :param analyze_threshold: ANALYZE the loading table before running the queries when at least this many models
+    are loaded. None never analyzes it
+    :param index_loading_table: Also index the loading table on pk_field_names when it's analyzed
+    :param return_field_names: Only return these fields (and the pk) of the models with return_models
+    :param return_format: Shape of the returned rows with return_models. "models", "dicts" or "tuples"
+    :return: None, List[Model] or BulkLoadCounts depending upon the returns_models and return_counts params
+    """
+    model_class, models = peek_models(models, model_class)
+    if models is None:
+        logger.warning("No models passed to abulk_insert_changed_models")
+        return _no_models_result(return_models, return_counts)
+
+    return await _abulk_load(
+        _prepare_bulk_insert_changed_models(
+            model_class=model_class,
+            reuse_loading_tables=reuse_loading_tables,
+            index_loading_table=index_loading_table,
+            models=models,
+            pk_field_names=pk_field_names,
+            compare_field_names=compare_field_names,
+            order_field_name=order_field_name,
+            return_models=return_models,
+            return_field_names=return_field_names,
+            return_format=return_format,
+        ),
+        return_counts=return_counts,
+        binary_copy=binary_copy,
+        serialization_processes=serialization_processes,
+        connection=connection,
+        analyze_threshold=analyze_threshold,
+    )
+
+
+async def _aload_select_loading_table(
+    cursor: "psycopg.AsyncCursor",
+    loading_table: _SelectLoadingTable,
+    filter_data: List[Sequence],
+    metrics: PhaseMetrics,
+):
+    with metrics.time(CREATE_TEMP_TABLE_PHASE):
+        await cursor.execute(to_psycopg_query(loading_table.create_query))
+    with metrics.time(COPY_PHASE) as copy_metrics:
+        async with cursor.copy(
+            to_psycopg_query(copy_query(loading_table.table_name, csv=False))
+        ) as copy:
+            for row in filter_data:
+                await copy.write_row(row)
+        copy_metrics["rowcount"] = cursor.rowcount
+
+
+async def abulk_select_model_dicts(
+    *,
+    model_class: Type[Model],
+    filter_field_names: Iterable[str],
+    select_field_names: Iterable[str],
+    filter_data: Iterable[Sequence],
+    skip_filter_transform=False,
+    select_for_update=False,
+    connection: Optional["psycopg.AsyncConnection"] = None,
+    copy_threshold: Optional[int] = None,
+    result_format: str = DICTS_RESULT_FORMAT,
+) -> Union[List[Dict], List[Tuple], SelectTuples, Dict[str, List]]:
+    """
+    Async version of bulk_select_model_dicts. The filter_data is sent in pages, since psycopg 3 sends
+    every value as a query parameter
+
+    :param connection: psycopg 3 AsyncConnection to query with. By default, a new connection is opened with
+    the model's DB settings
+    :return: List of dictionaries that match the model_data (or the rows in result_format)
+    """
+    _check_psycopg_installed()
+    start_time = monotonic()
+    db_name = router.db_for_read(model_class)
+    table_name = model_class._meta.db_table
+
+    sql, filter_data, select_fields, loading_table = _prepare_bulk_select_model_dicts(
+        model_class=model_class,
+        filter_field_names=filter_field_names,
+        select_field_names=select_field_names,
+        filter_data=filter_data,
+        skip_filter_transform=skip_filter_transform,
+        select_for_update=select_for_update,
+        copy_threshold=copy_threshold,
+        result_format=result_format,
+    )
+    if not filter_data:
+        return _format_select_rows(
+            [], model_class, select_fields, connections[db_name], result_format
+        )
+
+    logger.info(
+        "Starting selecting models",
+        extra=dict(query_dict_count=len(filter_data), table_name=table_name),
+    )
+
+    metrics = PhaseMetrics(model_class, SELECT_MODEL_DICTS_OPERATION)
+    rows = []
+    async with _connect(db_name, connection) as conn:
+        if loading_table is None:
+            async with _cursor(conn) as cursor:
+                with metrics.time(QUERY_PHASE, query_index=0) as query_metrics:
+                    query_string = to_psycopg_query(sql).as_string(conn)
+                    for page_query, page_params in paginate_values_query(query_string, filter_data):
+                        await cursor.execute(page_query, page_params)
+                        rows += await cursor.fetchall()
+                    query_metrics["rowcount"] = len(rows)
+        else:
+            # The loading table is dropped on commit
+            async with conn.transaction(), _cursor(conn) as cursor:
+                await _aload_select_loading_table(cursor, loading_table, filter_data, metrics)
+                with metrics.time(QUERY_PHASE, query_index=0) as query_metrics:
+                    await cursor.execute(to_psycopg_query(sql))
+                    rows = await cursor.fetchall()
+                    query_metrics["rowcount"] = len(rows)
+
+    with metrics.time(DESERIALIZE_PHASE, rowcount=len(rows)):
+        results = _format_select_rows(
+            rows, model_class, select_fields, connections[db_name], result_format
+        )
+
+    logger.info(
+        "Finished querying models",
+        extra=dict(
+            result_count=len(rows),
+            table_name=table_name,
+            duration=monotonic() - start_time,
+        ),
+    )
+
+    return results
+
+
+def abulk_select_model_dicts_iterator(
+    *,
+    model_class: Type[Model],
+    filter_field_names: Iterable[str],
+    select_field_names: Iterable[str],
+    filter_data: Iterable[Sequence],
+    skip_filter_transform=False,
+    select_for_update=False,
+    connection: Optional["psycopg.AsyncConnection"] = None,
+    copy_threshold: Optional[int] = None,
+    chunk_size: int = SELECT_CHUNK_SIZE,
+) -> AsyncIterator[Dict]:
+    """
+    Async version of bulk_select_model_dicts_iterator
+
+    :param connection: psycopg 3 AsyncConnection to query with. It must be in a transaction, which has to stay open
+    until the iterator is exhausted or closed. By default, a new connection is opened with the model's DB settings
+    and the select runs in its own transaction
+    :param chunk_size: Rows fetched from the server-side cursor at a time
+    :return: Async iterator of dictionaries that match the model_data
+    """
+    _check_psycopg_installed()
+    if (
+        connection is not None
+        and connection.info.transaction_status == psycopg.pq.TransactionStatus.IDLE
+    ):
+        # Opening the transaction here would also make it the transaction of the queries the caller runs on the
+        # connection while iterating
+        raise ValueError(
+            "abulk_select_model_dicts_iterator needs connection to be in a transaction, since server-side"
+            " cursors only exist in one"
+        )
+    start_time = monotonic()
+    table_name = model_class._meta.db_table
+
+    sql, filter_data, select_fields, loading_table = _prepare_bulk_select_model_dicts(
+        model_class=model_class,
+        filter_field_names=filter_field_names,
+        select_field_names=select_field_names,
+        filter_data=filter_data,
+        skip_filter_transform=skip_filter_transform,
+        select_for_update=select_for_update,
+        copy_threshold=copy_threshold,
+    )
+    return _aselect_model_dicts_in_chunks(
+        connection,
+        sql=sql,
+        filter_data=filter_data,
+        loading_table=loading_table,
+        model_class=model_class,
+        select_fields=select_fields,
+        chunk_size=chunk_size,
+        start_time=start_time,
+    )
+
+
+async def _aselect_model_dicts_in_chunks(
+    connection: Optional["psycopg.AsyncConnection"],
+    *,
+    sql: Composable,
+    filter_data: List[Sequence],
+    loading_table: Optional[_SelectLoadingTable],
+    model_class: Type[Model],
+    select_fields: Sequence[Field],
+    chunk_size: int,
+    start_time: float,
+) -> AsyncIterator[Dict]:
+    """
+    Async version of bulk_load._select_model_dicts_in_chunks. Without a connection, the select runs in a transaction
+    on a new connection
+    """
+    if not filter_data:
+        return
+
+    db_name = router.db_for_read(model_class)
+    table_name = model_class._meta.db_table
+    logger.info(
+        "Starting selecting models",
+        extra=dict(query_dict_count=len(filter_data), table_name=table_name),
+    )
+
+    metrics = PhaseMetrics(model_class, SELECT_MODEL_DICTS_OPERATION)
+    django_connection = connections[db_name]
+    result_count = 0
+    async with _connect(db_name, connection) as conn, _select_transaction(conn, connection):
+        query_string = to_psycopg_query(sql).as_string(conn)
+        if loading_table is None:
+            queries = paginate_values_query(query_string, filter_data)
+        else:
+            async with _cursor(conn) as cursor:
+                await _aload_select_loading_table(cursor, loading_table, filter_data, metrics)
+            queries = [(query_string, None)]
+
+        for query_index, (query, params) in enumerate(queries):
+            async with _cursor(conn, name=f"bulk_select_{query_index}") as cursor:
+                with metrics.time(QUERY_PHASE, query_index=query_index):
+                    await cursor.execute(query, params)
+                while True:
+                    with metrics.time(FETCH_PHASE) as fetch_metrics:
+                        rows = await cursor.fetchmany(chunk_size)
+                        fetch_metrics["rowcount"] = len(rows)
+                    if not rows:
+                        break
+                    with metrics.time(DESERIALIZE_PHASE, rowcount=len(rows)):
+                        results = _format_select_rows(
+                            rows, model_class, select_fields, django_connection
+                        )
+                    result_count += len(results)
+                    for result in results:
+                        yield result
+
+    logger.info(
+        "Finished querying models",
+        extra=dict(
+            result_count=result_count,
+            table_name=table_name,
+            duration=monotonic() - start_time,
+        ),
+    )
+
+
+@asynccontextmanager
+async def _select_transaction(
+    conn: "psycopg.AsyncConnection", connection: Optional["psycopg.AsyncConnection"]
+) -> AsyncIterator[None]:
+    # Server-side cursors only exist in a transaction. A connection passed by the caller is already in one, which
+    # isn't ended (or rolled back to a savepoint) when the iterator is closed early
+    if connection is not None:
+        yield
+        return
+    async with conn.transaction():
+        yield
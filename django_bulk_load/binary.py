@@ -0,0 +1,237 @@
+import json
+import re
+import struct
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence
+from uuid import UUID
+
+from django.db import models
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.utils.timezone import get_default_timezone, is_naive, make_aware
+from psycopg2.extras import Json
+
+try:
+    from psycopg.types.json import Jsonb
+except ImportError:
+    Jsonb = None
+
+from .utils import COPY_BUFFER_SIZE
+
+# See https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.4
+BINARY_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+BINARY_COPY_TRAILER = struct.pack("!h", -1)
+BINARY_NULL = struct.pack("!i", -1)
+
+POSTGRES_EPOCH_DATETIME = datetime(2000, 1, 1, tzinfo=timezone.utc)
+POSTGRES_EPOCH_DATE = date(2000, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+NUMERIC_POSITIVE = 0x0000
+NUMERIC_NEGATIVE = 0x4000
+NUMERIC_NAN = 0xC000
+NUMERIC_POSITIVE_INFINITY = 0xD000
+NUMERIC_NEGATIVE_INFINITY = 0xF000
+
+_int2 = struct.Struct("!ih")
+_int4 = struct.Struct("!ii")
+_int8 = struct.Struct("!iq")
+_float4 = struct.Struct("!if")
+_float8 = struct.Struct("!id")
+_bool = struct.Struct("!i?")
+_length = struct.Struct("!i")
+_field_count = struct.Struct("!h")
+_numeric_header = struct.Struct("!ihhHh")
+
+Packer = Callable[[Any, BaseDatabaseWrapper], bytes]
+
+
+def _pack_bytes(value: bytes) -> bytes:
+    return _length.pack(len(value)) + value
+
+
+def _pack_int2(value, connection) -> bytes:
+    return _int2.pack(2, value)
+
+
+def _pack_int4(value, connection) -> bytes:
+    return _int4.pack(4, value)
+
+
+def _pack_int8(value, connection) -> bytes:
+    return _int8.pack(8, value)
+
+
+def _pack_float4(value, connection) -> bytes:
+    return _float4.pack(4, value)
+
+
+def _pack_float8(value, connection) -> bytes:
+    return _float8.pack(8, value)
+
+
+def _pack_bool(value, connection) -> bytes:
+    return _bool.pack(1, value)
+
+
+def _pack_text(value, connection) -> bytes:
+    return _pack_bytes(str(value).encode())
+
+
+def make_timestamptz_aware(value: datetime, connection: BaseDatabaseWrapper) -> datetime:
+    if is_naive(value):
+        # Naive datetimes are stored in the connection's time zone, which matches what postgres does with text input.
+        # Without USE_TZ, connection.timezone is None, but the connection still uses TIME_ZONE
+        value = make_aware(value, connection.timezone or get_default_timezone())
+    return value
+
+
+def _pack_timestamptz(value: datetime, connection) -> bytes:
+    value = make_timestamptz_aware(value, connection)
+    return _int8.pack(8, (value - POSTGRES_EPOCH_DATETIME) // ONE_MICROSECOND)
+
+
+def _pack_date(value: date, connection) -> bytes:
+    return _int4.pack(4, (value - POSTGRES_EPOCH_DATE).days)
+
+
+def _pack_time(value: time, connection) -> bytes:
+    return _int8.pack(
+        8,
+        ((value.hour * 60 + value.minute) * 60 + value.second) * 1_000_000
+        + value.microsecond,
+    )
+
+
+def _pack_uuid(value, connection) -> bytes:
+    if not isinstance(value, UUID):
+        value = UUID(value)
+    return _pack_bytes(value.bytes)
+
+
+def _pack_numeric(value, connection) -> bytes:
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+
+    if value.is_nan():
+        return _numeric_header.pack(8, 0, 0, NUMERIC_NAN, 0)
+    if value.is_infinite():
+        sign = NUMERIC_NEGATIVE_INFINITY if value.is_signed() else NUMERIC_POSITIVE_INFINITY
+        return _numeric_header.pack(8, 0, 0, sign, 0)
+
+    sign, digits, exponent = value.as_tuple()
+    display_scale = max(0, -exponent)
+
+    # Postgres stores numerics as base 10000 digits, so pad the decimal digits to align them in groups of 4
+    # around the decimal point
+    right_padding = exponent % 4
+    exponent -= right_padding
+    digits = list(digits) + [0] * right_padding
+    digits = [0] * (-len(digits) % 4) + digits
+    groups = [
+        digits[i] * 1000 + digits[i + 1] * 100 + digits[i + 2] * 10 + digits[i + 3]
+        for i in range(0, len(digits), 4)
+    ]
+    weight = exponent // 4 + len(groups) - 1
+
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+
+    if not groups:
+        return _numeric_header.pack(8, 0, 0, NUMERIC_POSITIVE, display_scale)
+
+    return _numeric_header.pack(
+        8 + 2 * len(groups),
+        len(groups),
+        weight,
+        NUMERIC_NEGATIVE if sign else NUMERIC_POSITIVE,
+        display_scale,
+    ) + struct.pack(f"!{len(groups)}h", *groups)
+
+
+def _pack_jsonb(value, connection) -> bytes:
+    if isinstance(value, Json):
+        value = value.dumps(value.adapted)
+    elif Jsonb is not None and isinstance(value, Jsonb):
+        value = (value.dumps or json.dumps)(value.obj)
+    elif not isinstance(value, str):
+        value = json.dumps(value)
+    # jsonb binary format is a version number followed by the json text
+    return _pack_bytes(b"\x01" + value.encode())
+
+
+def _pack_bytea(value, connection) -> bytes:
+    if isinstance(value, connection.Database.Binary):
+        # psycopg2 keeps the wrapped bytes in adapted and psycopg 3 in obj
+        value = value.adapted if hasattr(value, "adapted") else value.obj
+    return _pack_bytes(bytes(value))
+
+
+BINARY_PACKERS: Dict[str, Packer] = {
+    "smallint": _pack_int2,
+    "integer": _pack_int4,
+    "bigint": _pack_int8,
+    "real": _pack_float4,
+    "double precision": _pack_float8,
+    "boolean": _pack_bool,
+    "timestamp with time zone": _pack_timestamptz,
+    "date": _pack_date,
+    "time": _pack_time,
+    "uuid": _pack_uuid,
+    "numeric": _pack_numeric,
+    "jsonb": _pack_jsonb,
+    "bytea": _pack_bytea,
+    "text": _pack_text,
+    "varchar": _pack_text,
+    "char": _pack_text,
+}
+
+
+def get_field_db_type(field: models.Field, connection: BaseDatabaseWrapper) -> str:
+    # rel_db_type resolves AutoFields to their underlying integer type and ForeignKeys to the type of the
+    # related field. Remove any modifiers (i.e. varchar(100) or numeric(10, 2)), since they don't affect the format
+    return re.sub(r"\(.*\)", "", field.rel_db_type(connection) or "").strip()
+
+
+def get_binary_packer(field: models.Field, connection: BaseDatabaseWrapper) -> Packer:
+    db_type = get_field_db_type(field, connection)
+    try:
+        return BINARY_PACKERS[db_type]
+    except KeyError:
+        raise ValueError(
+            f"Field '{field.name}' with DB type '{db_type}' is not supported by binary COPY"
+        )
+
+
+def models_to_binary_chunks(
+    models: Iterable[Any],
+    include_fields: Sequence[models.Field],
+    connection: BaseDatabaseWrapper,
+    get_row_values: Callable[[Any], List[Any]],
+    chunk_size: int = COPY_BUFFER_SIZE,
+    include_header: bool = True,
+) -> Iterator[bytes]:
+    """
+    Lazily serialize models into the Postgres binary COPY format in chunks of roughly chunk_size bytes.
+    Pass include_header=False to only serialize the rows, so they can be joined with other serialized rows.
+    """
+    packers = [get_binary_packer(field, connection) for field in include_fields]
+    field_count = _field_count.pack(len(include_fields))
+
+    buffer = bytearray(BINARY_COPY_HEADER if include_header else b"")
+    for obj in models:
+        buffer += field_count
+        for field_val, packer in zip(get_row_values(obj), packers):
+            buffer += BINARY_NULL if field_val is None else packer(field_val, connection)
+
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+
+    if include_header:
+        buffer += BINARY_COPY_TRAILER
+    if buffer:
+        yield bytes(buffer)
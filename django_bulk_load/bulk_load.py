@@ -1,83 +1,447 @@
 import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache, wraps
+from itertools import zip_longest
+from threading import Barrier, BrokenBarrierError
 from time import monotonic
-from typing import Dict, Iterable, List, Optional, Sequence, Type, Callable
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Sized,
+    Tuple,
+    Type,
+    Union,
+)
 
 from django.db import connections, router, transaction
 from django.db.backends.base.base import BaseDatabaseWrapper
 from django.db.backends.utils import CursorWrapper
 from django.db.models import AutoField, Model, Field
-from psycopg2.extras import execute_values
 from psycopg2.sql import Composable, SQL
 
 from .django import (
+    db_values_to_hash,
     django_field_to_query_value,
     get_fields_and_names,
     get_fields_from_names,
     get_model_fields,
     get_pk_fields,
-    models_to_tsv_buffer,
+    get_row_values_getter,
+    peek_models,
+    records_to_dicts,
     records_to_models,
+    records_to_tuples,
+)
+from .drivers import MAX_QUERY_PARAMS, get_driver, paginate_values_query
+from .metrics import (
+    ANALYZE_PHASE,
+    COMMIT_PHASE,
+    COPY_PHASE,
+    CREATE_TEMP_TABLE_PHASE,
+    DESERIALIZE_PHASE,
+    FETCH_PHASE,
+    LOAD_MODELS_WITH_QUERIES_OPERATION,
+    QUERY_PHASE,
+    SELECT_MODEL_DICTS_OPERATION,
+    SKIP_UNCHANGED_PHASE,
+    PhaseMetrics,
 )
 from .queries import (
     add_returning,
+    analyze_table,
+    create_index,
     create_temp_table,
     generate_insert_on_not_match_latest,
     generate_insert_query,
     generate_insert_for_update_query,
+    generate_loading_table_select_query,
+    generate_merge_query,
     generate_select_latest,
     generate_select_query,
     generate_update_query,
+    generate_upsert_on_conflict_query,
+    generate_values_select_hash_query,
     generate_values_select_query,
-    copy_query
+    quote_identifier,
+    render_query,
+    set_local_extra_float_digits,
+    set_local_lock_timeout,
+    show_extra_float_digits,
+)
+from .utils import (
+    ANALYZE_THRESHOLD,
+    COPY_BUFFER_SIZE,
+    PARALLEL_LOCK_TIMEOUT_MS,
+    SELECT_CHUNK_SIZE,
+    chunked,
+    generate_table_name,
 )
-from .utils import generate_table_name
 
 logger = logging.getLogger(__name__)
 
+# Partitions wait for each other and either all commit or all roll back
+ALL_OR_NOTHING_COMMIT_POLICY = "all_or_nothing"
+# Partitions commit independently, so partitions that succeeded stay committed if another fails
+BEST_EFFORT_COMMIT_POLICY = "best_effort"
+COMMIT_POLICIES = (ALL_OR_NOTHING_COMMIT_POLICY, BEST_EFFORT_COMMIT_POLICY)
+
+# UPDATE the models that match existing rows, then INSERT the ones that don't
+UPDATE_THEN_INSERT_UPSERT_STRATEGY = "update_then_insert"
+# A single INSERT ... ON CONFLICT DO UPDATE. pk_field_names must match a unique index
+ON_CONFLICT_UPSERT_STRATEGY = "on_conflict"
+# A single MERGE (Postgres 15+)
+MERGE_UPSERT_STRATEGY = "merge"
+UPSERT_STRATEGIES = (
+    UPDATE_THEN_INSERT_UPSERT_STRATEGY,
+    ON_CONFLICT_UPSERT_STRATEGY,
+    MERGE_UPSERT_STRATEGY,
+)
+MERGE_MIN_PG_VERSION = 150000
+
+# Keep the first/last of the models with the same values for the fields used to match existing rows
+FIRST_DEDUPE = "first"
+LAST_DEDUPE = "last"
+DEDUPES = (FIRST_DEDUPE, LAST_DEDUPE)
+
+# Shapes of the results of bulk_select_model_dicts. A dict per row, a named tuple per row, plain tuples per row
+# with the field names (SelectTuples) or a dict of field name to the list of its values
+DICTS_RESULT_FORMAT = "dicts"
+NAMEDTUPLES_RESULT_FORMAT = "namedtuples"
+TUPLES_RESULT_FORMAT = "tuples"
+COLUMNS_RESULT_FORMAT = "columns"
+RESULT_FORMATS = (
+    DICTS_RESULT_FORMAT,
+    NAMEDTUPLES_RESULT_FORMAT,
+    TUPLES_RESULT_FORMAT,
+    COLUMNS_RESULT_FORMAT,
+)
+
+# Shapes of the results of return_models. Django models, a dict per row or a plain tuple per row (in the order of
+# the returned fields). Dicts and tuples skip creating the models
+MODELS_RETURN_FORMAT = "models"
+DICTS_RETURN_FORMAT = "dicts"
+TUPLES_RETURN_FORMAT = "tuples"
+RETURN_FORMATS = (MODELS_RETURN_FORMAT, DICTS_RETURN_FORMAT, TUPLES_RETURN_FORMAT)
+
+# Load options (and their rendered queries) cached per bulk operation. See _cached_load_options
+LOAD_OPTIONS_CACHE_SIZE = 256
+LOADING_TABLE_PLACEHOLDER = "loading_table_placeholder"
+
+# What the rowcount of a load query counts (see query_counts of bulk_load_models_with_queries)
+INSERTED_COUNT = "inserted"
+UPDATED_COUNT = "updated"
+
+
+class BulkLoadCounts(NamedTuple):
+    """
+    Rows affected by a bulk load, taken from the rowcount of each load query
+    """
+
+    # Models loaded into the loading table, plus the ones skipped by skip_unchanged
+    loaded: int
+    inserted: int
+    updated: int
+    # Models neither inserted nor updated (i.e. unchanged, not found by an update or conflicting with ignore_conflicts)
+    unchanged: int
+    # The rowcount of each load query, in order
+    query_rowcounts: Tuple[int, ...]
+
+
+def _build_counts(
+    model_count: int,
+    query_rowcounts: Sequence[int],
+    query_counts: Optional[Sequence[Optional[str]]],
+) -> BulkLoadCounts:
+    totals = {INSERTED_COUNT: 0, UPDATED_COUNT: 0}
+    for count_name, rowcount in zip(query_counts or [], query_rowcounts):
+        if count_name:
+            totals[count_name] += rowcount
+
+    inserted = totals[INSERTED_COUNT]
+    updated = totals[UPDATED_COUNT]
+    return BulkLoadCounts(
+        loaded=model_count,
+        inserted=inserted,
+        updated=updated,
+        unchanged=max(model_count - inserted - updated, 0),
+        query_rowcounts=tuple(query_rowcounts),
+    )
+
+
+def _no_models_result(return_models: bool, return_counts: bool):
+    if return_counts:
+        return _build_counts(0, [], None)
+    return [] if return_models else None
+
+
+def _get_return_fields(
+    model_meta,
+    return_models: bool,
+    return_field_names: Optional[Sequence[str]],
+    return_format: str = MODELS_RETURN_FORMAT,
+) -> Optional[List[Field]]:
+    """
+    Fields selected or returned for return_models. None selects every column. The pk is always returned, so the
+    models can be told apart. Dicts and tuples always list their columns, so the order of their values is the order
+    of the model's concrete fields (or the pk followed by return_field_names)
+    """
+    if return_format not in RETURN_FORMATS:
+        raise ValueError(f"return_format must be one of {RETURN_FORMATS}")
+    if (return_field_names is not None or return_format != MODELS_RETURN_FORMAT) and not return_models:
+        raise ValueError("return_field_names and return_format can only be used with return_models")
+    if return_field_names is None:
+        if return_format == MODELS_RETURN_FORMAT:
+            return None
+        return list(model_meta.concrete_fields)
+    return get_fields_from_names(
+        dict.fromkeys([model_meta.pk.name, *return_field_names]), model_meta
+    )
+
+
+def _records_to_results(
+    records: List[Sequence],
+    columns: List[str],
+    model_class: Type[Model],
+    connection: BaseDatabaseWrapper,
+    return_format: str = MODELS_RETURN_FORMAT,
+) -> List:
+    if return_format == DICTS_RETURN_FORMAT:
+        return records_to_dicts(records, columns, model_class, connection)
+    if return_format == TUPLES_RETURN_FORMAT:
+        return records_to_tuples(records, columns, model_class, connection)
+    return records_to_models(records, columns, model_class, connection)
+
+
+def _cached_load_options(
+    build_load_options: Callable[..., Dict[str, Any]]
+) -> Callable[..., Dict[str, Any]]:
+    """
+    Cache the load options built for a model class and options, so repeated loads of the same model skip
+    generating their queries. The queries are built once for a placeholder loading table and rendered to SQL, and
+    each call only substitutes the name of its own loading table.
+
+    Loads with an update_where function aren't cached, since it can return different SQL on every call.
+
+    With reuse_loading_tables, the loading table is named after its columns instead of a unique name, so the
+    loading table of a connection is reused by every load with the same columns. With index_loading_table, the
+    loading table is indexed on the fields used to match existing rows (partition_field_names)
+    """
+
+    @lru_cache(maxsize=LOAD_OPTIONS_CACHE_SIZE)
+    def build_rendered_load_options(
+        model_class: Type[Model], options: Tuple[Tuple[str, Any], ...]
+    ) -> Dict[str, Any]:
+        load_options = build_load_options(
+            model_class=model_class,
+            loading_table_name=LOADING_TABLE_PLACEHOLDER,
+            **dict(options),
+        )
+        load_options["load_queries"] = [
+            render_query(query) for query in load_options["load_queries"]
+        ]
+        return load_options
+
+    def generate_loading_table_name(
+        model_class: Type[Model], load_options: Dict[str, Any], reuse_loading_tables: bool
+    ) -> str:
+        if not reuse_loading_tables:
+            return generate_table_name(model_class._meta.db_table)
+        fields, _ = get_fields_and_names(
+            load_options.get("field_names"), model_class._meta, include_auto_fields=True
+        )
+        connection = connections[router.db_for_write(model_class)]
+        return generate_table_name(
+            model_class._meta.db_table,
+            column_names=[field.column for field in fields],
+            column_types=[field.db_type(connection) for field in fields],
+        )
+
+    @wraps(build_load_options)
+    def get_load_options(
+        *,
+        model_class: Type[Model],
+        reuse_loading_tables: bool = False,
+        index_loading_table: bool = False,
+        **options,
+    ) -> Dict[str, Any]:
+        cache_key = tuple(
+            sorted(
+                (name, tuple(value) if isinstance(value, list) else value)
+                for name, value in options.items()
+            )
+        )
+        try:
+            hash(cache_key)
+        except TypeError:
+            cache_key = None
+        if cache_key is None or options.get("update_where"):
+            # The name of a reused loading table depends on the field_names of the load options, so they're built
+            # once to get them
+            loading_table_name = generate_loading_table_name(
+                model_class,
+                build_load_options(
+                    model_class=model_class,
+                    loading_table_name=LOADING_TABLE_PLACEHOLDER,
+                    **options,
+                )
+                if reuse_loading_tables
+                else {},
+                reuse_loading_tables,
+            )
+            load_options = build_load_options(
+                model_class=model_class, loading_table_name=loading_table_name, **options
+            )
+            return dict(
+                load_options,
+                reuse_loading_tables=reuse_loading_tables,
+                index_field_names=load_options.get("partition_field_names")
+                if index_loading_table
+                else None,
+            )
+
+        load_options = build_rendered_load_options(model_class, cache_key)
+        loading_table_name = generate_loading_table_name(
+            model_class, load_options, reuse_loading_tables
+        )
+        placeholder = quote_identifier(LOADING_TABLE_PLACEHOLDER)
+        quoted_loading_table_name = quote_identifier(loading_table_name)
+        return dict(
+            load_options,
+            loading_table_name=loading_table_name,
+            load_queries=[
+                SQL(query.replace(placeholder, quoted_loading_table_name))
+                for query in load_options["load_queries"]
+            ],
+            reuse_loading_tables=reuse_loading_tables,
+            index_field_names=load_options.get("partition_field_names")
+            if index_loading_table
+            else None,
+        )
+
+    get_load_options.cache_info = build_rendered_load_options.cache_info
+    get_load_options.cache_clear = build_rendered_load_options.cache_clear
+    return get_load_options
+
 
 def create_temp_table_and_load(
-    models: Sequence[Model],
+    models: Iterable[Model],
     connection: BaseDatabaseWrapper,
     cursor: CursorWrapper,
     field_names: Optional[Sequence[str]] = None,
     table_name: Optional[str] = None,
+    copy_buffer_size: int = COPY_BUFFER_SIZE,
+    model_class: Optional[Type[Model]] = None,
+    binary_copy: bool = False,
+    serialization_processes: Optional[int] = None,
+    pipeline_serialization: bool = False,
+    metrics: Optional[PhaseMetrics] = None,
+    reuse_loading_tables: bool = False,
 ) -> str:
-    if not models:
+    model_class, models = peek_models(models, model_class)
+    if models is None:
         raise ValueError("No models passed. Can't create table without models")
+    metrics = metrics or PhaseMetrics(model_class, LOAD_MODELS_WITH_QUERIES_OPERATION)
 
-    model_meta = models[0]._meta
+    model_meta = model_class._meta
     source_table_name = model_meta.db_table
-    table_name = table_name or generate_table_name(source_table_name=source_table_name)
     fields, field_names = get_fields_and_names(
         field_names, model_meta, include_auto_fields=True
     )
+    column_names = [x.column for x in fields]
+    if table_name is None and reuse_loading_tables:
+        table_name = generate_table_name(
+            source_table_name=source_table_name,
+            column_names=column_names,
+            column_types=[field.db_type(connection) for field in fields],
+        )
+    table_name = table_name or generate_table_name(source_table_name=source_table_name)
     temp_table_query = create_temp_table(
         temp_table_name=table_name,
         source_table_name=source_table_name,
-        column_names=[x.column for x in fields],
-    )
-    tsv_buffer = models_to_tsv_buffer(models, fields, connection=connection)
-    cursor.execute(temp_table_query)
-    cursor.copy_expert(
-        copy_query(table_name),
-        tsv_buffer,
+        column_names=column_names,
+        reusable=reuse_loading_tables,
     )
+    driver = get_driver(connection)
+    with metrics.time(CREATE_TEMP_TABLE_PHASE):
+        driver.execute(cursor, temp_table_query)
+    with metrics.time(COPY_PHASE) as copy_metrics:
+        byte_count = driver.copy_models(
+            cursor=cursor,
+            connection=connection,
+            table_name=table_name,
+            models=models,
+            model_class=model_class,
+            fields=fields,
+            copy_buffer_size=copy_buffer_size,
+            binary_copy=binary_copy,
+            serialization_processes=serialization_processes,
+            pipeline_serialization=pipeline_serialization,
+            metrics=metrics,
+        )
+        copy_metrics.update(rowcount=cursor.rowcount, byte_count=byte_count)
 
     return table_name
 
 
+def generate_analyze_loading_table_queries(
+    table_name: str,
+    model_class: Type[Model],
+    index_field_names: Optional[Sequence[str]] = None,
+) -> List[Composable]:
+    """
+    Queries that ANALYZE a loading table, so the load queries are planned with its real size and distribution
+    instead of the estimates for a table without statistics. With index_field_names, the loading table is indexed
+    on their columns first, so the joins with the DB table can use it
+    """
+    queries = []
+    if index_field_names:
+        fields = get_fields_from_names(index_field_names, model_class._meta)
+        queries.append(create_index(table_name, [field.column for field in fields]))
+    queries.append(analyze_table(table_name))
+    return queries
+
+
+def _execute_query(
+    driver, cursor: CursorWrapper, query: Composable, query_index: int, metrics: PhaseMetrics
+) -> int:
+    with metrics.time(QUERY_PHASE, query_index=query_index) as query_metrics:
+        driver.execute(cursor, query)
+        query_metrics["rowcount"] = cursor.rowcount
+    return cursor.rowcount
+
+
 def execute_queries_and_return_models(
-    load_queries: Sequence[Composable], cursor: CursorWrapper, model_class: Type[Model]
+    load_queries: Sequence[Composable],
+    cursor: CursorWrapper,
+    model_class: Type[Model],
+    metrics: Optional[PhaseMetrics] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
 ):
+    metrics = metrics or PhaseMetrics(model_class, LOAD_MODELS_WITH_QUERIES_OPERATION)
+    driver = get_driver(cursor.db)
     results = []
     has_query_returning_results = False
-    for query in load_queries:
-        cursor.execute(query)
+    for query_index, query in enumerate(load_queries):
+        _execute_query(driver, cursor, query, query_index, metrics)
 
         if cursor.description:
             has_query_returning_results = True
             columns = [col[0] for col in cursor.description]
-            results += records_to_models(cursor.fetchall(), columns, model_class)
+            with metrics.time(FETCH_PHASE) as fetch_metrics:
+                records = cursor.fetchall()
+                fetch_metrics["rowcount"] = len(records)
+            with metrics.time(DESERIALIZE_PHASE, rowcount=len(records)):
+                results += _records_to_results(
+                    records, columns, model_class, cursor.db, return_format
+                )
 
     if not has_query_returning_results:
         raise ValueError(
@@ -88,97 +452,509 @@ def execute_queries_and_return_models(
     return results
 
 
-def bulk_load_models_with_queries(
+def _load_models_with_queries(
     *,
-    models: Sequence[Model],
+    models: Iterable[Model],
+    model_class: Type[Model],
+    db_name: str,
     loading_table_name: str,
     load_queries: Sequence[Composable],
-    field_names: Sequence[str] = None,
-    return_models: bool = False,
-):
-    start_time = monotonic()
-    model = models[0]
-    db_name = router.db_for_write(model.__class__)
-
+    field_names: Optional[Sequence[str]],
+    return_models: bool,
+    metrics: PhaseMetrics,
+    return_format: str = MODELS_RETURN_FORMAT,
+    before_commit: Optional[Callable[[], None]] = None,
+    analyze_threshold: Optional[int] = None,
+    index_field_names: Optional[Sequence[str]] = None,
+    lock_timeout: Optional[int] = None,
+    **copy_options,
+) -> Tuple[Optional[List[Model]], int, List[int]]:
     connection = connections[db_name]
+    driver = get_driver(connection)
     results = None
+    query_rowcounts = []
 
-    with connection.cursor() as cursor, transaction.atomic(using=db_name):
-        table_name = model._meta.db_table
+    with connection.cursor() as cursor:
+        with transaction.atomic(using=db_name):
+            if lock_timeout is not None:
+                driver.execute(cursor, set_local_lock_timeout(lock_timeout))
+            loading_table_name = create_temp_table_and_load(
+                models=models,
+                table_name=loading_table_name,
+                field_names=field_names,
+                cursor=cursor,
+                connection=connection,
+                model_class=model_class,
+                metrics=metrics,
+                **copy_options,
+            )
+            # COPY reports the number of rows loaded, which also covers models passed as iterators
+            model_count = cursor.rowcount
+            if analyze_threshold is not None and model_count >= analyze_threshold:
+                with metrics.time(ANALYZE_PHASE, rowcount=model_count):
+                    for query in generate_analyze_loading_table_queries(
+                        loading_table_name, model_class, index_field_names
+                    ):
+                        driver.execute(cursor, query)
+            logger.info(
+                "Starting execution of queries on loading table",
+                extra=dict(
+                    table_name=model_class._meta.db_table,
+                    loading_table_name=loading_table_name,
+                ),
+            )
+            if return_models:
+                results = execute_queries_and_return_models(
+                    load_queries=load_queries,
+                    cursor=cursor,
+                    model_class=model_class,
+                    metrics=metrics,
+                    return_format=return_format,
+                )
+            else:
+                query_rowcounts = [
+                    _execute_query(driver, cursor, query, query_index, metrics)
+                    for query_index, query in enumerate(load_queries)
+                ]
 
-        logger.info(
-            "Starting loading models",
-            extra=dict(model_count=len(models), table_name=table_name),
+            if before_commit:
+                before_commit()
+            commit_start = monotonic()
+        metrics.send(COMMIT_PHASE, monotonic() - commit_start)
+
+    return results, model_count, query_rowcounts
+
+
+def _model_key_getter(
+    key_field_names: Optional[Sequence[str]], model_class: Type[Model]
+) -> Callable[[int, Model], Any]:
+    """
+    Get the values of key_field_names of a model and its index. Models without key values (i.e. new models with an
+    AutoField pk) can't match existing rows, so their index is used as a key instead
+    """
+    attnames = [
+        field.attname
+        for field in get_fields_from_names(key_field_names or [], model_class._meta)
+    ]
+
+    def get_key(i: int, model: Model) -> Any:
+        key = tuple(getattr(model, attname) for attname in attnames)
+        if not key or None in key:
+            return i
+        return key
+
+    return get_key
+
+
+def _dedupe_models(
+    models: Iterable[Model],
+    key_field_names: Sequence[str],
+    model_class: Type[Model],
+    dedupe: str,
+) -> Iterable[Model]:
+    """
+    Keep only the first or last model for each value of key_field_names. "first" streams the models, while "last"
+    holds them in memory until all of them are read
+    """
+    get_key = _model_key_getter(key_field_names, model_class)
+    if dedupe == LAST_DEDUPE:
+        # Later models replace earlier ones with the same key
+        return list({get_key(i, model): model for i, model in enumerate(models)}.values())
+
+    def first_models() -> Iterator[Model]:
+        seen_keys = set()
+        for i, model in enumerate(models):
+            key = get_key(i, model)
+            if key not in seen_keys:
+                seen_keys.add(key)
+                yield model
+
+    return first_models()
+
+
+def _partition_models(
+    models: Iterable[Model],
+    partition_field_names: Optional[Sequence[str]],
+    model_class: Type[Model],
+    parallelism: int,
+) -> List[List[Model]]:
+    """
+    Hash partition models by the values of partition_field_names, so models with the same values always end up in the
+    same partition. Models without partition values are spread evenly, since they can't match existing rows.
+    """
+    partitions = [[] for _ in range(parallelism)]
+    get_key = _model_key_getter(partition_field_names, model_class)
+    for i, model in enumerate(models):
+        partitions[hash(get_key(i, model)) % parallelism].append(model)
+
+    return [partition for partition in partitions if partition]
+
+
+def _load_partitions_in_parallel(
+    *,
+    partitions: Sequence[Sequence[Model]],
+    db_name: str,
+    commit_policy: str,
+    lock_timeout_ms: Optional[int],
+    **load_options,
+) -> Tuple[Optional[List[Model]], int, List[int]]:
+    # With all_or_nothing, every partition waits for the others to finish their queries before committing. If any
+    # partition fails, the barrier is aborted and the others roll back. A partition waiting to commit keeps its row
+    # locks, so a partition blocked on them (e.g. by a unique value also inserted by the other partition) would never
+    # reach the barrier. The lock timeout makes it fail instead, which rolls back every partition.
+    commit_barrier = Barrier(len(partitions))
+    all_or_nothing = commit_policy == ALL_OR_NOTHING_COMMIT_POLICY
+    before_commit = commit_barrier.wait if all_or_nothing else None
+    lock_timeout = lock_timeout_ms if all_or_nothing else None
+
+    def load_partition(partition: Sequence[Model]):
+        try:
+            return _load_models_with_queries(
+                models=partition,
+                db_name=db_name,
+                before_commit=before_commit,
+                lock_timeout=lock_timeout,
+                **load_options,
+            )
+        except BaseException:
+            commit_barrier.abort()
+            raise
+        finally:
+            # Each thread gets its own DB connection, which isn't reused once the thread is done
+            connections[db_name].close()
+
+    with ThreadPoolExecutor(max_workers=len(partitions)) as executor:
+        futures = [executor.submit(load_partition, partition) for partition in partitions]
+        wait(futures)
+
+    errors = [future.exception() for future in futures if future.exception()]
+    if errors:
+        logger.error(
+            "Failed loading partitions",
+            extra=dict(
+                partition_count=len(partitions),
+                failed_partition_count=len(errors),
+                commit_policy=commit_policy,
+            ),
         )
-        loading_table_name = create_temp_table_and_load(
-            models=models,
-            table_name=loading_table_name,
-            field_names=field_names,
-            cursor=cursor,
-            connection=connection,
+        # Prefer raising the error that caused the others to abort over the BrokenBarrierErrors
+        raise next(
+            (error for error in errors if not isinstance(error, BrokenBarrierError)),
+            errors[0],
         )
-        logger.info(
-            "Starting execution of queries on loading table",
-            extra=dict(table_name=table_name, loading_table_name=loading_table_name),
+
+    results = None
+    model_count = 0
+    query_rowcounts = []
+    for future in futures:
+        partition_results, partition_model_count, partition_rowcounts = future.result()
+        model_count += partition_model_count
+        if partition_results is not None:
+            results = (results or []) + partition_results
+        # Every partition runs the same queries, so their rowcounts add up
+        query_rowcounts = [
+            sum(rowcounts)
+            for rowcounts in zip_longest(query_rowcounts, partition_rowcounts, fillvalue=0)
+        ]
+
+    return results, model_count, query_rowcounts
+
+
+def _prepare_dedupe(
+    models: Iterable[Model],
+    partition_field_names: Optional[Sequence[str]],
+    model_class: Type[Model],
+    dedupe: str,
+) -> Iterable[Model]:
+    if dedupe not in DEDUPES:
+        raise ValueError(f"dedupe must be one of {DEDUPES}")
+    if not partition_field_names:
+        raise ValueError("dedupe requires partition_field_names to match the models by")
+    return _dedupe_models(models, partition_field_names, model_class, dedupe)
+
+
+class _ModelHash(NamedTuple):
+    model: Model
+    key: Tuple
+    hash: str
+
+
+def _prepare_skip_unchanged(
+    models: Iterable[Model],
+    model_class: Type[Model],
+    key_field_names: Sequence[str],
+    compare_field_names: Sequence[str],
+    connection: BaseDatabaseWrapper,
+) -> Tuple[Composable, List[Tuple], List[_ModelHash]]:
+    """
+    Hash the compare_field_names of the models and build the query that selects the hashes of their rows in the DB.
+    Returns the query, the keys to select and the model hashes
+    """
+    model_meta = model_class._meta
+    key_fields = get_fields_from_names(key_field_names, model_meta)
+    compare_fields = get_fields_from_names(compare_field_names, model_meta)
+    get_row_values = get_row_values_getter([*key_fields, *compare_fields], connection)
+    binary_type = connection.Database.Binary
+    key_count = len(key_fields)
+
+    model_hashes = []
+    for model in models:
+        values = get_row_values(model)
+        model_hashes.append(
+            _ModelHash(
+                model=model,
+                key=tuple(values[:key_count]),
+                hash=db_values_to_hash(values[key_count:], binary_type),
+            )
         )
-        if return_models:
-            results = execute_queries_and_return_models(
-                load_queries=load_queries, cursor=cursor, model_class=model.__class__
+
+    keys = list({model_hash.key for model_hash in model_hashes if None not in model_hash.key})
+    query = generate_values_select_hash_query(
+        table_name=model_meta.db_table, key_fields=key_fields, hash_fields=compare_fields
+    )
+    return query, keys, model_hashes
+
+
+def _filter_unchanged_models(
+    model_hashes: Sequence[_ModelHash], rows: Iterable[Sequence]
+) -> List[Model]:
+    db_hashes = {tuple(row[:-1]): row[-1] for row in rows}
+    return [
+        model_hash.model
+        for model_hash in model_hashes
+        if db_hashes.get(model_hash.key) != model_hash.hash
+    ]
+
+
+def _skip_unchanged_models(
+    models: Iterable[Model],
+    model_class: Type[Model],
+    key_field_names: Sequence[str],
+    compare_field_names: Sequence[str],
+    connection: BaseDatabaseWrapper,
+    metrics: PhaseMetrics,
+) -> List[Model]:
+    """
+    Drop the models whose compare_field_names hash the same as their row in the DB, so they aren't loaded
+    """
+    with metrics.time(SKIP_UNCHANGED_PHASE) as skip_metrics:
+        query, keys, model_hashes = _prepare_skip_unchanged(
+            models, model_class, key_field_names, compare_field_names, connection
+        )
+        rows = []
+        if keys:
+            driver = get_driver(connection)
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                # SET LOCAL lasts until the end of the caller's transaction (if any), so the setting is restored
+                # after the lookup. It's also rolled back with the savepoint on errors
+                driver.execute(cursor, show_extra_float_digits())
+                extra_float_digits = cursor.fetchone()[0]
+                driver.execute(cursor, set_local_extra_float_digits())
+                # Every key is a query parameter with psycopg 3, and psycopg2 would build a single query with all
+                # of them, so they're sent in pages
+                for page in chunked(keys, max(MAX_QUERY_PARAMS // len(key_field_names), 1)):
+                    rows += driver.fetch_values_query(cursor, query, page)[1]
+                driver.execute(cursor, set_local_extra_float_digits(extra_float_digits))
+        changed_models = _filter_unchanged_models(model_hashes, rows)
+        skip_metrics.update(
+            rowcount=len(rows), skipped_count=len(model_hashes) - len(changed_models)
+        )
+    return changed_models
+
+
+def bulk_load_models_with_queries(
+    *,
+    models: Iterable[Model],
+    loading_table_name: str,
+    load_queries: Sequence[Composable],
+    field_names: Sequence[str] = None,
+    return_models: bool = False,
+    return_counts: bool = False,
+    query_counts: Sequence[Optional[str]] = None,
+    copy_buffer_size: int = COPY_BUFFER_SIZE,
+    model_class: Type[Model] = None,
+    binary_copy: bool = False,
+    serialization_processes: Optional[int] = None,
+    pipeline_serialization: bool = False,
+    parallelism: int = 1,
+    commit_policy: str = ALL_OR_NOTHING_COMMIT_POLICY,
+    lock_timeout_ms: Optional[int] = PARALLEL_LOCK_TIMEOUT_MS,
+    partition_field_names: Sequence[str] = None,
+    operation: str = LOAD_MODELS_WITH_QUERIES_OPERATION,
+    reuse_loading_tables: bool = False,
+    analyze_threshold: Optional[int] = None,
+    index_field_names: Sequence[str] = None,
+    dedupe: Optional[str] = None,
+    skip_unchanged_field_names: Sequence[str] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+):
+    start_time = monotonic()
+    model_class, models = peek_models(models, model_class)
+    if models is None:
+        raise ValueError("No models passed. Can't load without models")
+    if commit_policy not in COMMIT_POLICIES:
+        raise ValueError(f"commit_policy must be one of {COMMIT_POLICIES}")
+    if return_models and return_counts:
+        raise ValueError("return_models and return_counts can't be used together")
+    if dedupe is not None:
+        models = _prepare_dedupe(models, partition_field_names, model_class, dedupe)
+
+    db_name = router.db_for_write(model_class)
+    table_name = model_class._meta.db_table
+    metrics = PhaseMetrics(model_class, operation)
+
+    skipped_count = 0
+    if skip_unchanged_field_names:
+        models = list(models)
+        changed_models = _skip_unchanged_models(
+            models,
+            model_class,
+            partition_field_names,
+            skip_unchanged_field_names,
+            connections[db_name],
+            metrics,
+        )
+        skipped_count = len(models) - len(changed_models)
+        models = changed_models
+        if not models:
+            logger.info(
+                "Skipped loading unchanged models",
+                extra=dict(model_count=skipped_count, table_name=table_name),
             )
-        else:
-            for query in load_queries:
-                cursor.execute(query)
+            if return_counts:
+                return _build_counts(skipped_count, [], query_counts)
+            return None
+
+    logger.info(
+        "Starting loading models",
+        extra=dict(
+            model_count=len(models) if isinstance(models, Sized) else None,
+            table_name=table_name,
+        ),
+    )
+    load_options = dict(
+        model_class=model_class,
+        loading_table_name=loading_table_name,
+        load_queries=load_queries,
+        field_names=field_names,
+        return_models=return_models,
+        return_format=return_format,
+        copy_buffer_size=copy_buffer_size,
+        binary_copy=binary_copy,
+        serialization_processes=serialization_processes,
+        pipeline_serialization=pipeline_serialization,
+        metrics=metrics,
+        reuse_loading_tables=reuse_loading_tables,
+        analyze_threshold=analyze_threshold,
+        index_field_names=index_field_names,
+    )
 
-        logger.info(
-            "Finished loading models",
-            extra=dict(
-                model_count=len(models),
-                table_name=table_name,
-                duration=monotonic() - start_time,
+    if parallelism > 1:
+        if connections[db_name].in_atomic_block:
+            raise ValueError(
+                "parallelism can't be used inside a transaction, since each partition is loaded with its own"
+                " connection and transaction"
+            )
+        results, model_count, query_rowcounts = _load_partitions_in_parallel(
+            partitions=_partition_models(
+                models, partition_field_names, model_class, parallelism
             ),
+            db_name=db_name,
+            commit_policy=commit_policy,
+            lock_timeout_ms=lock_timeout_ms,
+            **load_options,
+        )
+    else:
+        results, model_count, query_rowcounts = _load_models_with_queries(
+            models=models, db_name=db_name, **load_options
         )
 
-        return results
+    logger.info(
+        "Finished loading models",
+        extra=dict(
+            model_count=model_count,
+            table_name=table_name,
+            duration=monotonic() - start_time,
+        ),
+    )
 
+    if return_counts:
+        return _build_counts(model_count + skipped_count, query_rowcounts, query_counts)
+    return results
 
-def bulk_insert_models(
-    models: Sequence[Model],
-    ignore_conflicts: bool = False,
-    return_models: bool = False,
-):
-    """
-    INSERT a batch of models. It makes use of Postgres COPY command to improve speed. If a row already exist, the entire
-    insert will fail.
 
-    :param models: Django model list/tuple
-    :param ignore_conflicts: If there is an error on a unique constrain, ignore instead of erroring
-    :param return_models: Query and return the models in the DB, whether updated or not.
-    Defaults to False, since this can significantly degrade performance
-    :return: None or List[Model] depending upon returns_models param. Returns all models passed in,
-    not just ones updated or inserted. Models will not be in the same order they were passed in
+def _verify_consistent_pks(models: Iterable[Model]) -> Tuple[Iterable[Model], bool]:
     """
-    if not models:
-        logger.warning("No models passed to bulk_insert_models")
-        return [] if return_models else None
+    Checks whether the models have their pk set, and lazily verifies the rest of the models match the
+    first one while they are loaded, so iterators never need to be materialized
+    """
+    models = iter(models)
+    first_model = next(models)
+    has_pks = first_model.pk is not None
+
+    def verified_models() -> Iterator[Model]:
+        yield first_model
+        for model in models:
+            if (model.pk is not None) != has_pks:
+                raise ValueError(
+                    "Mix of models with PK and no PK specified. This can cause issues. Split into 2 groups instead"
+                )
+            yield model
+
+    return verified_models(), has_pks
 
+
+def _prepare_bulk_insert_models(
+    model_class: Type[Model],
+    models: Iterable[Model],
+    ignore_conflicts: bool,
+    return_models: bool,
+    reuse_loading_tables: bool = False,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+) -> Dict[str, Any]:
+    """
+    Build the loading table name and queries used by bulk_insert_models. Returns the keyword arguments
+    of bulk_load_models_with_queries, so they can be shared by the sync and async versions
+    """
     # Verify the models either all have pk set or all don't. It's an issue when it's a mix
     # because we have to specify a list of fields to insert. We need to ignore the PK field if it's not
     # set, but if it is set, you need to add it to the list of fields. Adding the field causes
     # NULL errors for any models that don't have the PK set.
-    has_pks = None
-    for model in models:
-        models_has_pks = model.pk is not None
-        if has_pks is None:
-            has_pks = models_has_pks
+    models, has_pks = _verify_consistent_pks(models)
+    return dict(
+        models=models,
+        **_bulk_insert_load_options(
+            model_class=model_class,
+            reuse_loading_tables=reuse_loading_tables,
+            has_pks=has_pks,
+            ignore_conflicts=ignore_conflicts,
+            return_models=return_models,
+            return_field_names=return_field_names,
+            return_format=return_format,
+        ),
+    )
 
-        if has_pks != models_has_pks:
-            raise ValueError(
-                "Mix of models with PK and no PK specified. This can cause issues. Split into 2 groups instead"
-            )
-    model_meta = models[0]._meta
-    table_name = model_meta.db_table
 
-    loading_table_name = generate_table_name(table_name)
+@_cached_load_options
+def _bulk_insert_load_options(
+    *,
+    model_class: Type[Model],
+    loading_table_name: str,
+    has_pks: bool,
+    ignore_conflicts: bool,
+    return_models: bool,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+) -> Dict[str, Any]:
+    """
+    Build the load options of bulk_insert_models, except the models, for a loading table
+    """
+    model_meta = model_class._meta
+    table_name = model_meta.db_table
+    return_fields = _get_return_fields(
+        model_meta, return_models, return_field_names, return_format
+    )
 
     insert_fields = get_model_fields(model_meta, include_auto_fields=has_pks)
     insert_query = generate_insert_query(
@@ -191,50 +967,169 @@ def bulk_insert_models(
     if return_models:
         # Since we want to return ALL models (not just the ones actually inserted), we
         # need to run an additional select on all of the models in the loading table
-        insert_query = add_returning(insert_query, table_name=table_name)
+        insert_query = add_returning(
+            insert_query, table_name=table_name, returning_fields=return_fields
+        )
 
-    return bulk_load_models_with_queries(
-        models=models,
+    return dict(
         loading_table_name=loading_table_name,
         load_queries=[insert_query],
+        query_counts=[INSERTED_COUNT],
         return_models=return_models,
+        return_format=return_format,
+        model_class=model_class,
+        operation="insert",
     )
 
 
-def bulk_update_models(
-    models: Sequence[Model],
-    update_field_names: Sequence[str] = None,
-    pk_field_names: Sequence[str] = None,
-    model_changed_field_names: Sequence[str] = None,
-    update_if_null_field_names: Sequence[str] = None,
-    update_where: Callable[[Sequence[Field], str, str], Composable] = None,
+def bulk_insert_models(
+    models: Iterable[Model],
+    ignore_conflicts: bool = False,
     return_models: bool = False,
+    return_counts: bool = False,
+    model_class: Type[Model] = None,
+    binary_copy: bool = False,
+    serialization_processes: Optional[int] = None,
+    pipeline_serialization: bool = False,
+    parallelism: int = 1,
+    commit_policy: str = ALL_OR_NOTHING_COMMIT_POLICY,
+    lock_timeout_ms: Optional[int] = PARALLEL_LOCK_TIMEOUT_MS,
+    reuse_loading_tables: bool = False,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
 ):
     """
-    UPDATE a batch of models. If the model is not found in the database, it is ignored.
+    INSERT a batch of models. It makes use of Postgres COPY command to improve speed. If a row already exist, the entire
+    insert will fail.
 
-    :param models: Django model list/tuple
-    :param update_field_names: Field to update (defaults to all fields)
-    :param pk_field_names: Fields used to match existing models in the DB. By default uses model primary key.
-    :param model_changed_field_names: Fields that only get updated when another field (outside this
-    list is changed) (i.e. update_on/last_modified)
-    :param update_if_null_field_names: Fields that only get updated if the new value is NULL or existing
-    value in the DB is NULL.
-    :param update_where: Function that returns a Composable that is used to filter the update query. Should not be used
-    with model_changed_field_names or update_if_null_field_names (can lead to unexpected behavior)
+    :param models: Django model list/tuple or an iterator of models. Iterators are consumed lazily while loading
+    :param ignore_conflicts: If there is an error on a unique constrain, ignore instead of erroring
     :param return_models: Query and return the models in the DB, whether updated or not.
     Defaults to False, since this can significantly degrade performance
-    :return: None or List[Model] depending upon returns_models param. Returns all models passed in,
-    not just ones updated or inserted. Models will not be in the same order they were passed in
+    :param return_counts: Return a BulkLoadCounts with the number of rows inserted, updated and unchanged. The counts
+    come from the rowcount of the queries, so it's much cheaper than return_models. Can't be used with return_models
+    :param model_class: Model class of the models. Defaults to the class of the first model
+    :param binary_copy: Load the models using the binary COPY format. It skips converting values to text and supports
+    BinaryField, but every field type must be supported by django_bulk_load.binary
+    :param serialization_processes: Serialize the models in a pool of this many processes, while streaming the
+    results in order to COPY. Useful for multi-million model loads. Changes made by pre_save (i.e. auto_now)
+    are not reflected in the models passed in
+    :param pipeline_serialization: Serialize the models in a background thread while they are sent to the DB, so
+    serialization overlaps with network I/O. The models iterable is consumed in that thread
+    :param parallelism: Hash partition the models by the fields used to match existing models and load each
+    partition concurrently with its own connection and transaction. The models are held in memory while partitioning.
+    Can't be used inside a transaction
+    :param commit_policy: How partitions commit when parallelism > 1. "all_or_nothing" (default) rolls back every
+    partition if any fails. "best_effort" commits every partition that succeeds
+    :param lock_timeout_ms: With "all_or_nothing", partitions fail after waiting this long for a lock, since
+    partitions waiting to commit keep their locks and would block each other forever (i.e. when the same unique
+    value is inserted by two partitions). The waits on locks of other sessions are limited too. None waits forever
+    :param reuse_loading_tables: Keep the loading table in the session and reuse it for the next loads with the same
+    columns, instead of creating and dropping a new one for every load. Avoids DDL and catalog churn when a connection
+    runs many loads. Not safe with connection poolers that share sessions between clients (i.e. PgBouncer in
+    transaction mode)
+    :param return_field_names: Only return these fields (and the pk) of the models with return_models, instead of
+    every column. The other fields of the returned models are deferred, so wide tables ship less data back
+    :param return_format: Shape of the returned rows with return_models. "models" (default), "dicts" (a dict of field
+    attname to value per row) or "tuples" (a tuple per row, in the order of the model's concrete fields or the pk
+    followed by return_field_names). Dicts and tuples skip creating models, i.e. to map keys to generated ids
+    :return: None, List[Model] or BulkLoadCounts depending upon the returns_models and return_counts params.
+    Returns all models passed in, not just ones updated or inserted. Models will not be in the same order they were
+    passed in
     """
-    if not models:
-        logger.warning("No models passed to bulk_update_models")
-        return [] if return_models else None
+    model_class, models = peek_models(models, model_class)
+    if models is None:
+        logger.warning("No models passed to bulk_insert_models")
+        return _no_models_result(return_models, return_counts)
 
+    return bulk_load_models_with_queries(
+        **_prepare_bulk_insert_models(
+            model_class=model_class,
+            reuse_loading_tables=reuse_loading_tables,
+            models=models,
+            ignore_conflicts=ignore_conflicts,
+            return_models=return_models,
+            return_field_names=return_field_names,
+            return_format=return_format,
+        ),
+        return_counts=return_counts,
+        binary_copy=binary_copy,
+        serialization_processes=serialization_processes,
+        pipeline_serialization=pipeline_serialization,
+        parallelism=parallelism,
+        commit_policy=commit_policy,
+        lock_timeout_ms=lock_timeout_ms,
+    )
+
+
+def _prepare_bulk_update_models(
+    model_class: Type[Model],
+    models: Iterable[Model],
+    update_field_names: Optional[Sequence[str]],
+    pk_field_names: Optional[Sequence[str]],
+    model_changed_field_names: Optional[Sequence[str]],
+    update_if_null_field_names: Optional[Sequence[str]],
+    update_where: Optional[Callable[[Sequence[Field], str, str], Composable]],
+    return_models: bool,
+    reuse_loading_tables: bool = False,
+    index_loading_table: bool = False,
+    skip_unchanged: bool = False,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+) -> Dict[str, Any]:
+    """
+    Build the loading table name and queries used by bulk_update_models. Returns the keyword arguments
+    of bulk_load_models_with_queries, so they can be shared by the sync and async versions
+    """
+    return dict(
+        models=models,
+        **_bulk_update_load_options(
+            model_class=model_class,
+            reuse_loading_tables=reuse_loading_tables,
+            index_loading_table=index_loading_table,
+            update_field_names=update_field_names,
+            pk_field_names=pk_field_names,
+            model_changed_field_names=model_changed_field_names,
+            update_if_null_field_names=update_if_null_field_names,
+            update_where=update_where,
+            return_models=return_models,
+            skip_unchanged=skip_unchanged,
+            return_field_names=return_field_names,
+            return_format=return_format,
+        ),
+    )
+
+
+@_cached_load_options
+def _bulk_update_load_options(
+    *,
+    model_class: Type[Model],
+    loading_table_name: str,
+    update_field_names: Optional[Sequence[str]],
+    pk_field_names: Optional[Sequence[str]],
+    model_changed_field_names: Optional[Sequence[str]],
+    update_if_null_field_names: Optional[Sequence[str]],
+    update_where: Optional[Callable[[Sequence[Field], str, str], Composable]],
+    return_models: bool,
+    skip_unchanged: bool = False,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+) -> Dict[str, Any]:
+    """
+    Build the load options of bulk_update_models, except the models, for a loading table
+    """
+    if skip_unchanged and (update_where or return_models):
+        raise ValueError(
+            "skip_unchanged can't be used with update_where or return_models, since they don't only depend on"
+            " whether the models changed"
+        )
     model_changed_field_names = model_changed_field_names or []
     update_if_null_field_names = update_if_null_field_names or []
-    model_meta = models[0]._meta
+    model_meta = model_class._meta
     table_name = model_meta.db_table
+    return_fields = _get_return_fields(
+        model_meta, return_models, return_field_names, return_format
+    )
 
     pk_fields = get_pk_fields(pk_field_names, model_meta)
     pk_field_names = [field.name for field in pk_fields]
@@ -277,8 +1172,12 @@ def bulk_update_models(
         for field in fields_to_operate_on
         if field.name not in ignore_on_compare and not isinstance(field, AutoField)
     ]
+    if skip_unchanged and not compare_fields:
+        raise ValueError(
+            "skip_unchanged requires update fields besides pk_field_names, model_changed_field_names and"
+            " update_if_null_field_names to compare"
+        )
 
-    loading_table_name = generate_table_name(table_name)
     update_query = generate_update_query(
         table_name=table_name,
         compare_fields=compare_fields,
@@ -296,58 +1195,226 @@ def bulk_update_models(
             table_name=table_name,
             loading_table_name=loading_table_name,
             join_fields=pk_fields,
+            select_fields=return_fields,
         )
         queries = [update_query, select_query]
     else:
         queries = [update_query]
 
-    return bulk_load_models_with_queries(
-        models=models,
+    # Models are only updated when a compare field or update_if_null field changes
+    skip_unchanged_field_names = (
+        [field.name for field in compare_fields] + update_if_null_field_names
+        if skip_unchanged
+        else None
+    )
+
+    return dict(
         loading_table_name=loading_table_name,
         field_names=fields_names_to_operate_on,
         load_queries=queries,
+        query_counts=[UPDATED_COUNT, None],
         return_models=return_models,
+        return_format=return_format,
+        model_class=model_class,
+        partition_field_names=pk_field_names,
+        operation="update",
+        skip_unchanged_field_names=skip_unchanged_field_names,
     )
 
 
-def bulk_upsert_models(
-    models: Sequence[Model],
+def bulk_update_models(
+    models: Iterable[Model],
+    update_field_names: Sequence[str] = None,
     pk_field_names: Sequence[str] = None,
-    insert_only_field_names: Sequence[str] = None,
     model_changed_field_names: Sequence[str] = None,
     update_if_null_field_names: Sequence[str] = None,
     update_where: Callable[[Sequence[Field], str, str], Composable] = None,
     return_models: bool = False,
+    return_counts: bool = False,
+    model_class: Type[Model] = None,
+    binary_copy: bool = False,
+    serialization_processes: Optional[int] = None,
+    pipeline_serialization: bool = False,
+    parallelism: int = 1,
+    commit_policy: str = ALL_OR_NOTHING_COMMIT_POLICY,
+    lock_timeout_ms: Optional[int] = PARALLEL_LOCK_TIMEOUT_MS,
+    reuse_loading_tables: bool = False,
+    analyze_threshold: Optional[int] = ANALYZE_THRESHOLD,
+    index_loading_table: bool = False,
+    dedupe: Optional[str] = None,
+    skip_unchanged: bool = False,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
 ):
     """
-    UPSERT a batch of models. Replicates [UPSERTing](https://wiki.postgresql.org/wiki/UPSERT) for a large set of models.
-    By default, it matches existing models using the model `pk`, but you can specify matching on other fields with
-    `pk_field_names`.
+    UPDATE a batch of models. If the model is not found in the database, it is ignored.
 
-    :param models: Django model list/tuple
-    :param insert_only_field_names: Names of model fields to only insert, never update (i.e. created_on)
+    :param models: Django model list/tuple or an iterator of models. Iterators are consumed lazily while loading
+    :param update_field_names: Field to update (defaults to all fields)
     :param pk_field_names: Fields used to match existing models in the DB. By default uses model primary key.
     :param model_changed_field_names: Fields that only get updated when another field (outside this
     list is changed) (i.e. update_on/last_modified)
     :param update_if_null_field_names: Fields that only get updated if the new value is NULL or existing
     value in the DB is NULL.
-    :param update_where: Function that returns a Composable that is used to filter the update query. Cannot be used
-    with model_changed_field_names or update_if_null_field_names
+    :param update_where: Function that returns a Composable that is used to filter the update query. Should not be used
+    with model_changed_field_names or update_if_null_field_names (can lead to unexpected behavior)
     :param return_models: Query and return the models in the DB, whether updated or not.
     Defaults to False, since this can significantly degrade performance
-    :return: None or List[Model] depending upon returns_models param. Returns all models passed in,
-    not just ones updated or inserted. Models will not be in the same order they were passed in
+    :param return_counts: Return a BulkLoadCounts with the number of rows inserted, updated and unchanged. The counts
+    come from the rowcount of the queries, so it's much cheaper than return_models. Can't be used with return_models
+    :param model_class: Model class of the models. Defaults to the class of the first model
+    :param binary_copy: Load the models using the binary COPY format. It skips converting values to text and supports
+    BinaryField, but every field type must be supported by django_bulk_load.binary
+    :param serialization_processes: Serialize the models in a pool of this many processes, while streaming the
+    results in order to COPY. Useful for multi-million model loads. Changes made by pre_save (i.e. auto_now)
+    are not reflected in the models passed in
+    :param pipeline_serialization: Serialize the models in a background thread while they are sent to the DB, so
+    serialization overlaps with network I/O. The models iterable is consumed in that thread
+    :param parallelism: Hash partition the models by the fields used to match existing models and load each
+    partition concurrently with its own connection and transaction. The models are held in memory while partitioning.
+    Can't be used inside a transaction
+    :param commit_policy: How partitions commit when parallelism > 1. "all_or_nothing" (default) rolls back every
+    partition if any fails. "best_effort" commits every partition that succeeds
+    :param lock_timeout_ms: With "all_or_nothing", partitions fail after waiting this long for a lock, since
+    partitions waiting to commit keep their locks and would block each other forever (i.e. when the same unique
+    value is inserted by two partitions). The waits on locks of other sessions are limited too. None waits forever
+    :param reuse_loading_tables: Keep the loading table in the session and reuse it for the next loads with the same
+    columns, instead of creating and dropping a new one for every load. Avoids DDL and catalog churn when a connection
+    runs many loads. Not safe with connection poolers that share sessions between clients (i.e. PgBouncer in
+    transaction mode)
+    :param analyze_threshold: ANALYZE the loading table before running the queries when at least this many models
+    are loaded, so the queries are planned with its real size. None never analyzes it
+    :param index_loading_table: Also index the loading table on pk_field_names when it's analyzed, so the queries
+    can look up the loaded rows by index
+    :param dedupe: Keep only the "first" or "last" of the models with the same pk_field_names, instead of loading all
+    of them (where an update applies one of them arbitrarily and an upsert can insert duplicates). "last" holds the
+    models in memory. Models without pk values are never deduped
+    :param skip_unchanged: Select a hash of the compared fields of the rows matching the models first, and only load
+    the models whose hash differs. Cuts the data sent to COPY when most models are unchanged. The models are held in
+    memory. Can't be used with update_where or return_models
+    :param return_field_names: Only return these fields (and the pk) of the models with return_models, instead of
+    every column. The other fields of the returned models are deferred, so wide tables ship less data back
+    :param return_format: Shape of the returned rows with return_models. "models" (default), "dicts" (a dict of field
+    attname to value per row) or "tuples" (a tuple per row, in the order of the model's concrete fields or the pk
+    followed by return_field_names). Dicts and tuples skip creating models, i.e. to map keys to generated ids
+    :return: None, List[Model] or BulkLoadCounts depending upon the returns_models and return_counts params.
+    Returns all models passed in, not just ones updated or inserted. Models will not be in the same order they were
+    passed in
     """
-    if not models:
-        logger.warning("No models passed to bulk_upsert_models")
-        return [] if return_models else None
+    model_class, models = peek_models(models, model_class)
+    if models is None:
+        logger.warning("No models passed to bulk_update_models")
+        return _no_models_result(return_models, return_counts)
+
+    return bulk_load_models_with_queries(
+        **_prepare_bulk_update_models(
+            model_class=model_class,
+            reuse_loading_tables=reuse_loading_tables,
+            index_loading_table=index_loading_table,
+            models=models,
+            update_field_names=update_field_names,
+            pk_field_names=pk_field_names,
+            model_changed_field_names=model_changed_field_names,
+            update_if_null_field_names=update_if_null_field_names,
+            update_where=update_where,
+            return_models=return_models,
+            return_field_names=return_field_names,
+            return_format=return_format,
+            skip_unchanged=skip_unchanged,
+        ),
+        return_counts=return_counts,
+        binary_copy=binary_copy,
+        serialization_processes=serialization_processes,
+        pipeline_serialization=pipeline_serialization,
+        parallelism=parallelism,
+        commit_policy=commit_policy,
+        lock_timeout_ms=lock_timeout_ms,
+        analyze_threshold=analyze_threshold,
+        dedupe=dedupe,
+    )
+
+
+def _prepare_bulk_upsert_models(
+    model_class: Type[Model],
+    models: Iterable[Model],
+    pk_field_names: Optional[Sequence[str]],
+    insert_only_field_names: Optional[Sequence[str]],
+    model_changed_field_names: Optional[Sequence[str]],
+    update_if_null_field_names: Optional[Sequence[str]],
+    update_where: Optional[Callable[[Sequence[Field], str, str], Composable]],
+    return_models: bool,
+    return_counts: bool = False,
+    upsert_strategy: str = UPDATE_THEN_INSERT_UPSERT_STRATEGY,
+    reuse_loading_tables: bool = False,
+    index_loading_table: bool = False,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+) -> Dict[str, Any]:
+    """
+    Build the loading table name and queries used by bulk_upsert_models. Returns the keyword arguments
+    of bulk_load_models_with_queries, so they can be shared by the sync and async versions
+    """
+    return dict(
+        models=models,
+        **_bulk_upsert_load_options(
+            model_class=model_class,
+            reuse_loading_tables=reuse_loading_tables,
+            index_loading_table=index_loading_table,
+            pk_field_names=pk_field_names,
+            insert_only_field_names=insert_only_field_names,
+            model_changed_field_names=model_changed_field_names,
+            update_if_null_field_names=update_if_null_field_names,
+            update_where=update_where,
+            return_models=return_models,
+            return_counts=return_counts,
+            upsert_strategy=upsert_strategy,
+            return_field_names=return_field_names,
+            return_format=return_format,
+        ),
+    )
+
+
+def _check_upsert_strategy_supported(upsert_strategy: str, pg_version: int):
+    if upsert_strategy == MERGE_UPSERT_STRATEGY and pg_version < MERGE_MIN_PG_VERSION:
+        raise ValueError(f"The {upsert_strategy} upsert_strategy requires Postgres 15+")
+
+
+@_cached_load_options
+def _bulk_upsert_load_options(
+    *,
+    model_class: Type[Model],
+    loading_table_name: str,
+    pk_field_names: Optional[Sequence[str]],
+    insert_only_field_names: Optional[Sequence[str]],
+    model_changed_field_names: Optional[Sequence[str]],
+    update_if_null_field_names: Optional[Sequence[str]],
+    update_where: Optional[Callable[[Sequence[Field], str, str], Composable]],
+    return_models: bool,
+    return_counts: bool = False,
+    upsert_strategy: str = UPDATE_THEN_INSERT_UPSERT_STRATEGY,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+) -> Dict[str, Any]:
+    """
+    Build the load options of bulk_upsert_models, except the models, for a loading table
+    """
+    if upsert_strategy not in UPSERT_STRATEGIES:
+        raise ValueError(f"upsert_strategy must be one of {UPSERT_STRATEGIES}")
+    if upsert_strategy != UPDATE_THEN_INSERT_UPSERT_STRATEGY and return_counts:
+        raise ValueError(
+            f"return_counts can't be used with the {upsert_strategy} upsert_strategy, since the rowcount of its"
+            " single query doesn't tell inserted and updated rows apart"
+        )
 
     insert_only_field_names = insert_only_field_names or []
     model_changed_field_names = model_changed_field_names or []
     update_if_null_field_names = update_if_null_field_names or []
-    model_meta = models[0]._meta
+    model_meta = model_class._meta
     table_name = model_meta.db_table
     fields, field_names = get_fields_and_names(None, model_meta)
+    return_fields = _get_return_fields(
+        model_meta, return_models, return_field_names, return_format
+    )
 
     pk_fields = get_pk_fields(pk_field_names, model_meta)
     pk_field_names = [field.name for field in pk_fields]
@@ -364,11 +1431,56 @@ def bulk_upsert_models(
     }
     update_fields = [field for field in fields if field.name not in ignore_on_update]
     insert_fields = [field for field in fields if not isinstance(field, AutoField)]
-    loading_table_name = generate_table_name(table_name)
+
+    if upsert_strategy in (ON_CONFLICT_UPSERT_STRATEGY, MERGE_UPSERT_STRATEGY):
+        if return_models and any(isinstance(field, AutoField) for field in pk_fields):
+            raise ValueError(
+                f"return_models can't be used with the {upsert_strategy} upsert_strategy when pk_field_names"
+                " contains an AutoField, since the models inserted with a new value can't be selected"
+            )
+        generate_upsert_query = (
+            generate_upsert_on_conflict_query
+            if upsert_strategy == ON_CONFLICT_UPSERT_STRATEGY
+            else generate_merge_query
+        )
+        queries = [
+            generate_upsert_query(
+                table_name=table_name,
+                loading_table_name=loading_table_name,
+                pk_fields=pk_fields,
+                insert_fields=insert_fields,
+                update_fields=update_fields,
+                compare_fields=compare_fields,
+                update_where=update_where,
+                update_if_null_fields=get_fields_from_names(
+                    update_if_null_field_names, model_meta
+                ),
+            )
+        ]
+        if return_models:
+            queries.append(
+                generate_select_query(
+                    table_name=table_name,
+                    loading_table_name=loading_table_name,
+                    join_fields=pk_fields,
+                    select_fields=return_fields,
+                )
+            )
+        return dict(
+            loading_table_name=loading_table_name,
+            load_queries=queries,
+            return_models=return_models,
+            return_format=return_format,
+            model_class=model_class,
+            partition_field_names=pk_field_names,
+            operation="upsert",
+        )
 
     queries = []
+    query_counts = []
 
     if update_fields:
+        query_counts.append(UPDATED_COUNT)
         queries.append(
             generate_update_query(
                 table_name=table_name,
@@ -393,52 +1505,208 @@ def bulk_upsert_models(
     if return_models:
         # Since we want to return ALL models (not just the ones actually inserted), we
         # need to run an additional select on all of the models in the loading table
-        insert_query = add_returning(insert_query, table_name=table_name)
+        insert_query = add_returning(
+            insert_query, table_name=table_name, returning_fields=return_fields
+        )
         select_query = generate_select_query(
             table_name=table_name,
             loading_table_name=loading_table_name,
             join_fields=pk_fields,
+            select_fields=return_fields,
         )
         queries.append(select_query)
+        query_counts.append(None)
 
     queries.append(insert_query)
+    query_counts.append(INSERTED_COUNT)
 
-    return bulk_load_models_with_queries(
-        models=models,
+    return dict(
         loading_table_name=loading_table_name,
         load_queries=queries,
+        query_counts=query_counts,
         return_models=return_models,
+        return_format=return_format,
+        model_class=model_class,
+        partition_field_names=pk_field_names,
+        operation="upsert",
     )
 
 
-def bulk_insert_changed_models(
-    models: Sequence[Model],
-    pk_field_names: Sequence[str],
-    compare_field_names: Sequence[str],
-    order_field_name=None,
-    return_models=None,
+def bulk_upsert_models(
+    models: Iterable[Model],
+    pk_field_names: Sequence[str] = None,
+    insert_only_field_names: Sequence[str] = None,
+    model_changed_field_names: Sequence[str] = None,
+    update_if_null_field_names: Sequence[str] = None,
+    update_where: Callable[[Sequence[Field], str, str], Composable] = None,
+    return_models: bool = False,
+    return_counts: bool = False,
+    model_class: Type[Model] = None,
+    binary_copy: bool = False,
+    serialization_processes: Optional[int] = None,
+    pipeline_serialization: bool = False,
+    parallelism: int = 1,
+    commit_policy: str = ALL_OR_NOTHING_COMMIT_POLICY,
+    lock_timeout_ms: Optional[int] = PARALLEL_LOCK_TIMEOUT_MS,
+    upsert_strategy: str = UPDATE_THEN_INSERT_UPSERT_STRATEGY,
+    reuse_loading_tables: bool = False,
+    analyze_threshold: Optional[int] = ANALYZE_THRESHOLD,
+    index_loading_table: bool = False,
+    dedupe: Optional[str] = None,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
 ):
     """
-    INSERTs a new record in the database when a model field has changed in any of `compare_field_names`,
-    with respect to its latest state, where "latest" is defined by ordering the records
-    for a given primary key by sorting in descending order on the column passed in
-    `order_field_name`. Does not INSERT a new record if the latest record has not changed.
+    UPSERT a batch of models. Replicates [UPSERTing](https://wiki.postgresql.org/wiki/UPSERT) for a large set of models.
+    By default, it matches existing models using the model `pk`, but you can specify matching on other fields with
+    `pk_field_names`.
 
-    :param models: Django model list/tuple
+    :param models: Django model list/tuple or an iterator of models. Iterators are consumed lazily while loading
+    :param insert_only_field_names: Names of model fields to only insert, never update (i.e. created_on)
     :param pk_field_names: Fields used to match existing models in the DB. By default uses model primary key.
-    :param order_field_name: Field to determine the latest record (normally an AutoField or last_modified datetime type field)
-    :param compare_field_names: Fields to compare. If the values are different, insert a new DB record
+    :param model_changed_field_names: Fields that only get updated when another field (outside this
+    list is changed) (i.e. update_on/last_modified)
+    :param update_if_null_field_names: Fields that only get updated if the new value is NULL or existing
+    value in the DB is NULL.
+    :param update_where: Function that returns a Composable that is used to filter the update query. Cannot be used
+    with model_changed_field_names or update_if_null_field_names
     :param return_models: Query and return the models in the DB, whether updated or not.
     Defaults to False, since this can significantly degrade performance
-    :return: None or List[Model] depending upon returns_models param. Returns all models passed in,
-    not just ones inserted. Models will not be in the same order they were passed in
+    :param return_counts: Return a BulkLoadCounts with the number of rows inserted, updated and unchanged. The counts
+    come from the rowcount of the queries, so it's much cheaper than return_models. Can't be used with return_models
+    :param model_class: Model class of the models. Defaults to the class of the first model
+    :param binary_copy: Load the models using the binary COPY format. It skips converting values to text and supports
+    BinaryField, but every field type must be supported by django_bulk_load.binary
+    :param serialization_processes: Serialize the models in a pool of this many processes, while streaming the
+    results in order to COPY. Useful for multi-million model loads. Changes made by pre_save (i.e. auto_now)
+    are not reflected in the models passed in
+    :param pipeline_serialization: Serialize the models in a background thread while they are sent to the DB, so
+    serialization overlaps with network I/O. The models iterable is consumed in that thread
+    :param parallelism: Hash partition the models by the fields used to match existing models and load each
+    partition concurrently with its own connection and transaction. The models are held in memory while partitioning.
+    Can't be used inside a transaction
+    :param commit_policy: How partitions commit when parallelism > 1. "all_or_nothing" (default) rolls back every
+    partition if any fails. "best_effort" commits every partition that succeeds
+    :param lock_timeout_ms: With "all_or_nothing", partitions fail after waiting this long for a lock, since
+    partitions waiting to commit keep their locks and would block each other forever (i.e. when the same unique
+    value is inserted by two partitions). The waits on locks of other sessions are limited too. None waits forever
+    :param upsert_strategy: "update_then_insert" runs an UPDATE of the matching rows and then an INSERT of
+    the rest. "merge" runs a single MERGE (Postgres 15+), which joins the table once. "on_conflict" runs a single
+    INSERT ... ON CONFLICT DO UPDATE, which can't race with concurrent loads between the two statements. It requires
+    a unique index on pk_field_names, and models with a pk that doesn't exist yet are inserted with that pk,
+    instead of a new one. With "merge" and "on_conflict", models matching the same row can't be in the same batch
+    and return_counts can't be used, nor return_models when pk_field_names contains an AutoField. Defaults to
+    "update_then_insert"
+    :param reuse_loading_tables: Keep the loading table in the session and reuse it for the next loads with the same
+    columns, instead of creating and dropping a new one for every load. Avoids DDL and catalog churn when a connection
+    runs many loads. Not safe with connection poolers that share sessions between clients (i.e. PgBouncer in
+    transaction mode)
+    :param analyze_threshold: ANALYZE the loading table before running the queries when at least this many models
+    are loaded, so the queries are planned with its real size. None never analyzes it
+    :param index_loading_table: Also index the loading table on pk_field_names when it's analyzed, so the queries
+    can look up the loaded rows by index
+    :param dedupe: Keep only the "first" or "last" of the models with the same pk_field_names, instead of loading all
+    of them (where an update applies one of them arbitrarily and an upsert can insert duplicates). "last" holds the
+    models in memory. Models without pk values are never deduped
+    :param return_field_names: Only return these fields (and the pk) of the models with return_models, instead of
+    every column. The other fields of the returned models are deferred, so wide tables ship less data back
+    :param return_format: Shape of the returned rows with return_models. "models" (default), "dicts" (a dict of field
+    attname to value per row) or "tuples" (a tuple per row, in the order of the model's concrete fields or the pk
+    followed by return_field_names). Dicts and tuples skip creating models, i.e. to map keys to generated ids
+    :return: None, List[Model] or BulkLoadCounts depending upon the returns_models and return_counts params.
+    Returns all models passed in, not just ones updated or inserted. Models will not be in the same order they were
+    passed in
     """
-    if not models:
-        logger.warning("No models passed to bulk_insert_changed_models")
-        return [] if return_models else None
+    model_class, models = peek_models(models, model_class)
+    if models is None:
+        logger.warning("No models passed to bulk_upsert_models")
+        return _no_models_result(return_models, return_counts)
+    if upsert_strategy == MERGE_UPSERT_STRATEGY:
+        _check_upsert_strategy_supported(
+            upsert_strategy, connections[router.db_for_write(model_class)].pg_version
+        )
+
+    return bulk_load_models_with_queries(
+        **_prepare_bulk_upsert_models(
+            model_class=model_class,
+            reuse_loading_tables=reuse_loading_tables,
+            index_loading_table=index_loading_table,
+            models=models,
+            pk_field_names=pk_field_names,
+            insert_only_field_names=insert_only_field_names,
+            model_changed_field_names=model_changed_field_names,
+            update_if_null_field_names=update_if_null_field_names,
+            update_where=update_where,
+            return_models=return_models,
+            return_field_names=return_field_names,
+            return_format=return_format,
+            return_counts=return_counts,
+            upsert_strategy=upsert_strategy,
+        ),
+        return_counts=return_counts,
+        binary_copy=binary_copy,
+        serialization_processes=serialization_processes,
+        pipeline_serialization=pipeline_serialization,
+        parallelism=parallelism,
+        commit_policy=commit_policy,
+        lock_timeout_ms=lock_timeout_ms,
+        analyze_threshold=analyze_threshold,
+        dedupe=dedupe,
+    )
+
+
+def _prepare_bulk_insert_changed_models(
+    model_class: Type[Model],
+    models: Iterable[Model],
+    pk_field_names: Optional[Sequence[str]],
+    compare_field_names: Sequence[str],
+    order_field_name: Optional[str],
+    return_models: bool,
+    reuse_loading_tables: bool = False,
+    index_loading_table: bool = False,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+) -> Dict[str, Any]:
+    """
+    Build the loading table name and queries used by bulk_insert_changed_models. Returns the keyword arguments
+    of bulk_load_models_with_queries, so they can be shared by the sync and async versions
+    """
+    return dict(
+        models=models,
+        **_bulk_insert_changed_load_options(
+            model_class=model_class,
+            reuse_loading_tables=reuse_loading_tables,
+            index_loading_table=index_loading_table,
+            pk_field_names=pk_field_names,
+            compare_field_names=compare_field_names,
+            order_field_name=order_field_name,
+            return_models=return_models,
+            return_field_names=return_field_names,
+            return_format=return_format,
+        ),
+    )
 
-    model_meta = models[0]._meta
+
+@_cached_load_options
+def _bulk_insert_changed_load_options(
+    *,
+    model_class: Type[Model],
+    loading_table_name: str,
+    pk_field_names: Optional[Sequence[str]],
+    compare_field_names: Sequence[str],
+    order_field_name: Optional[str],
+    return_models: bool,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+) -> Dict[str, Any]:
+    """
+    Build the load options of bulk_insert_changed_models, except the models, for a loading table
+    """
+    model_meta = model_class._meta
     table_name = model_meta.db_table
+    return_fields = _get_return_fields(
+        model_meta, return_models, return_field_names, return_format
+    )
 
     order_field = (
         model_meta.get_field(order_field_name) if order_field_name else model_meta.pk
@@ -463,7 +1731,6 @@ def bulk_insert_changed_models(
 
     compare_fields = get_fields_from_names(compare_field_names, model_meta)
     insert_fields = [field for field in fields if not isinstance(field, AutoField)]
-    loading_table_name = generate_table_name(table_name)
 
     insert_query = generate_insert_on_not_match_latest(
         table_name=table_name,
@@ -479,17 +1746,275 @@ def bulk_insert_changed_models(
             loading_table_name=loading_table_name,
             pk_fields=pk_fields,
             order_field=order_field,
+            select_fields=return_fields,
         )
         queries = [insert_query, select_query]
     else:
         queries = [insert_query]
 
-    return bulk_load_models_with_queries(
-        models=models,
+    return dict(
         loading_table_name=loading_table_name,
         field_names=None,
         load_queries=queries,
+        query_counts=[INSERTED_COUNT, None],
         return_models=return_models,
+        return_format=return_format,
+        model_class=model_class,
+        partition_field_names=pk_field_names,
+        operation="insert_changed",
+    )
+
+
+def bulk_insert_changed_models(
+    models: Iterable[Model],
+    pk_field_names: Sequence[str],
+    compare_field_names: Sequence[str],
+    order_field_name=None,
+    return_models=None,
+    return_counts: bool = False,
+    model_class: Type[Model] = None,
+    binary_copy: bool = False,
+    serialization_processes: Optional[int] = None,
+    pipeline_serialization: bool = False,
+    parallelism: int = 1,
+    commit_policy: str = ALL_OR_NOTHING_COMMIT_POLICY,
+    lock_timeout_ms: Optional[int] = PARALLEL_LOCK_TIMEOUT_MS,
+    reuse_loading_tables: bool = False,
+    analyze_threshold: Optional[int] = ANALYZE_THRESHOLD,
+    index_loading_table: bool = False,
+    return_field_names: Optional[Sequence[str]] = None,
+    return_format: str = MODELS_RETURN_FORMAT,
+):
+    """
+    INSERTs a new record in the database when a model field has changed in any of `compare_field_names`,
+    with respect to its latest state, where "latest" is defined by ordering the records
+    for a given primary key by sorting in descending order on the column passed in
+    `order_field_name`. Does not INSERT a new record if the latest record has not changed.
+
+    :param models: Django model list/tuple or an iterator of models. Iterators are consumed lazily while loading
+    :param pk_field_names: Fields used to match existing models in the DB. By default uses model primary key.
+    :param order_field_name: Field to determine the latest record (normally an AutoField or last_modified datetime type field)
+    :param compare_field_names: Fields to compare. If the values are different, insert a new DB record
+    :param return_models: Query and return the models in the DB, whether updated or not.
+    Defaults to False, since this can significantly degrade performance
+    :param return_counts: Return a BulkLoadCounts with the number of rows inserted, updated and unchanged. The counts
+    come from the rowcount of the queries, so it's much cheaper than return_models. Can't be used with return_models
+    :param model_class: Model class of the models. Defaults to the class of the first model
+    :param binary_copy: Load the models using the binary COPY format. It skips converting values to text and supports
+    BinaryField, but every field type must be supported by django_bulk_load.binary
+    :param serialization_processes: Serialize the models in a pool of this many processes, while streaming the
+    results in order to COPY. Useful for multi-million model loads. Changes made by pre_save (i.e. auto_now)
+    are not reflected in the models passed in
+    :param pipeline_serialization: Serialize the models in a background thread while they are sent to the DB, so
+    serialization overlaps with network I/O. The models iterable is consumed in that thread
+    :param parallelism: Hash partition the models by the fields used to match existing models and load each
+    partition concurrently with its own connection and transaction. The models are held in memory while partitioning.
+    Can't be used inside a transaction
+    :param commit_policy: How partitions commit when parallelism > 1. "all_or_nothing" (default) rolls back every
+    partition if any fails. "best_effort" commits every partition that succeeds
+    :param lock_timeout_ms: With "all_or_nothing", partitions fail after waiting this long for a lock, since
+    partitions waiting to commit keep their locks and would block each other forever (i.e. when the same unique
+    value is inserted by two partitions). The waits on locks of other sessions are limited too. None waits forever
+    :param reuse_loading_tables: Keep the loading table in the session and reuse it for the next loads with the same
+    columns, instead of creating and dropping a new one for every load. Avoids DDL and catalog churn when a connection
+    runs many loads. Not safe with connection poolers that share sessions between clients (i.e. PgBouncer in
+    transaction mode)
+    :param analyze_threshold: ANALYZE the loading table before running the queries when at least this many models
+    are loaded, so the queries are planned with its real size. None never analyzes it
+    :param index_loading_table: Also index the loading table on pk_field_names when it's analyzed, so the queries
+    can look up the loaded rows by index
+    :param return_field_names: Only return these fields (and the pk) of the models with return_models, instead of
+    every column. The other fields of the returned models are deferred, so wide tables ship less data back
+    :param return_format: Shape of the returned rows with return_models. "models" (default), "dicts" (a dict of field
+    attname to value per row) or "tuples" (a tuple per row, in the order of the model's concrete fields or the pk
+    followed by return_field_names). Dicts and tuples skip creating models, i.e. to map keys to generated ids
+    :return: None, List[Model] or BulkLoadCounts depending upon the returns_models and return_counts params.
+    Returns all models passed in, not just ones inserted. Models will not be in the same order they were passed in
+    """
+    model_class, models = peek_models(models, model_class)
+    if models is None:
+        logger.warning("No models passed to bulk_insert_changed_models")
+        return _no_models_result(return_models, return_counts)
+
+    return bulk_load_models_with_queries(
+        **_prepare_bulk_insert_changed_models(
+            model_class=model_class,
+            reuse_loading_tables=reuse_loading_tables,
+            index_loading_table=index_loading_table,
+            models=models,
+            pk_field_names=pk_field_names,
+            compare_field_names=compare_field_names,
+            order_field_name=order_field_name,
+            return_models=return_models,
+            return_field_names=return_field_names,
+            return_format=return_format,
+        ),
+        return_counts=return_counts,
+        binary_copy=binary_copy,
+        serialization_processes=serialization_processes,
+        pipeline_serialization=pipeline_serialization,
+        parallelism=parallelism,
+        commit_policy=commit_policy,
+        lock_timeout_ms=lock_timeout_ms,
+        analyze_threshold=analyze_threshold,
+    )
+
+
+class _SelectLoadingTable(NamedTuple):
+    table_name: str
+    create_query: Composable
+
+
+def _prepare_bulk_select_model_dicts(
+    model_class: Type[Model],
+    filter_field_names: Iterable[str],
+    select_field_names: Iterable[str],
+    filter_data: Iterable[Sequence],
+    skip_filter_transform: bool,
+    select_for_update: bool,
+    copy_threshold: Optional[int] = None,
+    result_format: str = DICTS_RESULT_FORMAT,
+) -> Tuple[Composable, List[Sequence], List[Field], Optional[_SelectLoadingTable]]:
+    """
+    Build the select query used by bulk_select_model_dicts and convert the filter_data to DB values.
+    Returns the query, the filter data, the fields selected (in the order of the query's columns) and the loading
+    table to COPY the filter data into (when there are at least copy_threshold of them)
+    """
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"result_format must be one of {RESULT_FORMATS}")
+
+    model_meta = model_class._meta
+    table_name = model_meta.db_table
+
+    # Assume that all dicts have the same fields
+    filter_fields = get_fields_from_names(filter_field_names, model_meta)
+
+    # Add the query fields to the select fields (if they aren't already), so they can link the query to results.
+    # Keep the order of the fields, so the field names of the "tuples" and "columns" result formats are stable
+    select_field_names = dict.fromkeys([*select_field_names, *filter_field_names])
+    select_fields = get_fields_from_names(select_field_names, model_meta)
+
+    # Grab all the filter data, so we can know the length
+    filter_data = list(filter_data)
+    if not skip_filter_transform:
+        filter_data_transformed = []
+        for filter_vals in filter_data:
+            filter_data_transformed.append(
+                [
+                    django_field_to_query_value(filter_fields[i], value)
+                    for i, value in enumerate(filter_vals)
+                ]
+            )
+        filter_data = filter_data_transformed
+
+    if copy_threshold is None or len(filter_data) < copy_threshold:
+        sql = generate_values_select_query(
+            table_name=table_name,
+            select_fields=select_fields,
+            filter_fields=filter_fields,
+            select_for_update=select_for_update
+        )
+        return sql, filter_data, select_fields, None
+
+    loading_table_name = generate_table_name(table_name)
+    loading_table = _SelectLoadingTable(
+        table_name=loading_table_name,
+        create_query=create_temp_table(
+            temp_table_name=loading_table_name,
+            source_table_name=table_name,
+            column_names=[field.column for field in filter_fields],
+        ),
+    )
+    sql = generate_loading_table_select_query(
+        table_name=table_name,
+        loading_table_name=loading_table_name,
+        filter_fields=filter_fields,
+        select_fields=select_fields,
+        select_for_update=select_for_update,
+    )
+    return sql, filter_data, select_fields, loading_table
+
+
+def _load_select_loading_table(
+    driver,
+    cursor: CursorWrapper,
+    connection: BaseDatabaseWrapper,
+    loading_table: _SelectLoadingTable,
+    filter_data: List[Sequence],
+    metrics: PhaseMetrics,
+):
+    with metrics.time(CREATE_TEMP_TABLE_PHASE):
+        driver.execute(cursor, loading_table.create_query)
+    with metrics.time(COPY_PHASE) as copy_metrics:
+        driver.copy_rows(
+            cursor=cursor,
+            connection=connection,
+            table_name=loading_table.table_name,
+            rows=filter_data,
+            copy_buffer_size=COPY_BUFFER_SIZE,
+        )
+        copy_metrics["rowcount"] = cursor.rowcount
+
+
+class SelectTuples(NamedTuple):
+    """
+    Result of bulk_select_model_dicts with result_format="tuples"
+    """
+
+    # Attnames of the selected fields, in the order of the values of each row
+    field_names: Tuple[str, ...]
+    rows: List[Tuple]
+
+
+@lru_cache(maxsize=LOAD_OPTIONS_CACHE_SIZE)
+def _select_row_class(model_class: Type[Model], field_names: Tuple[str, ...]) -> Type[Tuple]:
+    # Cached, so the rows of every select of the same fields share a class
+    return namedtuple(f"{model_class.__name__}Row", field_names)
+
+
+def _convert_row(
+    row: Sequence, converters: List[Tuple[int, Callable]], connection: BaseDatabaseWrapper
+) -> List:
+    values = list(row)
+    for i, from_db_value in converters:
+        values[i] = from_db_value(values[i], None, connection)
+    return values
+
+
+def _format_select_rows(
+    rows: List[Sequence],
+    model_class: Type[Model],
+    select_fields: Sequence[Field],
+    connection: BaseDatabaseWrapper,
+    result_format: str = DICTS_RESULT_FORMAT,
+) -> Union[List[Dict], List[Tuple], SelectTuples, Dict[str, List]]:
+    """
+    Convert the selected rows (with a value per select field) with from_db_value and shape them as result_format
+    """
+    field_names = tuple(field.attname for field in select_fields)
+    # Resolve the converters once per column, instead of checking the field of every value
+    converters = [
+        (i, field.from_db_value)
+        for i, field in enumerate(select_fields)
+        if hasattr(field, "from_db_value")
+    ]
+
+    if result_format == COLUMNS_RESULT_FORMAT:
+        columns = [list(values) for values in zip(*rows)] or [[] for _ in field_names]
+        for i, from_db_value in converters:
+            columns[i] = [from_db_value(value, None, connection) for value in columns[i]]
+        return dict(zip(field_names, columns))
+
+    if converters:
+        rows = [_convert_row(row, converters, connection) for row in rows]
+    if result_format == DICTS_RESULT_FORMAT:
+        return [dict(zip(field_names, row)) for row in rows]
+    if result_format == NAMEDTUPLES_RESULT_FORMAT:
+        row_class = _select_row_class(model_class, field_names)
+        return [row_class._make(row) for row in rows]
+    return SelectTuples(
+        field_names=field_names,
+        rows=[tuple(row) for row in rows] if converters else rows,
     )
 
 
@@ -500,8 +2025,10 @@ def bulk_select_model_dicts(
     select_field_names: Iterable[str],
     filter_data: Iterable[Sequence],
     skip_filter_transform=False,
-    select_for_update=False
-) -> List[Dict]:
+    select_for_update=False,
+    copy_threshold: Optional[int] = None,
+    result_format: str = DICTS_RESULT_FORMAT,
+) -> Union[List[Dict], List[Tuple], SelectTuples, Dict[str, List]]:
     """
     Select/Get model dictionaries by filter_field_names. It returns dictionaries, not Django
     models for performance reasons. This is useful when querying a very large set of models
@@ -518,77 +2045,190 @@ def bulk_select_model_dicts(
     can be slow. If you know your data is simple values (strings, integers, etc.) and don't need
     transformation, you can pass True.
     :param select_for_update: Use `FOR UPDATE` clause in select query. This will lock the rows.
-
-    :return: List of dictionaries that match the model_data. Returns dictionaries for performance reasons
+    :param copy_threshold: With at least this many filter_data values, COPY them into a temporary loading table
+    and select the rows matching it, instead of sending them in the query. Building and parsing a query with millions
+    of values is slow and uses a lot of memory. The DB must be writable, since it creates a temporary table.
+    None (default) always sends them in the query
+    :param result_format: Shape of the result. "dicts" (a dictionary per row), "namedtuples" (a named tuple per row),
+    "tuples" (SelectTuples, with the field names and a plain tuple per row) or "columns" (a dictionary of field name
+    to the list of its values, i.e. for pandas.DataFrame). The tuple and column formats are faster to build than
+    dictionaries for large results
+
+    :return: List of dictionaries that match the model_data (or the rows in result_format). Returns dictionaries for
+    performance reasons
     """
-    if not filter_data:
-        return []
-
-    model_meta = model_class._meta
-    table_name = model_meta.db_table
-
-    # Assume that all dicts have the same fields
-    filter_fields = get_fields_from_names(filter_field_names, model_meta)
-
-    # Add the query fields to the select fields (if they aren't already), so they can link the query to results
-    select_field_names = {*select_field_names, *filter_field_names}
-    select_fields = get_fields_from_names(select_field_names, model_meta)
-
     start_time = monotonic()
     db_name = router.db_for_read(model_class)
     connection = connections[db_name]
+    table_name = model_class._meta.db_table
+    metrics = PhaseMetrics(model_class, SELECT_MODEL_DICTS_OPERATION)
+    sql, filter_data, select_fields, loading_table = _prepare_bulk_select_model_dicts(
+        model_class=model_class,
+        filter_field_names=filter_field_names,
+        select_field_names=select_field_names,
+        filter_data=filter_data,
+        skip_filter_transform=skip_filter_transform,
+        select_for_update=select_for_update,
+        copy_threshold=copy_threshold,
+        result_format=result_format,
+    )
+    if not filter_data:
+        return _format_select_rows([], model_class, select_fields, connection, result_format)
 
     with connection.cursor() as cursor:
-        # Grab all the filter data, so we can know the length
-        filter_data = list(filter_data)
-        if not skip_filter_transform:
-            filter_data_transformed = []
-            for filter_vals in filter_data:
-                filter_data_transformed.append(
-                    [
-                        django_field_to_query_value(filter_fields[i], value)
-                        for i, value in enumerate(filter_vals)
-                    ]
-                )
-            filter_data = filter_data_transformed
-
-        sql = generate_values_select_query(
-            table_name=table_name,
-            select_fields=select_fields,
-            filter_fields=filter_fields,
-            select_for_update=select_for_update
-        )
-        sql_string = sql.as_string(cursor.connection)
-
         logger.info(
             "Starting selecting models",
             extra=dict(query_dict_count=len(filter_data), table_name=table_name),
         )
-        execute_values(cursor, sql_string, filter_data, page_size=len(filter_data))
-        columns = [col[0] for col in cursor.description]
-
-        # Map columns to fields so we can later correctly interpret column values
-        select_field_map = {field.column: field for field in select_fields}
-        results = []
-        for row in cursor.fetchall():
-            results.append(
-                {
-                    select_field_map[column]
-                    .attname: select_field_map[column]
-                    .from_db_value(value, expression=None,  connection=connection)
-                    if hasattr(select_field_map[column], "from_db_value")
-                    else value
-                    for column, value in zip(columns, row)
-                }
+        driver = get_driver(connection)
+        if loading_table is None:
+            with metrics.time(QUERY_PHASE, query_index=0) as query_metrics:
+                _, rows = driver.fetch_values_query(cursor, sql, filter_data)
+                query_metrics["rowcount"] = len(rows)
+        else:
+            # The loading table is dropped on commit
+            with transaction.atomic(using=db_name):
+                _load_select_loading_table(
+                    driver, cursor, connection, loading_table, filter_data, metrics
+                )
+                with metrics.time(QUERY_PHASE, query_index=0) as query_metrics:
+                    driver.execute(cursor, sql)
+                    rows = cursor.fetchall()
+                    query_metrics["rowcount"] = len(rows)
+        with metrics.time(DESERIALIZE_PHASE, rowcount=len(rows)):
+            results = _format_select_rows(
+                rows, model_class, select_fields, connection, result_format
             )
 
         logger.info(
             "Finished querying models",
             extra=dict(
-                result_count=len(results),
+                result_count=len(rows),
                 table_name=table_name,
                 duration=monotonic() - start_time,
             ),
         )
 
         return results
+
+
+def _select_model_dicts_in_chunks(
+    connection: BaseDatabaseWrapper,
+    *,
+    own_transaction: bool,
+    sql: Composable,
+    filter_data: List[Sequence],
+    loading_table: Optional[_SelectLoadingTable],
+    model_class: Type[Model],
+    select_fields: Sequence[Field],
+    chunk_size: int,
+    metrics: PhaseMetrics,
+    start_time: float,
+) -> Iterator[Dict]:
+    """
+    Select the rows of bulk_select_model_dicts_iterator with server-side cursors. With own_transaction, connection is
+    a separate connection that selects in its own transaction and is closed when done. Otherwise, connection must be
+    in a transaction, which is also where the loading table lives
+    """
+    result_count = 0
+    try:
+        if own_transaction:
+            connection.set_autocommit(False)
+        driver = get_driver(connection)
+        with connection.cursor() as cursor:
+            query_string = driver.as_string(cursor, sql)
+            if loading_table is None:
+                queries = paginate_values_query(query_string, filter_data)
+            else:
+                _load_select_loading_table(
+                    driver, cursor, connection, loading_table, filter_data, metrics
+                )
+                queries = [(query_string, None)]
+
+        for query_index, (query, params) in enumerate(queries):
+            with connection.chunked_cursor() as cursor:
+                with metrics.time(QUERY_PHASE, query_index=query_index):
+                    cursor.execute(query, params)
+                while True:
+                    with metrics.time(FETCH_PHASE) as fetch_metrics:
+                        rows = cursor.fetchmany(chunk_size)
+                        fetch_metrics["rowcount"] = len(rows)
+                    if not rows:
+                        break
+                    with metrics.time(DESERIALIZE_PHASE, rowcount=len(rows)):
+                        results = _format_select_rows(rows, model_class, select_fields, connection)
+                    result_count += len(results)
+                    yield from results
+    finally:
+        if own_transaction:
+            connection.close()
+
+    logger.info(
+        "Finished querying models",
+        extra=dict(
+            result_count=result_count,
+            table_name=model_class._meta.db_table,
+            duration=monotonic() - start_time,
+        ),
+    )
+
+
+def bulk_select_model_dicts_iterator(
+    *,
+    model_class: Type[Model],
+    filter_field_names: Iterable[str],
+    select_field_names: Iterable[str],
+    filter_data: Iterable[Sequence],
+    skip_filter_transform=False,
+    select_for_update=False,
+    copy_threshold: Optional[int] = None,
+    chunk_size: int = SELECT_CHUNK_SIZE,
+) -> Iterator[Dict]:
+    """
+    Iterator version of bulk_select_model_dicts. The rows are fetched from a server-side cursor chunk_size at a time
+    and yielded as they arrive, so only a chunk of them is held in memory and the first dictionaries can be processed
+    before the rest are fetched. When called inside an atomic block, the select runs in its transaction, so the iterator
+    must be exhausted or closed before the block exits. Otherwise, it runs in a transaction on a separate connection,
+    which is open until the iterator is exhausted or closed
+
+    :param chunk_size: Rows fetched from the server-side cursor at a time
+    :return: Iterator of dictionaries that match the model_data
+    """
+    start_time = monotonic()
+    db_name = router.db_for_read(model_class)
+    connection = connections[db_name]
+    table_name = model_class._meta.db_table
+    metrics = PhaseMetrics(model_class, SELECT_MODEL_DICTS_OPERATION)
+    sql, filter_data, select_fields, loading_table = _prepare_bulk_select_model_dicts(
+        model_class=model_class,
+        filter_field_names=filter_field_names,
+        select_field_names=select_field_names,
+        filter_data=filter_data,
+        skip_filter_transform=skip_filter_transform,
+        select_for_update=select_for_update,
+        copy_threshold=copy_threshold,
+    )
+    if not filter_data:
+        return iter([])
+
+    logger.info(
+        "Starting selecting models",
+        extra=dict(query_dict_count=len(filter_data), table_name=table_name),
+    )
+    # Server-side cursors only exist in a transaction (Django holds them past the commit in autocommit mode instead,
+    # which materializes the whole result). Inside an atomic block, the rows are selected in the caller's transaction.
+    # Otherwise, they're selected in a transaction on a separate connection, so the queries the caller runs while
+    # iterating (and its later atomic blocks) aren't part of it
+    own_transaction = not connection.in_atomic_block
+    return _select_model_dicts_in_chunks(
+        connection.copy() if own_transaction else connection,
+        own_transaction=own_transaction,
+        sql=sql,
+        filter_data=filter_data,
+        loading_table=loading_table,
+        model_class=model_class,
+        select_fields=select_fields,
+        chunk_size=chunk_size,
+        metrics=metrics,
+        start_time=start_time,
+    )
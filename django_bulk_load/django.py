@@ -1,64 +1,362 @@
 import base64
 import csv
+import json
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from hashlib import md5
+from itertools import chain
 from io import StringIO
-from typing import Any, Iterable, List, NamedTuple, Optional, Tuple, Type
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+from uuid import UUID
 
-from django.db import models
+import django
+from django.apps import apps
+from django.db import connections, models, router
 from django.db.backends.base.base import BaseDatabaseWrapper
 from django.db.models.options import Options
 from psycopg2.extras import Json
 
-from .utils import NULL_CHARACTER
+try:
+    # Django 4.2+ uses psycopg 3 when it's installed, which wraps JSON values in Jsonb
+    from psycopg.types.json import Jsonb
+except ImportError:
+    Jsonb = None
+
+from .binary import BINARY_COPY_HEADER, BINARY_COPY_TRAILER, models_to_binary_chunks
+from .utils import (
+    COPY_BUFFER_SIZE,
+    NULL_CHARACTER,
+    PARALLEL_SERIALIZATION_SHARD_SIZE,
+    chunked,
+)
 
 
 def django_field_to_query_value(field, value):
     return field.get_prep_value(value)
 
 
-class DjangoFieldInfo(NamedTuple):
-    field_name: str
-    deserializer: callable
+class _RecordsPlan(NamedTuple):
+    # Index of each concrete field's column in the records, or None when the field isn't selected (deferred)
+    column_indexes: Tuple[Optional[int], ...]
+    # Converters of each column that needs them, as (column index, expression, converters)
+    converters: Tuple[Tuple[int, Any, Tuple[Callable, ...]], ...]
+    # The records are already in the order of the model's concrete fields, with none missing
+    is_ordered: bool
+    # Attname of the field of each column (or the column, when it isn't a field of the model)
+    attnames: Tuple[str, ...]
+
+
+@lru_cache(maxsize=256)
+def _get_records_plan(
+    model_class: Type[models.Model], columns: Tuple[str, ...], db_name: str
+) -> _RecordsPlan:
+    """
+    Plan how to convert records of columns to the positional values of model_class.from_db. Cached, since bulk loads
+    returning models always select the same columns
+    """
+    connection = connections[db_name]
+    model_meta = model_class._meta
+    column_indexes = {column: i for i, column in enumerate(columns)}
+    concrete_fields = model_meta.concrete_fields
+
+    converters = []
+    for field in concrete_fields:
+        if field.column not in column_indexes:
+            continue
+        # Same converters as django.db.models.sql.compiler.SQLCompiler.get_converters
+        expression = field.get_col(model_meta.db_table)
+        field_converters = connection.ops.get_db_converters(
+            expression
+        ) + expression.get_db_converters(connection)
+        if field_converters:
+            converters.append(
+                (column_indexes[field.column], expression, tuple(field_converters))
+            )
+
+    indexes = tuple(column_indexes.get(field.column) for field in concrete_fields)
+    column_attnames = {field.column: field.attname for field in concrete_fields}
+    return _RecordsPlan(
+        column_indexes=indexes,
+        converters=tuple(converters),
+        is_ordered=indexes == tuple(range(len(columns))),
+        attnames=tuple(column_attnames.get(column, column) for column in columns),
+    )
+
+
+def _convert_records(
+    records: Iterable[Sequence], plan: _RecordsPlan, connection: BaseDatabaseWrapper
+) -> Iterable[Sequence]:
+    """
+    Apply the DB converters of the plan to the records. Records without columns to convert are passed through
+    """
+    if not plan.converters:
+        return records
+    return (_convert_record(row, plan.converters, connection) for row in records)
+
+
+def _convert_record(
+    row: Sequence,
+    converters: Tuple[Tuple[int, Any, Tuple[Callable, ...]], ...],
+    connection: BaseDatabaseWrapper,
+) -> List:
+    row = list(row)
+    for i, expression, column_converters in converters:
+        value = row[i]
+        for converter in column_converters:
+            value = converter(value, expression, connection)
+        row[i] = value
+    return row
 
 
 def records_to_models(
-    records: List[List[str]], columns: List[str], model_class: Type[models.Model]
+    records: List[Sequence],
+    columns: List[str],
+    model_class: Type[models.Model],
+    connection: Optional[BaseDatabaseWrapper] = None,
 ) -> List[models.Model]:
-    # TODO: Replace this deserialization logic with logic matching
-    #  django.db.models.sql.compiler.SQLCompiler.get_converters
-    django_fields = {
-        field.column: DjangoFieldInfo(
-            field_name=field.attname,
-            deserializer=(
-                field.from_db_value
-                if hasattr(field, "from_db_value")
-                else lambda value, expression, connection: value
-            ),
-        )
-        for field in get_model_fields(model_class._meta, include_auto_fields=True)
-    }
+    """
+    Convert records (i.e. returned by a query) of columns to models, like a queryset does. The values are converted
+    with the fields' DB converters and the models are created with model_class.from_db, so they are marked as
+    loaded from the DB. Columns that aren't fields of the model are ignored, and fields without a column are deferred
+
+    :param connection: Django connection the records were queried with. Defaults to the model's DB for writes
+    """
+    connection = connection or connections[router.db_for_write(model_class)]
+    db_name = connection.alias
+    plan = _get_records_plan(model_class, tuple(columns), db_name)
+    field_names = [field.attname for field in model_class._meta.concrete_fields]
+    from_db = model_class.from_db
 
     results = []
-    for row in records:
-        zipped_results = dict(zip(columns, row))
-        attrs = {
-            django_field_info.field_name: (
-                django_field_info.deserializer(zipped_results[column], None, None)
-                if column in zipped_results
-                else models.DEFERRED
-            )
-            for column, django_field_info in django_fields.items()
-        }
-        results.append(model_class(**attrs))
+    for row in _convert_records(records, plan, connection):
+        if plan.is_ordered:
+            values = row
+        else:
+            values = [
+                models.DEFERRED if i is None else row[i] for i in plan.column_indexes
+            ]
+        results.append(from_db(db_name, field_names, values))
 
     return results
 
 
+def records_to_dicts(
+    records: List[Sequence],
+    columns: List[str],
+    model_class: Type[models.Model],
+    connection: Optional[BaseDatabaseWrapper] = None,
+) -> List[dict]:
+    """
+    Convert records of columns to dicts of field attname to value, converted like records_to_models does but without
+    creating models
+
+    :param connection: Django connection the records were queried with. Defaults to the model's DB for writes
+    """
+    connection = connection or connections[router.db_for_write(model_class)]
+    plan = _get_records_plan(model_class, tuple(columns), connection.alias)
+    return [dict(zip(plan.attnames, row)) for row in _convert_records(records, plan, connection)]
+
+
+def records_to_tuples(
+    records: List[Sequence],
+    columns: List[str],
+    model_class: Type[models.Model],
+    connection: Optional[BaseDatabaseWrapper] = None,
+) -> List[tuple]:
+    """
+    Convert records of columns to tuples of values (in the order of columns), converted like records_to_models does
+    but without creating models
+
+    :param connection: Django connection the records were queried with. Defaults to the model's DB for writes
+    """
+    connection = connection or connections[router.db_for_write(model_class)]
+    plan = _get_records_plan(model_class, tuple(columns), connection.alias)
+    return [tuple(row) for row in _convert_records(records, plan, connection)]
+
+
 def _default_model_to_value(model, field, connection):
     field_val = field.pre_save(model, add=model._state.adding)
     return field.get_db_prep_save(field_val, connection=connection)
 
 
+# Builtin fields whose get_db_prep_save returns values of these types unchanged on Postgres. Only exact
+# classes are included, since subclasses can override the conversion.
+_INTEGER_FIELD_CLASSES = (
+    models.AutoField,
+    models.BigAutoField,
+    models.SmallAutoField,
+    models.IntegerField,
+    models.BigIntegerField,
+    models.SmallIntegerField,
+    models.PositiveIntegerField,
+    models.PositiveBigIntegerField,
+    models.PositiveSmallIntegerField,
+)
+_UNCHANGED_DB_VALUE_TYPES = {
+    **{field_class: (int,) for field_class in _INTEGER_FIELD_CLASSES},
+    models.FloatField: (float,),
+    models.BooleanField: (bool,),
+    models.CharField: (str,),
+    models.TextField: (str,),
+    models.DateField: (date,),
+    models.UUIDField: (UUID,),
+}
+
+
+def _get_unchanged_db_value_types(field: models.Field) -> Tuple[type, ...]:
+    if type(field) is models.ForeignKey:
+        field = field.target_field
+    return _UNCHANGED_DB_VALUE_TYPES.get(type(field), ())
+
+
+def _needs_pre_save(field: models.Field) -> bool:
+    if type(field) in (models.DateField, models.DateTimeField):
+        return field.auto_now or field.auto_now_add
+    return type(field).pre_save is not models.Field.pre_save
+
+
+def _get_field_value_getter(field: models.Field, vendor: str):
+    attname = field.attname
+    needs_pre_save = _needs_pre_save(field)
+    is_postgres = vendor == "postgresql"
+    db_value_types = _get_unchanged_db_value_types(field) if is_postgres else ()
+    # Other fields can convert None too (i.e. to a default value), so it's only kept for the same builtin fields
+    unchanged_types = {type(None), *db_value_types} if db_value_types else set()
+    is_datetime_field = is_postgres and type(field) is models.DateTimeField
+
+    def get_value(obj, connection):
+        if needs_pre_save:
+            value = field.pre_save(obj, add=obj._state.adding)
+        else:
+            value = getattr(obj, attname)
+
+        value_type = type(value)
+        if value_type in unchanged_types or (
+            # Naive datetimes are made aware by Django, so only aware ones can skip the conversion
+            is_datetime_field
+            and value_type is datetime
+            and value.tzinfo is not None
+        ):
+            return value
+        return field.get_db_prep_save(value, connection=connection)
+
+    return get_value
+
+
+@lru_cache(maxsize=1024)
+def _get_field_value_getters(fields: Tuple[models.Field, ...], vendor: str):
+    return tuple(_get_field_value_getter(field, vendor) for field in fields)
+
+
+def get_row_values_getter(
+    include_fields: Sequence[models.Field],
+    connection: BaseDatabaseWrapper,
+    django_field_to_value=_default_model_to_value,
+) -> Callable[[Any], List[Any]]:
+    """
+    Get a function that converts a model into the list of DB values of include_fields. For the default conversion,
+    the getters are resolved once per (fields, DB vendor) and cached, so pre_save and get_db_prep_save are skipped
+    whenever they wouldn't change the value.
+    """
+    if django_field_to_value is not _default_model_to_value:
+        return lambda obj: [
+            django_field_to_value(obj, field, connection) for field in include_fields
+        ]
+
+    # Fields are bound to their model, so they also key the cache by model class
+    value_getters = _get_field_value_getters(tuple(include_fields), connection.vendor)
+    return lambda obj: [get_value(obj, connection) for get_value in value_getters]
+
+
+def _db_value_to_tsv(field_val, binary_type: type) -> str:
+    if type(field_val) is str:
+        return field_val
+    elif field_val is None:
+        return NULL_CHARACTER
+    elif isinstance(field_val, binary_type):
+        raise ValueError(
+            "Binary data is not supported in bulk operations. Use binary_copy=True to load binary data"
+        )
+    elif isinstance(field_val, Json):
+        return field_val.dumps(field_val.adapted)
+    elif Jsonb is not None and isinstance(field_val, Jsonb):
+        return (field_val.dumps or json.dumps)(field_val.obj)
+    return str(field_val)
+
+
+def _db_value_to_pg_text(field_val, binary_type: type) -> Optional[str]:
+    """
+    Format a DB value like Postgres casts it to text. Values are only formatted the same when they're equal,
+    but equal values can be formatted differently (i.e. the float 1.0 is "1" in Postgres)
+    """
+    value_type = type(field_val)
+    if value_type is bool:
+        return "true" if field_val else "false"
+    elif value_type is datetime:
+        if field_val.tzinfo is None:
+            text = field_val.isoformat(sep=" ")
+            suffix = ""
+        else:
+            # Django sets the time zone of its connections to UTC, so drop the "+00:00" of isoformat for "+00"
+            text = field_val.astimezone(timezone.utc).isoformat(sep=" ")[:-6]
+            suffix = "+00"
+        # Postgres drops the trailing zeros of fractional seconds
+        return (text.rstrip("0") if field_val.microsecond else text) + suffix
+    elif field_val is None:
+        return None
+    return _db_value_to_tsv(field_val, binary_type)
+
+
+def db_values_to_hash(values: Sequence[Any], binary_type: type) -> str:
+    """
+    Hash DB values like the hash selected by queries.generate_values_select_hash_query. Binary values are never
+    hashed like their column, so rows with them are always considered changed
+    """
+    column_texts = []
+    for value in values:
+        if type(value) is str:
+            text = value
+        elif value is None:
+            column_texts.append("-")
+            continue
+        elif isinstance(value, (binary_type, bytes, memoryview)):
+            column_texts.append("binary")
+            continue
+        else:
+            text = _db_value_to_pg_text(value, binary_type)
+        column_texts.append(f"{len(text)}:{text}")
+    return md5("".join(column_texts).encode()).hexdigest()
+
+
+def _models_to_tsv_rows(
+    models: Iterable[Any],
+    include_fields: Sequence[models.Field],
+    connection: BaseDatabaseWrapper,
+    django_field_to_value,
+) -> Iterator[List[str]]:
+    get_row_values = get_row_values_getter(
+        include_fields, connection, django_field_to_value
+    )
+    binary_type = connection.Database.Binary
+    for obj in models:
+        yield [_db_value_to_tsv(value, binary_type) for value in get_row_values(obj)]
+
+
 def models_to_tsv_buffer(
     models: Iterable[Any],
     include_fields: Iterable[models.Field],
@@ -67,25 +365,187 @@ def models_to_tsv_buffer(
 ) -> StringIO:
     buffer = StringIO()
     tsv_writer = csv.writer(buffer, delimiter="\t", lineterminator="\n")
-    for obj in models:
-        row = []
-        for include_field in include_fields:
-            field_val = django_field_to_value(obj, include_field, connection)
-            if isinstance(field_val, connection.Database.Binary):
-                # We can migrate to psychopg 3 which has more advanced copy commands for binary once we upgrade
-                # Django to 4.1+
-                raise ValueError("Binary data is not supported in bulk operations")
-            elif field_val is None:
-                row.append(NULL_CHARACTER)
-            elif isinstance(field_val, Json):
-                row.append(field_val.dumps(field_val.adapted))
-            else:
-                row.append(str(field_val))
-        tsv_writer.writerow(row)
+    tsv_writer.writerows(
+        _models_to_tsv_rows(models, include_fields, connection, django_field_to_value)
+    )
     buffer.seek(0)
     return buffer
 
 
+def models_to_tsv_chunks(
+    models: Iterable[Any],
+    include_fields: Iterable[models.Field],
+    connection: BaseDatabaseWrapper,
+    django_field_to_value=_default_model_to_value,
+    chunk_size: int = COPY_BUFFER_SIZE,
+) -> Iterator[str]:
+    """
+    Lazily serialize models into TSV chunks of roughly chunk_size characters. Models are only pulled
+    from the iterable as chunks are consumed, so memory stays bounded by the chunk size.
+    """
+    yield from _tsv_rows_to_chunks(
+        _models_to_tsv_rows(models, include_fields, connection, django_field_to_value),
+        chunk_size,
+    )
+
+
+def values_to_tsv_chunks(
+    rows: Iterable[Sequence[Any]],
+    connection: BaseDatabaseWrapper,
+    chunk_size: int = COPY_BUFFER_SIZE,
+) -> Iterator[str]:
+    """
+    Lazily serialize rows of DB values into TSV chunks of roughly chunk_size characters, like models_to_tsv_chunks
+    """
+    binary_type = connection.Database.Binary
+    yield from _tsv_rows_to_chunks(
+        ([_db_value_to_tsv(value, binary_type) for value in row] for row in rows),
+        chunk_size,
+    )
+
+
+def _tsv_rows_to_chunks(tsv_rows: Iterable[List[str]], chunk_size: int) -> Iterator[str]:
+    buffer = StringIO()
+    tsv_writer = csv.writer(buffer, delimiter="\t", lineterminator="\n")
+    for row in tsv_rows:
+        tsv_writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _setup_serialization_worker():
+    # Workers started with "spawn" (i.e. macOS) don't inherit the loaded apps, which are needed to unpickle models
+    if not apps.ready:
+        django.setup()
+
+
+def _serialize_models_shard(
+    models: List[models.Model],
+    model_class: Type[models.Model],
+    field_names: Sequence[str],
+    db_name: str,
+    binary_copy: bool,
+) -> Union[str, bytes]:
+    connection = connections[db_name]
+    include_fields = get_fields_from_names(field_names, model_class._meta)
+    if binary_copy:
+        return b"".join(
+            models_to_binary_chunks(
+                models,
+                include_fields,
+                connection,
+                get_row_values=get_row_values_getter(include_fields, connection),
+                include_header=False,
+            )
+        )
+    return models_to_tsv_buffer(models, include_fields, connection).getvalue()
+
+
+def models_to_parallel_chunks(
+    models: Iterable[models.Model],
+    model_class: Type[models.Model],
+    include_fields: Sequence[models.Field],
+    connection: BaseDatabaseWrapper,
+    processes: int,
+    binary_copy: bool = False,
+    shard_size: int = PARALLEL_SERIALIZATION_SHARD_SIZE,
+) -> Iterator[Union[str, bytes]]:
+    """
+    Serialize shards of shard_size models in a pool of processes and yield the serialized shards in their
+    original order. Only a couple of shards per process are in flight at a time, so memory stays bounded.
+
+    Models are pickled to the worker processes, so any changes made to them by pre_save (i.e. auto_now)
+    are not reflected in the models passed in.
+    """
+    field_names = [field.name for field in include_fields]
+    pending_shards = deque()
+
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_setup_serialization_worker
+    ) as executor:
+        if binary_copy:
+            yield BINARY_COPY_HEADER
+
+        for shard in chunked(models, shard_size):
+            pending_shards.append(
+                executor.submit(
+                    _serialize_models_shard,
+                    shard,
+                    model_class,
+                    field_names,
+                    connection.alias,
+                    binary_copy,
+                )
+            )
+            if len(pending_shards) >= processes * 2:
+                yield pending_shards.popleft().result()
+
+        while pending_shards:
+            yield pending_shards.popleft().result()
+
+        if binary_copy:
+            yield BINARY_COPY_TRAILER
+
+
+def models_to_copy_chunks(
+    models: Iterable[models.Model],
+    model_class: Type[models.Model],
+    include_fields: Sequence[models.Field],
+    connection: BaseDatabaseWrapper,
+    binary_copy: bool = False,
+    serialization_processes: Optional[int] = None,
+    chunk_size: int = COPY_BUFFER_SIZE,
+) -> Iterator[Union[str, bytes]]:
+    """
+    Lazily serialize models into chunks of COPY data, in the TSV or binary format
+    """
+    if serialization_processes:
+        return models_to_parallel_chunks(
+            models,
+            model_class,
+            include_fields,
+            connection,
+            processes=serialization_processes,
+            binary_copy=binary_copy,
+        )
+    if binary_copy:
+        return models_to_binary_chunks(
+            models,
+            include_fields,
+            connection,
+            get_row_values=get_row_values_getter(include_fields, connection),
+            chunk_size=chunk_size,
+        )
+    return models_to_tsv_chunks(models, include_fields, connection, chunk_size=chunk_size)
+
+
+def peek_models(
+    models: Iterable[models.Model], model_class: Optional[Type[models.Model]] = None
+) -> Tuple[Optional[Type[models.Model]], Optional[Iterable[models.Model]]]:
+    """
+    Get the model class of a list or iterator of models without consuming it. Returns None for the
+    models if there are none, so iterators don't need to be materialized to check if they're empty
+    :param models: List or iterator of models
+    :param model_class: Model class to use. By default, it's taken from the first model
+    :return: Tuple of the model class and an iterable with all the models
+    """
+    if isinstance(models, Sequence):
+        if not models:
+            return model_class, None
+        return model_class or models[0].__class__, models
+
+    models = iter(models)
+    first_model = next(models, None)
+    if first_model is None:
+        return model_class, None
+    return model_class or first_model.__class__, chain([first_model], models)
+
+
 def get_model_fields(
     model_meta: Options, include_auto_fields=False
 ) -> List[models.Field]:
@@ -0,0 +1,291 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
+
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.utils import CursorWrapper
+from django.db.models import Field, Model
+from psycopg2 import sql as psycopg2_sql
+from psycopg2.extras import execute_values
+from psycopg2.sql import Composable
+
+from .binary import get_field_db_type, make_timestamptz_aware
+from .django import (
+    get_row_values_getter,
+    models_to_copy_chunks,
+    models_to_parallel_chunks,
+    values_to_tsv_chunks,
+)
+from .metrics import ByteCounter, PhaseMetrics
+from .queries import copy_query
+from .utils import IteratorStream, iterate_in_thread
+
+try:
+    from psycopg import sql as psycopg_sql
+except ImportError:
+    psycopg_sql = None
+
+# Postgres limits a query to 65535 parameters
+MAX_QUERY_PARAMS = 65535
+
+
+def _timestamptz_aware_values_getter(get_row_values, db_types: Sequence[str], connection: BaseDatabaseWrapper):
+    """
+    Wrap get_row_values to make naive datetimes of timestamptz columns aware, since psycopg's binary dumper rejects
+    them (USE_TZ=False)
+    """
+    timestamptz_indexes = [
+        i for i, db_type in enumerate(db_types) if db_type == "timestamp with time zone"
+    ]
+    if not timestamptz_indexes:
+        return get_row_values
+
+    def get_aware_row_values(obj):
+        row = get_row_values(obj)
+        for i in timestamptz_indexes:
+            if row[i] is not None:
+                row[i] = make_timestamptz_aware(row[i], connection)
+        return row
+
+    return get_aware_row_values
+
+
+def to_psycopg_query(query: Composable) -> "psycopg_sql.Composable":
+    """
+    Convert a psycopg2 query (as generated by django_bulk_load.queries) to the equivalent psycopg 3 query
+    """
+    if isinstance(query, psycopg2_sql.Composed):
+        return psycopg_sql.Composed([to_psycopg_query(part) for part in query.seq])
+    elif isinstance(query, psycopg2_sql.SQL):
+        return psycopg_sql.SQL(query.string)
+    elif isinstance(query, psycopg2_sql.Identifier):
+        return psycopg_sql.Identifier(*query.strings)
+    elif isinstance(query, psycopg2_sql.Literal):
+        return psycopg_sql.Literal(query.wrapped)
+    elif isinstance(query, psycopg2_sql.Placeholder):
+        return psycopg_sql.Placeholder(query.name or "")
+    raise ValueError(f"Unsupported query type {type(query)}")
+
+
+def paginate_values_query(
+    query: str, values: Sequence[Sequence]
+) -> Iterator[Tuple[str, List]]:
+    """
+    Like psycopg2's execute_values, replace the "VALUES %s" placeholder of query with a placeholder for each
+    row. The values are split in pages, so each query stays under Postgres' limit of parameters
+    """
+    query_before_values, query_after_values = query.split("%s")
+    row_size = len(values[0])
+    row_placeholder = "({})".format(", ".join(["%s"] * row_size))
+    page_size = max(MAX_QUERY_PARAMS // row_size, 1)
+
+    for page_start in range(0, len(values), page_size):
+        page = values[page_start:page_start + page_size]
+        yield (
+            query_before_values
+            + ", ".join([row_placeholder] * len(page))
+            + query_after_values,
+            [value for row in page for value in row],
+        )
+
+
+class Psycopg2Driver:
+    """
+    Loads models with psycopg2. The models are serialized to the COPY format in Python and streamed with
+    copy_expert
+    """
+
+    def execute(self, cursor: CursorWrapper, query: Composable):
+        cursor.execute(query)
+
+    def as_string(self, cursor: CursorWrapper, query: Composable) -> str:
+        return query.as_string(cursor.connection)
+
+    def fetch_values_query(
+        self, cursor: CursorWrapper, query: Composable, values: List[Sequence]
+    ) -> Tuple[List[str], List[Sequence]]:
+        rows = execute_values(
+            cursor,
+            query.as_string(cursor.connection),
+            values,
+            page_size=len(values),
+            fetch=True,
+        )
+        return [col[0] for col in cursor.description], rows
+
+    def copy_models(
+        self,
+        *,
+        cursor: CursorWrapper,
+        connection: BaseDatabaseWrapper,
+        table_name: str,
+        models: Iterable[Model],
+        model_class: Type[Model],
+        fields: Sequence[Field],
+        copy_buffer_size: int,
+        binary_copy: bool,
+        serialization_processes: Optional[int],
+        pipeline_serialization: bool,
+        metrics: PhaseMetrics,
+    ) -> Optional[int]:
+        # Stream the models into COPY, so the serialized rows never need to be fully held in memory
+        copy_chunks = models_to_copy_chunks(
+            models,
+            model_class,
+            fields,
+            connection=connection,
+            binary_copy=binary_copy,
+            serialization_processes=serialization_processes,
+            chunk_size=copy_buffer_size,
+        )
+        copy_chunks = metrics.time_iterator(copy_chunks)
+        if pipeline_serialization:
+            # Serialize in a background thread, while this thread sends the data to the DB
+            copy_chunks = iterate_in_thread(copy_chunks, on_exit=connections.close_all)
+        byte_counter = ByteCounter(copy_chunks) if metrics.enabled else None
+        copy_stream = IteratorStream(byte_counter or copy_chunks)
+        try:
+            # Raise Django's DB exceptions, like cursor.execute does
+            with connection.wrap_database_errors:
+                # size is passed positionally, since Django's debug cursor doesn't accept it as a keyword
+                cursor.copy_expert(
+                    copy_query(table_name, binary=binary_copy),
+                    copy_stream,
+                    copy_buffer_size,
+                )
+        except Exception:
+            # The driver wraps errors raised during serialization, so raise the original one instead
+            if copy_stream.error:
+                raise copy_stream.error
+            raise
+
+        return byte_counter.byte_count if byte_counter else None
+
+    def copy_rows(
+        self,
+        *,
+        cursor: CursorWrapper,
+        connection: BaseDatabaseWrapper,
+        table_name: str,
+        rows: Iterable[Sequence],
+        copy_buffer_size: int,
+    ):
+        copy_stream = IteratorStream(values_to_tsv_chunks(rows, connection, copy_buffer_size))
+        try:
+            with connection.wrap_database_errors:
+                cursor.copy_expert(copy_query(table_name), copy_stream, copy_buffer_size)
+        except Exception:
+            if copy_stream.error:
+                raise copy_stream.error
+            raise
+
+
+class Psycopg3Driver:
+    """
+    Loads models with psycopg 3. Rows of DB values are passed to cursor.copy().write_row, so they are adapted to
+    the COPY format by psycopg's dumpers instead of in Python
+    """
+
+    def execute(self, cursor: CursorWrapper, query: Composable):
+        cursor.execute(to_psycopg_query(query))
+
+    def as_string(self, cursor: CursorWrapper, query: Composable) -> str:
+        return to_psycopg_query(query).as_string(cursor.connection)
+
+    def fetch_values_query(
+        self, cursor: CursorWrapper, query: Composable, values: List[Sequence]
+    ) -> Tuple[List[str], List[Sequence]]:
+        rows = []
+        query_string = self.as_string(cursor, query)
+        for page_query, page_params in paginate_values_query(query_string, values):
+            cursor.execute(page_query, page_params)
+            rows += cursor.fetchall()
+        return [col.name for col in cursor.description], rows
+
+    def copy_models(
+        self,
+        *,
+        cursor: CursorWrapper,
+        connection: BaseDatabaseWrapper,
+        table_name: str,
+        models: Iterable[Model],
+        model_class: Type[Model],
+        fields: Sequence[Field],
+        copy_buffer_size: int,
+        binary_copy: bool,
+        serialization_processes: Optional[int],
+        pipeline_serialization: bool,
+        metrics: PhaseMetrics,
+    ) -> Optional[int]:
+        # The worker processes write the same CSV format as psycopg2, while write_row uses Postgres' text format
+        query = copy_query(
+            table_name, binary=binary_copy, csv=bool(serialization_processes)
+        )
+        # Raise Django's DB exceptions, like cursor.execute does
+        with connection.wrap_database_errors, cursor.cursor.copy(
+            to_psycopg_query(query)
+        ) as copy:
+            if serialization_processes:
+                # The worker processes serialize the models to the COPY format themselves
+                byte_counter = ByteCounter(
+                    metrics.time_iterator(
+                        models_to_parallel_chunks(
+                            models,
+                            model_class,
+                            fields,
+                            connection,
+                            processes=serialization_processes,
+                            binary_copy=binary_copy,
+                        )
+                    )
+                )
+                for chunk in byte_counter:
+                    copy.write(chunk)
+                return byte_counter.byte_count
+
+            get_row_values = get_row_values_getter(fields, connection)
+            if binary_copy:
+                # The binary format has no type information, so psycopg needs the column types to pick its dumpers
+                db_types = [get_field_db_type(field, connection) for field in fields]
+                copy.set_types(db_types)
+                get_row_values = _timestamptz_aware_values_getter(get_row_values, db_types, connection)
+            rows = metrics.time_iterator(map(get_row_values, models))
+            if pipeline_serialization:
+                # Get the DB values in a background thread, while this thread formats and sends them to the DB
+                rows = iterate_in_thread(rows, on_exit=connections.close_all)
+            for row in rows:
+                copy.write_row(row)
+
+        # psycopg formats the rows, so the size of the data isn't known
+        return None
+
+    def copy_rows(
+        self,
+        *,
+        cursor: CursorWrapper,
+        connection: BaseDatabaseWrapper,
+        table_name: str,
+        rows: Iterable[Sequence],
+        copy_buffer_size: int,
+    ):
+        with connection.wrap_database_errors, cursor.cursor.copy(
+            to_psycopg_query(copy_query(table_name, csv=False))
+        ) as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+DRIVERS: Dict[str, object] = {
+    "psycopg2": Psycopg2Driver(),
+    "psycopg": Psycopg3Driver(),
+}
+
+
+def get_driver(connection: BaseDatabaseWrapper):
+    """
+    Get the driver for the DB-API module used by a Django connection. Drivers for other modules can be added to DRIVERS
+    """
+    driver_name = connection.Database.__name__
+    try:
+        return DRIVERS[driver_name]
+    except KeyError:
+        raise ValueError(f"Database driver '{driver_name}' is not supported")
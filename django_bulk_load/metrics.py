@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+from time import monotonic
+from typing import Any, Dict, Iterable, Iterator, Type, TypeVar
+
+from django.db.models import Model
+from django.dispatch import Signal
+
+T = TypeVar("T")
+
+# Sent after each phase of a bulk operation with the keyword arguments:
+#   phase: One of the *_PHASE constants below
+#   duration: Seconds spent in the phase
+#   table_name: DB table of the models
+#   operation: The bulk operation (i.e. "upsert" for bulk_upsert_models)
+# and depending on the phase:
+#   rowcount: Rows loaded (copy), affected/returned by a query (query) or fetched (fetch, deserialize,
+#   skip_unchanged)
+#   byte_count: Bytes of serialized data sent to COPY (copy, when the data is serialized by this library)
+#   query_index: Index of the query in load_queries (query)
+#   skipped_count: Models skipped, since they match their row in the DB (skip_unchanged)
+# The sender is the model class.
+bulk_load_phase_finished = Signal()
+
+# Select the hashes of the rows matching the models, to skip unchanged models (skip_unchanged)
+SKIP_UNCHANGED_PHASE = "skip_unchanged"
+CREATE_TEMP_TABLE_PHASE = "create_temp_table"
+# Time spent serializing models (or waiting for them to be serialized) while they are streamed to COPY
+SERIALIZE_PHASE = "serialize"
+# The whole COPY, including serialization
+COPY_PHASE = "copy"
+# ANALYZE (and index) the loading table, when it has at least analyze_threshold rows
+ANALYZE_PHASE = "analyze"
+QUERY_PHASE = "query"
+FETCH_PHASE = "fetch"
+DESERIALIZE_PHASE = "deserialize"
+COMMIT_PHASE = "commit"
+
+LOAD_MODELS_WITH_QUERIES_OPERATION = "load_models_with_queries"
+SELECT_MODEL_DICTS_OPERATION = "select_model_dicts"
+
+
+class PhaseMetrics:
+    """
+    Times the phases of a bulk operation and sends bulk_load_phase_finished for each of them
+    """
+
+    def __init__(self, model_class: Type[Model], operation: str):
+        self.model_class = model_class
+        self.operation = operation
+
+    @property
+    def enabled(self) -> bool:
+        return bulk_load_phase_finished.has_listeners(self.model_class)
+
+    def send(self, phase: str, duration: float, **values):
+        bulk_load_phase_finished.send(
+            sender=self.model_class,
+            phase=phase,
+            duration=duration,
+            table_name=self.model_class._meta.db_table,
+            operation=self.operation,
+            **values,
+        )
+
+    @contextmanager
+    def time(self, phase: str, **values) -> Iterator[Dict[str, Any]]:
+        """
+        Time the block and send its phase. The yielded dict can be updated with values (i.e. rowcount) to send
+        """
+        start = monotonic()
+        yield values
+        self.send(phase, monotonic() - start, **values)
+
+    def time_iterator(self, iterable: Iterable[T], phase: str = SERIALIZE_PHASE) -> Iterator[T]:
+        """
+        Time how long it takes to produce the items of iterable. The phase is sent when it's exhausted
+        """
+        if not self.enabled:
+            yield from iterable
+            return
+
+        iterator = iter(iterable)
+        duration = 0.0
+        while True:
+            start = monotonic()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                duration += monotonic() - start
+            yield item
+        self.send(phase, duration)
+
+
+class ByteCounter:
+    """
+    Count the bytes of an iterable of str/bytes chunks, while passing them through
+    """
+
+    def __init__(self, chunks: Iterable[T]):
+        self._chunks = chunks
+        self.byte_count = 0
+
+    def __iter__(self) -> Iterator[T]:
+        for chunk in self._chunks:
+            self.byte_count += len(chunk.encode() if isinstance(chunk, str) else chunk)
+            yield chunk
@@ -1,14 +1,56 @@
-from typing import Sequence, Callable
+from typing import Callable, Optional, Sequence
 
 from django.db import models
-from psycopg2.sql import SQL, Composable, Composed, Identifier
+from psycopg2.sql import SQL, Composable, Composed, Identifier, Literal
 
+from .utils import POSTGRES_MAX_TABLE_NAME_LEN_CHARS
 
-def create_temp_table(temp_table_name, source_table_name, column_names):
-    return SQL(
-        "CREATE TEMPORARY TABLE {temp_table_name} ON COMMIT DROP AS "
-        "SELECT {column_list} FROM {source_table_name} WITH NO DATA"
-    ).format(
+# Name of the row proposed for insertion in an ON CONFLICT DO UPDATE clause
+EXCLUDED_TABLE_NAME = "excluded"
+
+
+def quote_identifier(name: str) -> str:
+    # Same quoting as libpq's PQescapeIdentifier
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def render_query(query: Composable) -> str:
+    """
+    Render a query to a string without a connection, so it can be cached and reused by any connection. Supports
+    the Composables generated by this module: SQL, Identifier, str/int Literal and Composed
+    """
+    if isinstance(query, Composed):
+        return "".join(render_query(part) for part in query.seq)
+    elif isinstance(query, SQL):
+        return query.string
+    elif isinstance(query, Identifier):
+        return ".".join(quote_identifier(name) for name in query.strings)
+    elif isinstance(query, Literal):
+        value = query.wrapped
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value)
+        elif isinstance(value, str):
+            # Same quoting as libpq's PQescapeLiteral
+            quoted = "'{}'".format(value.replace("'", "''").replace("\\", "\\\\"))
+            return f"E{quoted}" if "\\" in value else quoted
+    raise ValueError(f"Can't render {query!r} without a connection")
+
+
+def create_temp_table(temp_table_name, source_table_name, column_names, reusable=False):
+    if reusable:
+        # The table is kept for the rest of the session and only created by the first load. Its rows are deleted on
+        # commit, and by the DELETE for loads earlier in the same transaction, so no DDL runs once it exists
+        query = SQL(
+            "CREATE TEMPORARY TABLE IF NOT EXISTS {temp_table_name} ON COMMIT DELETE ROWS AS "
+            "SELECT {column_list} FROM {source_table_name} WITH NO DATA; "
+            "DELETE FROM {temp_table_name}"
+        )
+    else:
+        query = SQL(
+            "CREATE TEMPORARY TABLE {temp_table_name} ON COMMIT DROP AS "
+            "SELECT {column_list} FROM {source_table_name} WITH NO DATA"
+        )
+    return query.format(
         source_table_name=Identifier(source_table_name),
         temp_table_name=Identifier(temp_table_name),
         column_list=SQL(", ").join(
@@ -16,16 +58,80 @@ def create_temp_table(temp_table_name, source_table_name, column_names):
         ),
     )
 
-def copy_query(table_name: str):
+def set_local_lock_timeout(milliseconds: int) -> Composable:
+    return SQL("SET LOCAL lock_timeout = {}").format(Literal(milliseconds))
+
+
+def show_extra_float_digits() -> Composable:
+    return SQL("SHOW extra_float_digits")
+
+
+def set_local_extra_float_digits(digits: str = "3") -> Composable:
+    # Before Postgres 12 (or with extra_float_digits <= 0), float8::text only has 15 significant digits, so floats
+    # that differ in their last digits have the same text
+    return SQL("SET LOCAL extra_float_digits = {}").format(Literal(digits))
+
+
+def analyze_table(table_name: str) -> Composable:
+    return SQL("ANALYZE {table_name}").format(table_name=Identifier(table_name))
+
+
+def create_index(table_name: str, column_names: Sequence[str]) -> Composable:
+    # The name is derived from the table, so a reused loading table is only indexed once
+    index_name = table_name[: POSTGRES_MAX_TABLE_NAME_LEN_CHARS - 4] + "_idx"
+    return SQL("CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({column_list})").format(
+        index_name=Identifier(index_name),
+        table_name=Identifier(table_name),
+        column_list=SQL(", ").join(Identifier(column_name) for column_name in column_names),
+    )
+
+
+def copy_query(table_name: str, binary: bool = False, csv: bool = True):
+    if binary:
+        return SQL("COPY {table_name} FROM STDIN WITH (FORMAT binary)").format(
+            table_name=Identifier(table_name)
+        )
+
+    if not csv:
+        # Postgres' text format, which is what psycopg 3 writes with write_row
+        return SQL("COPY {table_name} FROM STDIN").format(
+            table_name=Identifier(table_name)
+        )
+
     return SQL("COPY {table_name} FROM STDIN NULL '\\N' DELIMITER '\t' CSV").format(
         table_name=Identifier(table_name)
     )
 
-def add_returning(query: Composable, table_name: str) -> Composable:
+def generate_table_columns(
+    table_name: str, fields: Optional[Sequence[models.Field]] = None
+) -> Composable:
+    """
+    Qualified columns of fields, i.e. for a SELECT or RETURNING list. Every column of the table when fields is None
+    """
+    if not fields:
+        return SQL("{table_name}.*").format(table_name=Identifier(table_name))
+    return SQL(", ").join(
+        [
+            SQL("{table_name}.{column_name}").format(
+                table_name=Identifier(table_name),
+                column_name=Identifier(field.column),
+            )
+            for field in fields
+        ]
+    )
+
+
+def add_returning(
+    query: Composable,
+    table_name: str,
+    returning_fields: Optional[Sequence[models.Field]] = None,
+) -> Composable:
     return Composed(
         [
             query,
-            SQL(" RETURNING {table_name}.*").format(table_name=Identifier(table_name)),
+            SQL(" RETURNING {columns}").format(
+                columns=generate_table_columns(table_name, returning_fields)
+            ),
         ]
     )
 
@@ -166,12 +272,15 @@ def generate_insert_for_update_query(
 
 
 
-def generate_select_latest(table_name, loading_table_name, pk_fields, order_field):
+def generate_select_latest(
+    table_name, loading_table_name, pk_fields, order_field, select_fields=None
+):
     join_clause = generate_join_condition(loading_table_name, table_name, pk_fields)
     return SQL(
-        "SELECT DISTINCT ON ({pk_columns}) {table_name}.* from {table_name} INNER JOIN {loading_table_name} ON {join_clause} "
+        "SELECT DISTINCT ON ({pk_columns}) {select_columns} from {table_name} INNER JOIN {loading_table_name} ON {join_clause} "
         "ORDER BY {pk_columns}, {table_name}.{order_column} DESC"
     ).format(
+        select_columns=generate_table_columns(table_name, select_fields),
         table_name=Identifier(table_name),
         loading_table_name=Identifier(loading_table_name),
         join_clause=join_clause,
@@ -224,14 +333,11 @@ def generate_insert_on_not_match_latest(
     )
 
 
-def generate_update_query(
+def generate_update_set_clause(
     *,
     table_name: str,
-    loading_table_name: str,
-    pk_fields: Sequence[models.Field],
+    source_table_name: str,
     update_fields: Sequence[models.Field],
-    compare_fields: Sequence[models.Field],
-    update_where: Callable[[Sequence[models.Field], str, str], Composable] = None,
     update_if_null_fields: Sequence[models.Field] = None,
 ) -> Composable:
     update_if_null_fields = update_if_null_fields or []
@@ -242,9 +348,9 @@ def generate_update_query(
             field, models.AutoField
         ):
             update_conditions.append(
-                SQL("{column} = {loading_table_name}.{column}").format(
+                SQL("{column} = {source_table_name}.{column}").format(
                     column=Identifier(field.column),
-                    loading_table_name=Identifier(loading_table_name),
+                    source_table_name=Identifier(source_table_name),
                 )
             )
 
@@ -252,43 +358,85 @@ def generate_update_query(
         update_conditions.append(
             SQL(
                 "{column} = CASE "
-                "WHEN {loading_table_name}.{column} IS NULL OR "
-                "{table_name}.{column} IS NULL THEN {loading_table_name}.{column}"
+                "WHEN {source_table_name}.{column} IS NULL OR "
+                "{table_name}.{column} IS NULL THEN {source_table_name}.{column}"
                 "ELSE {table_name}.{column} END"
             ).format(
                 column=Identifier(field.column),
                 table_name=Identifier(table_name),
-                loading_table_name=Identifier(loading_table_name),
+                source_table_name=Identifier(source_table_name),
             )
         )
-    update_clause = SQL(", ").join(update_conditions)
-    join_clause = generate_join_condition(
-        source_table_name=loading_table_name,
+    return SQL(", ").join(update_conditions)
+
+
+def generate_update_where_clause(
+    *,
+    table_name: str,
+    source_table_name: str,
+    update_fields: Sequence[models.Field],
+    compare_fields: Sequence[models.Field],
+    update_where: Callable[[Sequence[models.Field], str, str], Composable] = None,
+    update_if_null_fields: Sequence[models.Field] = None,
+) -> Composable:
+    """
+    Generate the condition for updating a row of table_name with a row of source_table_name. By default, rows are
+    only updated when a compare field changed
+    """
+    if update_where:
+        return update_where(update_fields, source_table_name, table_name)
+
+    where_clause = generate_distinct_condition(
+        source_table_name=source_table_name,
         destination_table_name=table_name,
-        fields=pk_fields,
+        compare_fields=compare_fields,
     )
 
-    if update_where:
-        where_clause = update_where(update_fields, loading_table_name, table_name)
-    else:
-        where_clause = generate_distinct_condition(
-            source_table_name=loading_table_name,
+    if update_if_null_fields:
+        distinct_null_clause = generate_distinct_null_condition(
+            source_table_name=source_table_name,
             destination_table_name=table_name,
-            compare_fields=compare_fields,
+            compare_fields=update_if_null_fields,
         )
-
-        if update_if_null_fields:
-            distinct_null_clause = generate_distinct_null_condition(
-                source_table_name=loading_table_name,
-                destination_table_name=table_name,
-                compare_fields=update_if_null_fields,
+        if compare_fields:
+            where_clause = SQL(" OR ").join(
+                [where_clause, distinct_null_clause]
             )
-            if compare_fields:
-                where_clause = SQL(" OR ").join(
-                    [where_clause, distinct_null_clause]
-                )
-            else:
-                where_clause = distinct_null_clause
+        else:
+            where_clause = distinct_null_clause
+
+    return where_clause
+
+
+def generate_update_query(
+    *,
+    table_name: str,
+    loading_table_name: str,
+    pk_fields: Sequence[models.Field],
+    update_fields: Sequence[models.Field],
+    compare_fields: Sequence[models.Field],
+    update_where: Callable[[Sequence[models.Field], str, str], Composable] = None,
+    update_if_null_fields: Sequence[models.Field] = None,
+) -> Composable:
+    update_clause = generate_update_set_clause(
+        table_name=table_name,
+        source_table_name=loading_table_name,
+        update_fields=update_fields,
+        update_if_null_fields=update_if_null_fields,
+    )
+    join_clause = generate_join_condition(
+        source_table_name=loading_table_name,
+        destination_table_name=table_name,
+        fields=pk_fields,
+    )
+    where_clause = generate_update_where_clause(
+        table_name=table_name,
+        source_table_name=loading_table_name,
+        update_fields=update_fields,
+        compare_fields=compare_fields,
+        update_where=update_where,
+        update_if_null_fields=update_if_null_fields,
+    )
 
     return SQL(
         "UPDATE {table_name} SET {update_clause} FROM {loading_table_name} WHERE {where_clause}"
@@ -302,6 +450,142 @@ def generate_update_query(
     )
 
 
+def generate_upsert_on_conflict_query(
+    *,
+    table_name: str,
+    loading_table_name: str,
+    pk_fields: Sequence[models.Field],
+    insert_fields: Sequence[models.Field],
+    update_fields: Sequence[models.Field],
+    compare_fields: Sequence[models.Field],
+    update_where: Callable[[Sequence[models.Field], str, str], Composable] = None,
+    update_if_null_fields: Sequence[models.Field] = None,
+) -> Composable:
+    """
+    Generate a single INSERT ... ON CONFLICT DO UPDATE query that upserts the records of the loading table. The
+    pk_fields must match a unique index of the table. Conflicting rows are available as "excluded", which is
+    passed to update_where as the loading table name.
+
+    AutoFields in pk_fields are inserted from the loading table, or from their sequence when they are NULL
+    """
+    insert_fields = [
+        *insert_fields,
+        *(field for field in pk_fields if isinstance(field, models.AutoField)),
+    ]
+    select_values = []
+    for field in insert_fields:
+        value = SQL("{loading_table_name}.{column}").format(
+            loading_table_name=Identifier(loading_table_name),
+            column=Identifier(field.column),
+        )
+        if isinstance(field, models.AutoField):
+            value = SQL(
+                "COALESCE({value}, nextval(pg_get_serial_sequence({table_name}, {column})))"
+            ).format(
+                value=value,
+                # pg_get_serial_sequence parses the table name, so it needs to be quoted like an identifier
+                table_name=Literal(quote_identifier(table_name)),
+                column=Literal(field.column),
+            )
+        select_values.append(value)
+
+    if update_fields or update_if_null_fields:
+        where_clause = generate_update_where_clause(
+            table_name=table_name,
+            source_table_name=EXCLUDED_TABLE_NAME,
+            update_fields=update_fields,
+            compare_fields=compare_fields,
+            update_where=update_where,
+            update_if_null_fields=update_if_null_fields,
+        )
+        conflict_action = SQL("DO UPDATE SET {update_clause}{where}").format(
+            update_clause=generate_update_set_clause(
+                table_name=table_name,
+                source_table_name=EXCLUDED_TABLE_NAME,
+                update_fields=update_fields,
+                update_if_null_fields=update_if_null_fields,
+            ),
+            where=SQL(" WHERE {}").format(where_clause) if where_clause else SQL(""),
+        )
+    else:
+        conflict_action = SQL("DO NOTHING")
+
+    return SQL(
+        "INSERT INTO {table_name} ({insert_column_list}) "
+        "SELECT {select_column_list} FROM {loading_table_name} "
+        "ON CONFLICT ({pk_column_list}) {conflict_action}"
+    ).format(
+        table_name=Identifier(table_name),
+        insert_column_list=SQL(", ").join(
+            Identifier(field.column) for field in insert_fields
+        ),
+        select_column_list=SQL(", ").join(select_values),
+        loading_table_name=Identifier(loading_table_name),
+        pk_column_list=SQL(", ").join(Identifier(field.column) for field in pk_fields),
+        conflict_action=conflict_action,
+    )
+
+
+def generate_merge_query(
+    *,
+    table_name: str,
+    loading_table_name: str,
+    pk_fields: Sequence[models.Field],
+    insert_fields: Sequence[models.Field],
+    update_fields: Sequence[models.Field],
+    compare_fields: Sequence[models.Field],
+    update_where: Callable[[Sequence[models.Field], str, str], Composable] = None,
+    update_if_null_fields: Sequence[models.Field] = None,
+) -> Composable:
+    """
+    Generate a MERGE query (Postgres 15+) that updates the rows of table_name matching the loading table on pk_fields
+    and inserts the records that don't match any row. Unlike ON CONFLICT, pk_fields don't need a unique index
+    """
+    join_clause = generate_join_condition(
+        source_table_name=loading_table_name,
+        destination_table_name=table_name,
+        fields=pk_fields,
+    )
+
+    when_matched = SQL("")
+    if update_fields or update_if_null_fields:
+        where_clause = generate_update_where_clause(
+            table_name=table_name,
+            source_table_name=loading_table_name,
+            update_fields=update_fields,
+            compare_fields=compare_fields,
+            update_where=update_where,
+            update_if_null_fields=update_if_null_fields,
+        )
+        when_matched = SQL("WHEN MATCHED{condition} THEN UPDATE SET {update_clause} ").format(
+            condition=SQL(" AND ({})").format(where_clause) if where_clause else SQL(""),
+            update_clause=generate_update_set_clause(
+                table_name=table_name,
+                source_table_name=loading_table_name,
+                update_fields=update_fields,
+                update_if_null_fields=update_if_null_fields,
+            ),
+        )
+
+    return SQL(
+        "MERGE INTO {table_name} USING {loading_table_name} ON {join_clause} "
+        "{when_matched}"
+        "WHEN NOT MATCHED THEN INSERT ({insert_column_list}) VALUES ({insert_value_list})"
+    ).format(
+        table_name=Identifier(table_name),
+        loading_table_name=Identifier(loading_table_name),
+        join_clause=join_clause,
+        when_matched=when_matched,
+        insert_column_list=SQL(", ").join(
+            Identifier(field.column) for field in insert_fields
+        ),
+        insert_value_list=SQL(", ").join(
+            SQL(".").join((Identifier(loading_table_name), Identifier(field.column)))
+            for field in insert_fields
+        ),
+    )
+
+
 def generate_select_query(
     table_name: str,
     loading_table_name: str,
@@ -313,18 +597,7 @@ def generate_select_query(
         destination_table_name=table_name,
         fields=join_fields,
     )
-    if select_fields:
-        fields = SQL(", ").join(
-            [
-                SQL("{table_name}.{column_name}").format(
-                    table_name=Identifier(table_name),
-                    column_name=Identifier(field.column),
-                )
-                for field in select_fields
-            ]
-        )
-    else:
-        fields = SQL("{table_name}.*").format(table_name=Identifier(table_name))
+    fields = generate_table_columns(table_name, select_fields)
 
     return SQL(
         "SELECT {fields} FROM {table_name} INNER JOIN {loading_table_name} ON {join_clause}"
@@ -336,6 +609,62 @@ def generate_select_query(
     )
 
 
+def generate_values_select_hash_query(
+    table_name: str,
+    key_fields: Sequence[models.Field],
+    hash_fields: Sequence[models.Field],
+) -> Composable:
+    """
+    Select the key_fields and a hash of the hash_fields of the rows with key_fields in VALUES %s. The hash is the md5
+    of the text of each column prefixed by its length (or '-' for NULL), so it can be computed from the model values
+    too (see django.db_values_to_hash)
+    """
+    key_fields_sql = SQL(", ").join([Identifier(field.column) for field in key_fields])
+    column_texts = SQL(", ").join(
+        [
+            SQL("coalesce(length({column}::text) || ':' || {column}::text, '-')").format(
+                column=Identifier(field.column)
+            )
+            for field in hash_fields
+        ]
+    )
+    return SQL(
+        "SELECT {key_fields_sql}, md5(concat({column_texts})) FROM {table_name}"
+        " WHERE ({key_fields_sql}) IN (VALUES %s)"
+    ).format(
+        table_name=Identifier(table_name),
+        key_fields_sql=key_fields_sql,
+        column_texts=column_texts,
+    )
+
+
+def generate_loading_table_select_query(
+    table_name: str,
+    loading_table_name: str,
+    filter_fields: Sequence[models.Field],
+    select_fields: Sequence[models.Field],
+    select_for_update: bool,
+) -> Composable:
+    """
+    Like generate_values_select_query, but with the filter values loaded into loading_table_name
+    """
+    filter_fields_sql = SQL(", ").join(
+        [Identifier(field.column) for field in filter_fields]
+    )
+    return SQL(
+        "SELECT {select_fields_sql} FROM {table_name} WHERE ({filter_fields_sql}) IN"
+        " (SELECT {filter_fields_sql} FROM {loading_table_name}){for_update}"
+    ).format(
+        table_name=Identifier(table_name),
+        loading_table_name=Identifier(loading_table_name),
+        select_fields_sql=SQL(", ").join(
+            [Identifier(field.column) for field in select_fields]
+        ),
+        filter_fields_sql=filter_fields_sql,
+        for_update=SQL(" FOR UPDATE") if select_for_update else SQL(""),
+    )
+
+
 def generate_values_select_query(
     table_name: str,
     filter_fields: Sequence[models.Field],
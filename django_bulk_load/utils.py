@@ -1,17 +1,145 @@
+from hashlib import md5
+from itertools import islice
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, TypeVar, Union
 from uuid import uuid1
 
 POSTGRES_MAX_TABLE_NAME_LEN_CHARS = 63
 NULL_CHARACTER = "\\N"
+COPY_BUFFER_SIZE = 64 * 1024
+PARALLEL_SERIALIZATION_SHARD_SIZE = 10_000
+PIPELINE_QUEUE_SIZE = 8
+# Default lock_timeout_ms. With parallelism and the all_or_nothing commit policy, a partition waiting longer than
+# this for a lock is most likely blocked by another partition waiting to commit, so it fails instead of waiting forever
+PARALLEL_LOCK_TIMEOUT_MS = 10_000
+# Loading tables with at least this many rows are analyzed before the load queries run
+ANALYZE_THRESHOLD = 100_000
+# Rows fetched at a time by bulk_select_model_dicts_iterator
+SELECT_CHUNK_SIZE = 2_000
 
+T = TypeVar("T")
 
-def generate_table_name(source_table_name: str) -> str:
-    table_name_template = "loading_{source_table_name}_" + uuid1().hex
+
+def generate_table_name(
+    source_table_name: str,
+    column_names: Optional[Sequence[str]] = None,
+    column_types: Optional[Sequence[str]] = None,
+) -> str:
+    """
+    Generate a unique name for a loading table. When column_names (and their DB column_types) are passed, the name is
+    the same for every call with the same source table and columns instead, so the loading table can be reused
+    """
+    if column_names is None:
+        suffix = uuid1().hex
+    else:
+        # The source table name is truncated below, so it's hashed too
+        hash_input = [source_table_name, *column_names, *(column_types or [])]
+        suffix = md5("\0".join(hash_input).encode()).hexdigest()
+    table_name_template = "loading_{source_table_name}_" + suffix
     # postgres has a max table name length of 63 characters, so it's possible
     # the staging table name could exceed the max table length. when this happens,
-    # use only the uuid portion of the staging table name to ensure that the
-    # table name is unique.
+    # truncate the source table name and rely on the uuid (or hash) suffix to keep
+    # the table name unique.
     max_source_table_name_length = POSTGRES_MAX_TABLE_NAME_LEN_CHARS - len(
         table_name_template.replace("{source_table_name}", "")
     )
     truncated_source_table_name = source_table_name[: max_source_table_name_length - 1]
     return table_name_template.format(source_table_name=truncated_source_table_name)
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def iterate_in_thread(
+    iterable: Iterable[T],
+    max_queue_size: int = PIPELINE_QUEUE_SIZE,
+    on_exit: Optional[Callable[[], None]] = None,
+) -> Iterator[T]:
+    """
+    Consume an iterable in a background thread, buffering up to max_queue_size items in a queue. This lets
+    CPU bound work producing the items overlap with the I/O done by the consumer.
+
+    Exceptions raised by the iterable are re-raised to the consumer. If the consumer stops early, the
+    background thread stops too.
+    :param on_exit: Called in the background thread once it's done (i.e. to clean up thread local resources)
+    """
+    queue = Queue(maxsize=max_queue_size)
+    stopped = Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+        finally:
+            if on_exit:
+                on_exit()
+
+    thread = Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            try:
+                item, error = queue.get(timeout=0.1)
+            except Empty:
+                if not thread.is_alive():
+                    raise RuntimeError("Background thread stopped without finishing")
+                continue
+
+            if error:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
+
+
+class IteratorStream:
+    """
+    Read-only file-like object over an iterator of str/bytes chunks. It lets cursor.copy_expert
+    pull data on demand, so only a single chunk needs to be in memory at a time.
+
+    Exceptions raised while producing chunks get wrapped by the DB driver when they happen inside
+    copy_expert, so the original exception is stored in `error` to be re-raised by the caller.
+    """
+
+    def __init__(self, chunks: Iterable[Union[str, bytes]]):
+        self._chunks = iter(chunks)
+        self._remainder = None
+        self.error: Optional[BaseException] = None
+
+    def read(self, size: int = -1) -> Union[str, bytes]:
+        try:
+            chunk = self._remainder
+            self._remainder = None
+            if chunk is None:
+                chunk = next(self._chunks, "")
+        except Exception as e:
+            self.error = e
+            raise
+
+        if 0 <= size < len(chunk):
+            self._remainder = chunk[size:]
+            return chunk[:size]
+        return chunk
@@ -30,6 +30,7 @@ setuptools.setup(
         "psycopg2>=2.8.6"
     ],
     extras_require={
-        'test': []
+        'test': [],
+        'async': ["psycopg>=3.1"],
     },
 )
@@ -0,0 +1,347 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest import mock, skipUnless
+
+from django.db import IntegrityError
+from django.test import TransactionTestCase
+from django_bulk_load import (
+    abulk_insert_changed_models,
+    abulk_insert_models,
+    abulk_select_model_dicts,
+    abulk_select_model_dicts_iterator,
+    abulk_update_models,
+    abulk_upsert_models,
+)
+from .test_project.models import TestComplexModel, TestForeignKeyModel, TestTypesModel
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+
+# The async functions load with their own connection, so the test data can't be in a test transaction
+@skipUnless(psycopg, "psycopg 3 is not installed")
+class E2ETestAsyncBulkLoadNoTransaction(TransactionTestCase):
+    async def test_insert(self):
+        foreign = await TestForeignKeyModel.objects.acreate()
+        unsaved_model = TestComplexModel(
+            integer_field=123,
+            string_field="hello\tworld",
+            json_field=dict(fun="run"),
+            datetime_field=datetime(2018, 1, 5, 3, 4, 5, tzinfo=timezone.utc),
+            test_foreign=foreign,
+        )
+
+        saved_models = await abulk_insert_models([unsaved_model], return_models=True)
+
+        self.assertEqual(len(saved_models), 1)
+        saved_model = await TestComplexModel.objects.aget()
+        self.assertEqual(saved_model.id, saved_models[0].id)
+        for attr in [
+            "integer_field",
+            "string_field",
+            "json_field",
+            "datetime_field",
+            "test_foreign_id",
+        ]:
+            self.assertEqual(getattr(saved_model, attr), getattr(unsaved_model, attr))
+            self.assertEqual(getattr(saved_models[0], attr), getattr(unsaved_model, attr))
+
+    async def test_insert_binary_copy(self):
+        await abulk_insert_models(
+            (TestComplexModel(integer_field=i, binary_field=b"\x00data") for i in range(10)),
+            model_class=TestComplexModel,
+            binary_copy=True,
+        )
+
+        self.assertEqual(await TestComplexModel.objects.acount(), 10)
+        saved_model = await TestComplexModel.objects.aget(integer_field=3)
+        self.assertEqual(bytes(saved_model.binary_field), b"\x00data")
+
+    async def test_insert_duplicate_fails(self):
+        saved_model = await TestComplexModel.objects.acreate(integer_field=1)
+
+        with self.assertRaises(IntegrityError):
+            await abulk_insert_models([saved_model])
+
+    async def test_update_and_upsert(self):
+        existing_model = await TestComplexModel.objects.acreate(integer_field=1, string_field="a")
+        existing_model.string_field = "b"
+
+        await abulk_update_models([existing_model], update_field_names=["string_field"])
+        self.assertEqual(
+            (await TestComplexModel.objects.aget(id=existing_model.id)).string_field, "b"
+        )
+
+        existing_model.string_field = "c"
+        await abulk_upsert_models([existing_model, TestComplexModel(integer_field=2)])
+        self.assertEqual(await TestComplexModel.objects.acount(), 2)
+        self.assertEqual(
+            (await TestComplexModel.objects.aget(id=existing_model.id)).string_field, "c"
+        )
+
+    async def test_upsert_return_field_names(self):
+        existing_model = await TestComplexModel.objects.acreate(integer_field=1, string_field="a")
+        existing_model.string_field = "b"
+
+        [post_model] = await abulk_upsert_models(
+            [existing_model], return_models=True, return_field_names=["string_field"]
+        )
+
+        self.assertEqual(post_model.id, existing_model.id)
+        self.assertEqual(post_model.string_field, "b")
+        self.assertIn("integer_field", post_model.get_deferred_fields())
+
+    async def test_upsert_return_format(self):
+        existing_model = await TestComplexModel.objects.acreate(integer_field=1, json_field=dict(a=1))
+
+        [row] = await abulk_upsert_models(
+            [existing_model],
+            return_models=True,
+            return_field_names=["json_field"],
+            return_format="tuples",
+        )
+
+        self.assertEqual(row, (existing_model.id, dict(a=1)))
+
+    async def test_insert_changed(self):
+        await TestComplexModel.objects.acreate(integer_field=1, string_field="a")
+
+        await abulk_insert_changed_models(
+            [
+                TestComplexModel(integer_field=1, string_field="a"),
+                TestComplexModel(integer_field=2, string_field="a"),
+            ],
+            pk_field_names=["integer_field"],
+            compare_field_names=["string_field"],
+        )
+
+        self.assertEqual(await TestComplexModel.objects.acount(), 2)
+
+    async def test_upsert_return_counts(self):
+        existing_model = await TestComplexModel.objects.acreate(integer_field=1, string_field="a")
+        existing_model.string_field = "b"
+
+        counts = await abulk_upsert_models(
+            [existing_model, TestComplexModel(integer_field=2)], return_counts=True
+        )
+
+        self.assertEqual(
+            (counts.loaded, counts.inserted, counts.updated, counts.unchanged), (2, 1, 1, 0)
+        )
+
+    async def test_upsert_dedupe(self):
+        await abulk_upsert_models(
+            [
+                TestComplexModel(integer_field=1, string_field="a"),
+                TestComplexModel(integer_field=1, string_field="b"),
+            ],
+            pk_field_names=["integer_field"],
+            dedupe="last",
+        )
+
+        self.assertEqual(
+            [
+                (model.integer_field, model.string_field)
+                async for model in TestComplexModel.objects.all()
+            ],
+            [(1, "b")],
+        )
+
+    async def test_merge_upsert_before_postgres_15_errors(self):
+        with mock.patch(
+            "django_bulk_load.async_bulk_load._pg_version", mock.AsyncMock(return_value=140000)
+        ), self.assertRaises(ValueError):
+            await abulk_upsert_models([TestComplexModel(integer_field=1)], upsert_strategy="merge")
+
+    async def test_update_skip_unchanged(self):
+        unchanged_model = await TestComplexModel.objects.acreate(integer_field=1, string_field="a")
+        changed_model = await TestComplexModel.objects.acreate(integer_field=2, string_field="a")
+        changed_model.string_field = "b"
+
+        counts = await abulk_update_models(
+            [unchanged_model, changed_model], skip_unchanged=True, return_counts=True
+        )
+
+        self.assertEqual((counts.loaded, counts.updated, counts.unchanged), (2, 1, 1))
+        self.assertEqual(
+            (await TestComplexModel.objects.aget(integer_field=2)).string_field, "b"
+        )
+
+    async def test_update_skip_unchanged_float_last_digits(self):
+        model = await TestTypesModel.objects.acreate(float_field=0.1)
+        model.float_field = 0.10000000000000002
+
+        async with await psycopg.AsyncConnection.connect(
+            autocommit=True, **self._connection_params()
+        ) as connection:
+            # Postgres before 12 formats floats with 15 significant digits by default
+            await connection.execute("SET extra_float_digits = 0")
+            async with connection.transaction():
+                counts = await abulk_update_models(
+                    [model], skip_unchanged=True, return_counts=True, connection=connection
+                )
+                # The setting of the caller's transaction is restored
+                cursor = await connection.execute("SHOW extra_float_digits")
+                self.assertEqual(await cursor.fetchone(), ("0",))
+
+        self.assertEqual((counts.updated, counts.unchanged), (1, 0))
+        await model.arefresh_from_db()
+        self.assertEqual(model.float_field, 0.10000000000000002)
+
+    async def test_select_model_dicts_with_loading_table(self):
+        await TestComplexModel.objects.acreate(integer_field=1, string_field="a")
+
+        results = await abulk_select_model_dicts(
+            model_class=TestComplexModel,
+            filter_field_names=["integer_field"],
+            select_field_names=["string_field"],
+            filter_data=[(1,), (2,)],
+            copy_threshold=1,
+        )
+
+        self.assertEqual(results, [dict(integer_field=1, string_field="a")])
+
+    async def test_select_model_dicts_result_format(self):
+        await TestComplexModel.objects.abulk_create(
+            [TestComplexModel(integer_field=i, json_field=dict(value=i)) for i in range(3)]
+        )
+
+        result = await abulk_select_model_dicts(
+            model_class=TestComplexModel,
+            filter_field_names=["integer_field"],
+            select_field_names=["json_field"],
+            filter_data=[(i,) for i in range(3)],
+            result_format="columns",
+        )
+
+        self.assertEqual(
+            sorted(zip(result["integer_field"], result["json_field"]), key=lambda row: row[0]),
+            [(i, dict(value=i)) for i in range(3)],
+        )
+
+    async def test_select_model_dicts_iterator(self):
+        await TestComplexModel.objects.abulk_create(
+            [TestComplexModel(integer_field=i, string_field=f"hello{i}") for i in range(5)]
+        )
+
+        for copy_threshold in [None, 1]:
+            results = [
+                result["string_field"]
+                async for result in abulk_select_model_dicts_iterator(
+                    model_class=TestComplexModel,
+                    filter_field_names=["integer_field"],
+                    select_field_names=["string_field"],
+                    filter_data=[(i,) for i in range(4)],
+                    copy_threshold=copy_threshold,
+                    chunk_size=3,
+                )
+            ]
+
+            self.assertEqual(sorted(results), ["hello0", "hello1", "hello2", "hello3"])
+
+    async def test_select_model_dicts_iterator_empty_generator(self):
+        results = [
+            result
+            async for result in abulk_select_model_dicts_iterator(
+                model_class=TestComplexModel,
+                filter_field_names=["integer_field"],
+                select_field_names=["id"],
+                filter_data=(value for value in []),
+            )
+        ]
+
+        self.assertEqual(results, [])
+
+    async def test_select_model_dicts_iterator_in_caller_transaction(self):
+        await TestComplexModel.objects.abulk_create(
+            [TestComplexModel(integer_field=i) for i in range(3)]
+        )
+
+        async with await psycopg.AsyncConnection.connect(
+            autocommit=True, **self._connection_params()
+        ) as connection:
+            async with connection.transaction():
+                async for _ in abulk_select_model_dicts_iterator(
+                    model_class=TestComplexModel,
+                    filter_field_names=["integer_field"],
+                    select_field_names=["id"],
+                    filter_data=[(i,) for i in range(3)],
+                    connection=connection,
+                    chunk_size=1,
+                ):
+                    await connection.execute(
+                        f"INSERT INTO {TestComplexModel._meta.db_table} (integer_field) VALUES (10)"
+                    )
+                    break
+                # Closing the iterator early doesn't roll back the caller's queries
+                self.assertEqual(
+                    connection.info.transaction_status, psycopg.pq.TransactionStatus.INTRANS
+                )
+
+        self.assertEqual(await TestComplexModel.objects.filter(integer_field=10).acount(), 1)
+
+    async def test_select_model_dicts_iterator_connection_outside_transaction_errors(self):
+        async with await psycopg.AsyncConnection.connect(
+            autocommit=True, **self._connection_params()
+        ) as connection:
+            with self.assertRaises(ValueError):
+                abulk_select_model_dicts_iterator(
+                    model_class=TestComplexModel,
+                    filter_field_names=["integer_field"],
+                    select_field_names=["id"],
+                    filter_data=[(1,)],
+                    connection=connection,
+                )
+
+    async def test_concurrent_loads(self):
+        await asyncio.gather(
+            *[
+                abulk_insert_models(
+                    [TestComplexModel(integer_field=i * 100 + j) for j in range(100)]
+                )
+                for i in range(5)
+            ]
+        )
+
+        self.assertEqual(await TestComplexModel.objects.acount(), 500)
+
+    async def test_user_connection_transaction_rolls_back(self):
+        async with await psycopg.AsyncConnection.connect(
+            **self._connection_params()
+        ) as connection:
+            async with connection.transaction():
+                await abulk_insert_models(
+                    [TestComplexModel(integer_field=1)], connection=connection
+                )
+                # The load runs in a savepoint, so it's rolled back with the outer transaction
+                raise psycopg.Rollback()
+
+        self.assertEqual(await TestComplexModel.objects.acount(), 0)
+
+    async def test_select_model_dicts(self):
+        await TestComplexModel.objects.acreate(
+            integer_field=1,
+            string_field="a",
+            json_field=dict(fun="run"),
+        )
+        await TestComplexModel.objects.acreate(integer_field=2, string_field="b")
+
+        results = await abulk_select_model_dicts(
+            model_class=TestComplexModel,
+            filter_field_names=["integer_field", "string_field"],
+            select_field_names=["json_field"],
+            filter_data=[(1, "a"), (2, "c")],
+        )
+
+        self.assertEqual(
+            results, [dict(integer_field=1, string_field="a", json_field=dict(fun="run"))]
+        )
+
+    def _connection_params(self):
+        from django.db import connection
+
+        conn_params = connection.get_connection_params()
+        conn_params.pop("cursor_factory", None)
+        return conn_params
@@ -618,3 +618,61 @@ class E2ETestBulkInsertChangedModels(TestCase):
         )
         self.assertEqual(saved_new_model.integer_field, 4)
         self.assertEqual(saved_new_model.string_field, "hello")
+
+    def test_return_counts(self):
+        TestComplexModel.objects.create(integer_field=1, string_field="a")
+
+        counts = bulk_insert_changed_models(
+            [
+                TestComplexModel(integer_field=1, string_field="a"),
+                TestComplexModel(integer_field=1, string_field="b"),
+            ],
+            pk_field_names=["string_field"],
+            compare_field_names=["integer_field"],
+            return_counts=True,
+        )
+
+        self.assertEqual(
+            (counts.loaded, counts.inserted, counts.updated, counts.unchanged), (2, 1, 0, 1)
+        )
+
+    def test_return_field_names(self):
+        TestComplexModel(integer_field=1, string_field="a").save()
+
+        post_models = bulk_insert_changed_models(
+            [
+                TestComplexModel(integer_field=1, string_field="b"),
+                TestComplexModel(integer_field=2, string_field="c"),
+            ],
+            pk_field_names=["integer_field"],
+            compare_field_names=["string_field"],
+            return_models=True,
+            return_field_names=["string_field"],
+        )
+
+        self.assertEqual(sorted(model.string_field for model in post_models), ["b", "c"])
+        for model in post_models:
+            self.assertIn("integer_field", model.get_deferred_fields())
+
+    def test_return_format(self):
+        TestComplexModel(integer_field=1, string_field="a").save()
+
+        rows = bulk_insert_changed_models(
+            [TestComplexModel(integer_field=1, string_field="b")],
+            pk_field_names=["integer_field"],
+            compare_field_names=["string_field"],
+            return_models=True,
+            return_field_names=["integer_field", "string_field"],
+            return_format="dicts",
+        )
+
+        self.assertEqual(
+            rows,
+            [
+                dict(
+                    id=TestComplexModel.objects.get(string_field="b").id,
+                    integer_field=1,
+                    string_field="b",
+                )
+            ],
+        )
@@ -1,11 +1,17 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest import mock, skipIf, skipUnless
+from uuid import uuid4
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as django_timezone
 from django_bulk_load import bulk_insert_models
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 from .test_project.models import (
     TestComplexModel,
     TestForeignKeyModel,
+    TestTypesModel,
 )
 
 
@@ -169,6 +175,10 @@ class E2ETestBulkInsertModelsTest(TestCase):
                 unsaved_model_without_pk
             ])
 
+    @skipIf(
+        connection.Database.__name__ == "psycopg",
+        "psycopg 3 formats binary data for the text COPY format",
+    )
     def test_errors_when_uploading_binary(self):
         unsaved_model1 = TestComplexModel(
             binary_field=b"hello2",
@@ -182,3 +192,229 @@ class E2ETestBulkInsertModelsTest(TestCase):
                 unsaved_model1,
                 unsaved_model2
             ])
+
+    @skipUnless(connection.Database.__name__ == "psycopg", "psycopg 3 is not used")
+    def test_uploading_binary_with_psycopg3(self):
+        bulk_insert_models(
+            [TestComplexModel(integer_field=1, binary_field=b"\x00hello\t\n\\")]
+        )
+
+        self.assertEqual(
+            bytes(TestComplexModel.objects.get().binary_field), b"\x00hello\t\n\\"
+        )
+
+    def test_insert_with_debug_cursor(self):
+        # Django wraps cursors with a debug cursor when queries are logged (i.e. DEBUG=True)
+        with CaptureQueriesContext(connection):
+            bulk_insert_models([TestComplexModel(integer_field=1)])
+
+        self.assertEqual(TestComplexModel.objects.count(), 1)
+
+    def test_insert_none_with_field_conversion(self):
+        json_field = TestComplexModel._meta.get_field("json_field")
+        get_db_prep_save = json_field.get_db_prep_save
+
+        def get_db_prep_save_with_default(value, connection):
+            return get_db_prep_save(
+                dict(default=True) if value is None else value, connection=connection
+            )
+
+        # None skips get_db_prep_save only for the builtin fields that keep it as is, which JSONField is not
+        with mock.patch.object(json_field, "get_db_prep_save", get_db_prep_save_with_default):
+            bulk_insert_models([TestComplexModel(integer_field=1, json_field=None)])
+
+        self.assertEqual(TestComplexModel.objects.get().json_field, dict(default=True))
+
+    def test_insert_from_generator(self):
+        bulk_insert_models(
+            (TestComplexModel(integer_field=i) for i in range(10)),
+            model_class=TestComplexModel,
+        )
+
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", flat=True)),
+            list(range(10)),
+        )
+
+    def test_empty_generator(self):
+        self.assertEqual(
+            bulk_insert_models(
+                (model for model in []),
+                model_class=TestComplexModel,
+                return_models=True,
+            ),
+            [],
+        )
+
+    def test_errors_when_mix_of_pk_and_not_in_generator(self):
+        def models():
+            yield TestComplexModel(id=10, integer_field=1)
+            yield TestComplexModel(integer_field=2)
+
+        with self.assertRaises(ValueError):
+            bulk_insert_models(models())
+        self.assertEqual(TestComplexModel.objects.count(), 0)
+
+    def test_binary_copy(self):
+        foreign = TestForeignKeyModel()
+        foreign.save()
+
+        unsaved_models = [
+            TestComplexModel(
+                integer_field=123,
+                string_field="hello\tworld\n\\N ünïcode",
+                json_field=dict(fun=["run", 1]),
+                datetime_field=datetime(2018, 1, 5, 3, 4, 5, 6, tzinfo=timezone.utc),
+                test_foreign=foreign,
+                binary_field=b"\x00hello\xff",
+            ),
+            TestComplexModel(
+                datetime_field=datetime(1990, 1, 5, 3, 4, 5, tzinfo=timezone.utc),
+            ),
+        ]
+        bulk_insert_models(unsaved_models, binary_copy=True)
+
+        saved_models = TestComplexModel.objects.order_by("-datetime_field")
+        for unsaved_model, saved_model in zip(unsaved_models, saved_models):
+            for attr in [
+                "integer_field",
+                "string_field",
+                "json_field",
+                "datetime_field",
+                "test_foreign_id",
+            ]:
+                self.assertEqual(getattr(saved_model, attr), getattr(unsaved_model, attr))
+            self.assertEqual(
+                saved_model.binary_field and bytes(saved_model.binary_field),
+                unsaved_model.binary_field,
+            )
+
+    def test_binary_copy_types(self):
+        decimals = [
+            Decimal("0"),
+            Decimal("1"),
+            Decimal("-1.5"),
+            Decimal("0.0001"),
+            Decimal("0.00000001"),
+            Decimal("12345.678901"),
+            Decimal("9999.9999"),
+            Decimal("10000"),
+            Decimal("1E+10"),
+            Decimal("-98765432109876543210.0123456789"),
+        ]
+        unsaved_models = [
+            TestTypesModel(
+                id=i + 1,
+                small_integer_field=-i,
+                boolean_field=i % 2 == 0,
+                float_field=i / 3,
+                decimal_field=decimal,
+                date_field=date(1999, 12, 31 - i),
+                char_field=f"char {i}",
+                uuid_field=uuid4(),
+            )
+            for i, decimal in enumerate(decimals)
+        ]
+        unsaved_models.append(TestTypesModel(id=len(decimals) + 1))
+        bulk_insert_models(unsaved_models, binary_copy=True)
+
+        saved_models = TestTypesModel.objects.order_by("id")
+        self.assertEqual(len(saved_models), len(unsaved_models))
+        for unsaved_model, saved_model in zip(unsaved_models, saved_models):
+            for attr in [
+                "small_integer_field",
+                "boolean_field",
+                "float_field",
+                "decimal_field",
+                "date_field",
+                "char_field",
+                "uuid_field",
+            ]:
+                self.assertEqual(getattr(saved_model, attr), getattr(unsaved_model, attr))
+
+    @override_settings(USE_TZ=False, TIME_ZONE="UTC")
+    def test_binary_copy_naive_datetimes_without_use_tz(self):
+        # The active time zone differs from the connection's, which naive datetimes are stored in
+        with django_timezone.override("America/New_York"):
+            for integer_field, binary_copy in [(1, False), (2, True)]:
+                bulk_insert_models(
+                    [
+                        TestComplexModel(
+                            integer_field=integer_field,
+                            datetime_field=datetime(2018, 1, 5, 3, 4, 5),
+                        )
+                    ],
+                    binary_copy=binary_copy,
+                )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT extract(epoch FROM datetime_field) FROM {TestComplexModel._meta.db_table}"
+                " ORDER BY integer_field"
+            )
+            (text_timestamp,), (binary_timestamp,) = cursor.fetchall()
+        self.assertEqual(binary_timestamp, text_timestamp)
+        self.assertEqual(
+            TestComplexModel.objects.get(integer_field=2).datetime_field,
+            datetime(2018, 1, 5, 3, 4, 5),
+        )
+
+    def test_parallel_serialization(self):
+        for binary_copy in [False, True]:
+            bulk_insert_models(
+                [
+                    TestComplexModel(
+                        integer_field=i,
+                        json_field=dict(i=i),
+                        datetime_field=datetime(2018, 1, 5, tzinfo=timezone.utc),
+                    )
+                    for i in range(100)
+                ],
+                binary_copy=binary_copy,
+                serialization_processes=2,
+            )
+
+            self.assertEqual(
+                sorted(TestComplexModel.objects.values_list("integer_field", flat=True)),
+                list(range(100)),
+            )
+            self.assertEqual(TestComplexModel.objects.get(integer_field=12).json_field, dict(i=12))
+            TestComplexModel.objects.all().delete()
+
+    def test_return_counts_ignore_conflicts(self):
+        saved_model = TestComplexModel.objects.create(integer_field=1)
+
+        counts = bulk_insert_models(
+            [saved_model, TestComplexModel(id=saved_model.id + 1, integer_field=2)],
+            ignore_conflicts=True,
+            return_counts=True,
+        )
+
+        self.assertEqual(
+            (counts.loaded, counts.inserted, counts.updated, counts.unchanged), (2, 1, 0, 1)
+        )
+
+    def test_insert_return_field_names(self):
+        post_models = bulk_insert_models(
+            [TestComplexModel(integer_field=i, string_field=str(i)) for i in range(2)],
+            return_models=True,
+            return_field_names=["integer_field"],
+        )
+
+        self.assertEqual(sorted(model.integer_field for model in post_models), [0, 1])
+        for model in post_models:
+            self.assertIsNotNone(model.id)
+            self.assertIn("string_field", model.get_deferred_fields())
+
+    def test_insert_return_format(self):
+        tuples = bulk_insert_models(
+            [TestComplexModel(integer_field=i) for i in range(2)],
+            return_models=True,
+            return_field_names=["integer_field"],
+            return_format="tuples",
+        )
+
+        self.assertEqual(
+            sorted(tuples, key=lambda row: row[1]),
+            list(TestComplexModel.objects.order_by("integer_field").values_list("id", "integer_field")),
+        )
@@ -0,0 +1,42 @@
+from django.db import OperationalError
+from django.test import TransactionTestCase
+from django_bulk_load import bulk_insert_models
+from .test_project.models import TestComplexModel
+
+
+class E2ETestBulkInsertModelsNoTransaction(TransactionTestCase):
+    def test_parallel_insert_duplicate_across_partitions_rolls_back(self):
+        # Models are spread round-robin, so each partition inserts the same pk and one of them blocks on the other,
+        # which is waiting to commit
+        models = [
+            TestComplexModel(id=1, integer_field=1),
+            TestComplexModel(id=1, integer_field=2),
+            TestComplexModel(id=2, integer_field=3),
+        ]
+
+        with self.assertRaises(OperationalError):
+            bulk_insert_models(models, parallelism=2, lock_timeout_ms=100)
+        self.assertEqual(TestComplexModel.objects.count(), 0)
+
+    def test_parallel_insert_ignore_conflicts_duplicate_across_partitions_rolls_back(self):
+        models = [
+            TestComplexModel(id=1, integer_field=1),
+            TestComplexModel(id=1, integer_field=2),
+        ]
+
+        with self.assertRaises(OperationalError):
+            bulk_insert_models(
+                models, parallelism=2, ignore_conflicts=True, lock_timeout_ms=100
+            )
+        self.assertEqual(TestComplexModel.objects.count(), 0)
+
+    def test_parallel_insert_best_effort_duplicate_across_partitions(self):
+        models = [
+            TestComplexModel(id=1, integer_field=1),
+            TestComplexModel(id=1, integer_field=2),
+        ]
+
+        bulk_insert_models(
+            models, parallelism=2, commit_policy="best_effort", ignore_conflicts=True
+        )
+        self.assertEqual(TestComplexModel.objects.count(), 1)
@@ -1,6 +1,16 @@
+from datetime import datetime, timezone
+
+from django.db import connection, connections
 from django.test import TestCase
 from django_bulk_load import bulk_load_models_with_queries
-from django_bulk_load.django import get_fields_from_names
+from django_bulk_load.django import (
+    get_fields_from_names,
+    get_model_fields,
+    models_to_parallel_chunks,
+    models_to_tsv_buffer,
+    records_to_models,
+)
+from django_bulk_load.metrics import bulk_load_phase_finished
 from django_bulk_load.queries import (
     SQL,
     Identifier,
@@ -8,7 +18,7 @@ from django_bulk_load.queries import (
     generate_insert_for_update_query,
     generate_update_query,
 )
-from .test_project.models import TestComplexModel
+from .test_project.models import TestComplexModel, TestForeignKeyModel
 from django_bulk_load.utils import generate_table_name
 
 
@@ -83,3 +93,186 @@ class E2ETestBulkLoadModelsWithQueries(TestCase):
             field_names=["id", "integer_field"],
             return_models=True,
         )
+
+    def test_reusable_loading_table_names(self):
+        # Long table names are truncated to the same prefix
+        first_table_name = "a" * 40 + "_first"
+        second_table_name = "a" * 40 + "_second"
+        name = generate_table_name(first_table_name, ["id"], ["integer"])
+
+        self.assertEqual(name, generate_table_name(first_table_name, ["id"], ["integer"]))
+        self.assertLessEqual(len(name), 63)
+        self.assertNotEqual(name, generate_table_name(second_table_name, ["id"], ["integer"]))
+        self.assertNotEqual(name, generate_table_name(first_table_name, ["id"], ["bigint"]))
+
+    def test_streams_models_in_chunks(self):
+        models = [
+            TestComplexModel(integer_field=i, string_field=f"hello\t{i}\n")
+            for i in range(1000)
+        ]
+        model_meta = models[0]._meta
+        table_name = model_meta.db_table
+        loading_table_name = generate_table_name(table_name)
+        insert_query = generate_insert_for_update_query(
+            table_name=table_name,
+            loading_table_name=loading_table_name,
+            insert_fields=get_fields_from_names(
+                ["integer_field", "string_field"], model_meta
+            ),
+            pk_fields=get_fields_from_names(["id"], model_meta),
+        )
+
+        # A buffer smaller than a single row forces rows to be split across reads
+        bulk_load_models_with_queries(
+            models=models,
+            load_queries=[insert_query],
+            loading_table_name=loading_table_name,
+            field_names=["id", "integer_field", "string_field"],
+            copy_buffer_size=7,
+        )
+
+        self.assertEqual(TestComplexModel.objects.count(), 1000)
+        self.assertEqual(
+            TestComplexModel.objects.get(integer_field=567).string_field,
+            "hello\t567\n",
+        )
+
+    def test_cached_value_getters_match_django_conversion(self):
+        foreign = TestForeignKeyModel()
+        foreign.save()
+        models = [
+            TestComplexModel(
+                id=1,
+                integer_field="12",
+                string_field="hello",
+                json_field=dict(a=["b"]),
+                datetime_field=datetime(2018, 1, 5, 3, 4, 5, tzinfo=timezone.utc),
+                test_foreign=foreign,
+            ),
+            TestComplexModel(integer_field=3, datetime_field="2018-01-05T03:04:05Z"),
+        ]
+        fields = get_model_fields(TestComplexModel._meta, include_auto_fields=True)
+        fields = [field for field in fields if field.name != "binary_field"]
+
+        def django_field_to_value(model, field, connection):
+            field_val = field.pre_save(model, add=model._state.adding)
+            return field.get_db_prep_save(field_val, connection=connection)
+
+        self.assertEqual(
+            models_to_tsv_buffer(models, fields, connection).getvalue(),
+            models_to_tsv_buffer(
+                models,
+                fields,
+                connection,
+                django_field_to_value=django_field_to_value,
+            ).getvalue(),
+        )
+
+    def test_records_to_models_match_queryset(self):
+        TestComplexModel.objects.create(
+            integer_field=1,
+            string_field="hello",
+            json_field=dict(a=["b"]),
+            datetime_field=datetime(2018, 1, 5, 3, 4, 5, tzinfo=timezone.utc),
+        )
+        TestComplexModel.objects.create(integer_field=2)
+        expected_models = list(TestComplexModel.objects.order_by("id"))
+
+        for columns in [
+            [field.column for field in TestComplexModel._meta.concrete_fields],
+            # Out of order and missing columns
+            ["json_field", "id", "datetime_field", "integer_field"],
+        ]:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {', '.join(columns)} FROM {TestComplexModel._meta.db_table} ORDER BY id"
+                )
+                records = cursor.fetchall()
+            models = records_to_models(records, columns, TestComplexModel, connection)
+
+            for model, expected_model in zip(models, expected_models):
+                self.assertFalse(model._state.adding)
+                self.assertEqual(model._state.db, "default")
+                for column in columns:
+                    self.assertEqual(getattr(model, column), getattr(expected_model, column))
+            self.assertEqual(
+                models[0].get_deferred_fields(),
+                {
+                    field.attname
+                    for field in TestComplexModel._meta.concrete_fields
+                    if field.column not in columns
+                },
+            )
+
+    def test_parallel_chunks_keep_order(self):
+        models = [TestComplexModel(id=i, integer_field=i) for i in range(25)]
+        fields = get_fields_from_names(["id", "integer_field"], TestComplexModel._meta)
+
+        chunks = models_to_parallel_chunks(
+            models,
+            TestComplexModel,
+            fields,
+            connections["default"],
+            processes=2,
+            shard_size=3,
+        )
+
+        self.assertEqual(
+            "".join(chunks),
+            models_to_tsv_buffer(models, fields, connections["default"]).getvalue(),
+        )
+
+    def test_sends_phase_metrics(self):
+        models = [TestComplexModel(integer_field=i) for i in range(10)]
+        model_meta = models[0]._meta
+        table_name = model_meta.db_table
+        loading_table_name = generate_table_name(table_name)
+        insert_query = add_returning(
+            generate_insert_for_update_query(
+                table_name=table_name,
+                loading_table_name=loading_table_name,
+                insert_fields=get_fields_from_names(["integer_field"], model_meta),
+                pk_fields=get_fields_from_names(["id"], model_meta),
+            ),
+            table_name,
+        )
+        phases = []
+
+        def receiver(sender, **kwargs):
+            phases.append(kwargs)
+
+        bulk_load_phase_finished.connect(receiver, sender=TestComplexModel)
+        self.addCleanup(bulk_load_phase_finished.disconnect, receiver, sender=TestComplexModel)
+
+        bulk_load_models_with_queries(
+            models=models,
+            load_queries=[insert_query],
+            loading_table_name=loading_table_name,
+            field_names=["id", "integer_field"],
+            return_models=True,
+        )
+
+        self.assertEqual(
+            [phase["phase"] for phase in phases],
+            [
+                "create_temp_table",
+                "serialize",
+                "copy",
+                "query",
+                "fetch",
+                "deserialize",
+                "commit",
+            ],
+        )
+        for phase in phases:
+            self.assertEqual(phase["table_name"], table_name)
+            self.assertEqual(phase["operation"], "load_models_with_queries")
+            self.assertGreaterEqual(phase["duration"], 0)
+        phases_by_name = {phase["phase"]: phase for phase in phases}
+        self.assertEqual(phases_by_name["copy"]["rowcount"], 10)
+        if phases_by_name["copy"]["byte_count"] is not None:
+            # The size isn't known when the driver formats the rows
+            self.assertGreater(phases_by_name["copy"]["byte_count"], 0)
+        self.assertEqual(phases_by_name["query"]["rowcount"], 10)
+        self.assertEqual(phases_by_name["query"]["query_index"], 0)
+        self.assertEqual(phases_by_name["fetch"]["rowcount"], 10)
@@ -2,7 +2,11 @@ from datetime import datetime, timezone
 
 from django.db import transaction, connection, connections
 from django.test import TestCase
-from django_bulk_load import bulk_select_model_dicts
+from django_bulk_load import (
+    SelectTuples,
+    bulk_select_model_dicts,
+    bulk_select_model_dicts_iterator,
+)
 from .test_project.models import (
     TestComplexModel,
     TestForeignKeyModel,
@@ -146,3 +150,179 @@ class E2ETestBulkSelectModelDicts(TestCase):
             self.assertEqual(getattr(saved_model1, attr), result_dicts[0][attr])
             self.assertEqual(getattr(saved_model2, attr), result_dicts[1][attr])
 
+    def test_select_more_values_than_query_params(self):
+        TestComplexModel.objects.bulk_create(
+            [TestComplexModel(integer_field=i, string_field="hello") for i in range(5)]
+        )
+
+        # Postgres limits a query to 65535 parameters, so the values need to be split in several queries
+        results = bulk_select_model_dicts(
+            model_class=TestComplexModel,
+            filter_field_names=["integer_field", "string_field"],
+            select_field_names=["id"],
+            filter_data=[(i, "hello") for i in range(40000)],
+        )
+
+        self.assertEqual(
+            sorted(result["integer_field"] for result in results), list(range(5))
+        )
+
+    def test_select_many_values_in_read_only_transaction(self):
+        TestComplexModel.objects.create(integer_field=1)
+
+        # By default, the values are sent in the query, so it works on read only DBs (i.e. hot standby replicas)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL transaction_read_only = on")
+            results = bulk_select_model_dicts(
+                model_class=TestComplexModel,
+                filter_field_names=["integer_field"],
+                select_field_names=["id"],
+                filter_data=[(i,) for i in range(20000)],
+            )
+
+        self.assertEqual([result["integer_field"] for result in results], [1])
+
+    def test_select_with_loading_table(self):
+        created = datetime(2018, 1, 5, 3, 4, 5, tzinfo=timezone.utc)
+        TestComplexModel.objects.bulk_create(
+            [
+                TestComplexModel(integer_field=i, datetime_field=created, string_field=f"hello\t{i}")
+                for i in range(5)
+            ]
+        )
+
+        results = bulk_select_model_dicts(
+            model_class=TestComplexModel,
+            filter_field_names=["integer_field", "datetime_field"],
+            select_field_names=["string_field"],
+            # Repeated values still select each row once, like the query with the values in it
+            filter_data=[(1, created), (3, created), (3, created), (4, None), (10, created)],
+            copy_threshold=1,
+        )
+
+        self.assertEqual(
+            sorted((result["integer_field"], result["string_field"]) for result in results),
+            [(1, "hello\t1"), (3, "hello\t3")],
+        )
+
+    def test_select_for_update_with_loading_table(self):
+        TestComplexModel.objects.create(integer_field=1)
+
+        with transaction.atomic():
+            results = bulk_select_model_dicts(
+                model_class=TestComplexModel,
+                filter_field_names=["integer_field"],
+                select_field_names=["id"],
+                filter_data=[(1,), (2,)],
+                select_for_update=True,
+                copy_threshold=2,
+            )
+
+        self.assertEqual([result["integer_field"] for result in results], [1])
+
+    def test_result_formats(self):
+        TestComplexModel.objects.bulk_create(
+            [
+                TestComplexModel(integer_field=i, json_field=dict(value=i))
+                for i in range(3)
+            ]
+        )
+        select_kwargs = dict(
+            model_class=TestComplexModel,
+            filter_field_names=["integer_field"],
+            select_field_names=["json_field"],
+            filter_data=[(i,) for i in range(3)],
+        )
+
+        rows = sorted(
+            bulk_select_model_dicts(**select_kwargs, result_format="namedtuples"),
+            key=lambda row: row.integer_field,
+        )
+        self.assertEqual(
+            [(row.json_field, row.integer_field) for row in rows],
+            [(dict(value=i), i) for i in range(3)],
+        )
+
+        result = bulk_select_model_dicts(**select_kwargs, result_format="tuples")
+        self.assertIsInstance(result, SelectTuples)
+        self.assertEqual(result.field_names, ("json_field", "integer_field"))
+        self.assertEqual(sorted(result.rows, key=lambda row: row[1]), [(dict(value=i), i) for i in range(3)])
+
+        result = bulk_select_model_dicts(**select_kwargs, result_format="columns")
+        self.assertEqual(set(result.keys()), {"json_field", "integer_field"})
+        self.assertEqual(
+            sorted(zip(result["integer_field"], result["json_field"]), key=lambda row: row[0]),
+            [(i, dict(value=i)) for i in range(3)],
+        )
+
+    def test_empty_result_formats(self):
+        select_kwargs = dict(
+            model_class=TestComplexModel,
+            filter_field_names=["integer_field"],
+            select_field_names=["json_field"],
+        )
+        self.assertEqual(
+            bulk_select_model_dicts(**select_kwargs, filter_data=[], result_format="tuples"),
+            SelectTuples(field_names=("json_field", "integer_field"), rows=[]),
+        )
+        self.assertEqual(
+            bulk_select_model_dicts(**select_kwargs, filter_data=[(1,)], result_format="columns"),
+            dict(json_field=[], integer_field=[]),
+        )
+
+    def test_invalid_result_format(self):
+        with self.assertRaises(ValueError):
+            bulk_select_model_dicts(
+                model_class=TestComplexModel,
+                filter_field_names=["integer_field"],
+                select_field_names=["json_field"],
+                filter_data=[(1,)],
+                result_format="rows",
+            )
+
+    def test_select_iterator(self):
+        TestComplexModel.objects.bulk_create(
+            [TestComplexModel(integer_field=i, string_field=f"hello{i}") for i in range(5)]
+        )
+
+        for copy_threshold in [None, 1]:
+            results = bulk_select_model_dicts_iterator(
+                model_class=TestComplexModel,
+                filter_field_names=["integer_field"],
+                select_field_names=["string_field"],
+                filter_data=[(i,) for i in range(4)],
+                copy_threshold=copy_threshold,
+                chunk_size=3,
+            )
+
+            self.assertEqual(
+                sorted(result["string_field"] for result in results),
+                ["hello0", "hello1", "hello2", "hello3"],
+            )
+
+    def test_select_iterator_empty_generator(self):
+        results = bulk_select_model_dicts_iterator(
+            model_class=TestComplexModel,
+            filter_field_names=["integer_field"],
+            select_field_names=["id"],
+            filter_data=(value for value in []),
+        )
+
+        self.assertEqual(list(results), [])
+
+    def test_select_iterator_more_values_than_query_params(self):
+        TestComplexModel.objects.bulk_create(
+            [TestComplexModel(integer_field=i, string_field="hello") for i in range(5)]
+        )
+
+        results = bulk_select_model_dicts_iterator(
+            model_class=TestComplexModel,
+            filter_field_names=["integer_field", "string_field"],
+            select_field_names=["id"],
+            filter_data=[(i, "hello") for i in range(40000)],
+            copy_threshold=None,
+        )
+
+        self.assertEqual(
+            sorted(result["integer_field"] for result in results), list(range(5))
+        )
@@ -2,7 +2,7 @@ from datetime import datetime, timezone
 
 from django.db import transaction, connection, connections
 from django.test import TransactionTestCase
-from django_bulk_load import bulk_select_model_dicts
+from django_bulk_load import bulk_select_model_dicts, bulk_select_model_dicts_iterator
 from .test_project.models import (
     TestComplexModel,
     TestForeignKeyModel,
@@ -66,4 +66,104 @@ class E2ETestBulkSelectModelDictsNoTransaction(TransactionTestCase):
         # Should be 3 when transaction completes
         self.assertEqual(get_unlocked_rows(), 3)
 
+    def test_select_iterator_outside_transaction(self):
+        TestComplexModel.objects.bulk_create(
+            [TestComplexModel(integer_field=i) for i in range(3)]
+        )
+
+        results = bulk_select_model_dicts_iterator(
+            model_class=TestComplexModel,
+            filter_field_names=["integer_field"],
+            select_field_names=["id"],
+            filter_data=[(i,) for i in range(3)],
+            chunk_size=1,
+        )
+        first_result = next(results)
+
+        # The select runs in a transaction on its own connection
+        self.assertFalse(connection.in_atomic_block)
+        self.assertEqual(
+            sorted([first_result["integer_field"], *(result["integer_field"] for result in results)]),
+            [0, 1, 2],
+        )
+        self.assertFalse(connection.in_atomic_block)
+
+    def test_select_iterator_break_after_writes(self):
+        TestComplexModel.objects.bulk_create(
+            [TestComplexModel(integer_field=i) for i in range(3)]
+        )
+
+        for _ in bulk_select_model_dicts_iterator(
+            model_class=TestComplexModel,
+            filter_field_names=["integer_field"],
+            select_field_names=["id"],
+            filter_data=[(i,) for i in range(3)],
+            chunk_size=1,
+        ):
+            TestComplexModel.objects.create(integer_field=10)
+            break
 
+        self.assertEqual(TestComplexModel.objects.filter(integer_field=10).count(), 1)
+
+    def test_select_iterator_in_caller_transaction(self):
+        TestComplexModel.objects.bulk_create(
+            [TestComplexModel(integer_field=i) for i in range(3)]
+        )
+
+        with transaction.atomic():
+            TestComplexModel.objects.create(integer_field=10)
+            results = bulk_select_model_dicts_iterator(
+                model_class=TestComplexModel,
+                filter_field_names=["integer_field"],
+                select_field_names=["id"],
+                filter_data=[(i,) for i in [0, 1, 2, 10]],
+                chunk_size=1,
+            )
+            # The caller's uncommitted rows are selected too
+            self.assertEqual(
+                sorted(result["integer_field"] for result in results), [0, 1, 2, 10]
+            )
+            self.assertTrue(connection.in_atomic_block)
+
+            for _ in bulk_select_model_dicts_iterator(
+                model_class=TestComplexModel,
+                filter_field_names=["integer_field"],
+                select_field_names=["id"],
+                filter_data=[(i,) for i in range(3)],
+                chunk_size=1,
+            ):
+                TestComplexModel.objects.create(integer_field=11)
+                break
+            self.assertTrue(connection.in_atomic_block)
+
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", flat=True)),
+            [0, 1, 2, 10, 11],
+        )
+
+    def test_select_iterator_across_caller_transactions(self):
+        TestComplexModel.objects.bulk_create(
+            [TestComplexModel(integer_field=i) for i in range(3)]
+        )
+
+        results = bulk_select_model_dicts_iterator(
+            model_class=TestComplexModel,
+            filter_field_names=["integer_field"],
+            select_field_names=["id"],
+            filter_data=[(i,) for i in range(3)],
+            chunk_size=1,
+        )
+        with transaction.atomic():
+            next(results)
+            TestComplexModel.objects.create(integer_field=10)
+        self.assertFalse(connection.in_atomic_block)
+        with transaction.atomic():
+            next(results)
+            TestComplexModel.objects.create(integer_field=11)
+            self.assertTrue(connection.in_atomic_block)
+        results.close()
+
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", flat=True)),
+            [0, 1, 2, 10, 11],
+        )
@@ -1,10 +1,15 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from unittest import mock
+from uuid import UUID
 
+from django.db import connection
 from django.test import TestCase
 from django_bulk_load import bulk_update_models, generate_greater_than_condition
+from django_bulk_load.metrics import bulk_load_phase_finished
 from .test_project.models import (
     TestComplexModel,
     TestForeignKeyModel,
+    TestTypesModel,
 )
 
 
@@ -372,3 +377,161 @@ class E2ETestBulkUpdateModels(TestCase):
         # Second model should not be updated because 2 <  3
         saved_model2 = TestComplexModel.objects.get(integer_field=3)
         self.assertEqual(saved_model2.string_field, "c")
+
+    def test_return_counts(self):
+        changed_model = TestComplexModel.objects.create(integer_field=1)
+        changed_model.integer_field = 2
+        unchanged_model = TestComplexModel.objects.create(integer_field=3)
+
+        counts = bulk_update_models([changed_model, unchanged_model], return_counts=True)
+
+        self.assertEqual(
+            (counts.loaded, counts.inserted, counts.updated, counts.unchanged), (2, 0, 1, 1)
+        )
+
+    def test_dedupe(self):
+        model = TestComplexModel.objects.create(integer_field=1, string_field="a")
+
+        bulk_update_models(
+            [
+                TestComplexModel(id=model.id, integer_field=2, string_field="b"),
+                TestComplexModel(id=model.id, integer_field=3, string_field="c"),
+            ],
+            dedupe="first",
+        )
+
+        model.refresh_from_db()
+        self.assertEqual((model.integer_field, model.string_field), (2, "b"))
+
+    def test_skip_unchanged(self):
+        unchanged_models = [
+            TestComplexModel.objects.create(
+                integer_field=i,
+                string_field=f"unchanged\t{i}",
+                json_field=dict(i=i, nested=[1, "a"]),
+                datetime_field=datetime(2020, 1, 1, 12, 30, 0, 500 * i, tzinfo=timezone.utc),
+            )
+            for i in range(3)
+        ]
+        changed_model = TestComplexModel.objects.create(integer_field=10, string_field="a")
+        changed_model.string_field = "b"
+        skipped_counts = []
+
+        def receiver(sender, phase, **kwargs):
+            if phase == "skip_unchanged":
+                skipped_counts.append(kwargs["skipped_count"])
+
+        bulk_load_phase_finished.connect(receiver, sender=TestComplexModel)
+        self.addCleanup(bulk_load_phase_finished.disconnect, receiver, sender=TestComplexModel)
+
+        counts = bulk_update_models(
+            [*unchanged_models, changed_model, TestComplexModel(id=1000, integer_field=1)],
+            skip_unchanged=True,
+            return_counts=True,
+        )
+
+        self.assertEqual(skipped_counts, [3])
+        self.assertEqual(
+            (counts.loaded, counts.inserted, counts.updated, counts.unchanged), (5, 0, 1, 4)
+        )
+        self.assertEqual(TestComplexModel.objects.get(integer_field=10).string_field, "b")
+
+    def test_skip_unchanged_all_models(self):
+        model = TestComplexModel.objects.create(integer_field=1, string_field="a")
+
+        counts = bulk_update_models(
+            [model], update_field_names=["string_field"], skip_unchanged=True, return_counts=True
+        )
+
+        self.assertEqual((counts.loaded, counts.updated, counts.unchanged), (1, 0, 1))
+
+    def test_skip_unchanged_types(self):
+        model = TestTypesModel.objects.create(
+            small_integer_field=1,
+            boolean_field=False,
+            float_field=0.1,
+            date_field=date(2020, 1, 1),
+            char_field="a",
+            uuid_field=UUID(int=1),
+        )
+        skipped_counts = []
+
+        def receiver(sender, phase, **kwargs):
+            if phase == "skip_unchanged":
+                skipped_counts.append(kwargs["skipped_count"])
+
+        bulk_load_phase_finished.connect(receiver, sender=TestTypesModel)
+        self.addCleanup(bulk_load_phase_finished.disconnect, receiver, sender=TestTypesModel)
+
+        bulk_update_models([model], skip_unchanged=True)
+        model.float_field = 0.30000000000000004
+        bulk_update_models([model], skip_unchanged=True)
+
+        self.assertEqual(skipped_counts, [1, 0])
+        model.refresh_from_db()
+        self.assertEqual(model.float_field, 0.30000000000000004)
+
+    def test_skip_unchanged_float_last_digits(self):
+        model = TestTypesModel.objects.create(float_field=0.1)
+        model.float_field = 0.10000000000000002
+        with connection.cursor() as cursor:
+            # Postgres before 12 formats floats with 15 significant digits by default
+            cursor.execute("SET LOCAL extra_float_digits = 0")
+
+        counts = bulk_update_models([model], skip_unchanged=True, return_counts=True)
+
+        self.assertEqual((counts.updated, counts.unchanged), (1, 0))
+        # Floats are also read with 15 significant digits, so compare them in the DB
+        self.assertTrue(TestTypesModel.objects.filter(float_field=0.10000000000000002).exists())
+        # The setting of the caller's transaction is restored
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW extra_float_digits")
+            self.assertEqual(cursor.fetchone()[0], "0")
+
+    @mock.patch("django_bulk_load.bulk_load.MAX_QUERY_PARAMS", 2)
+    def test_skip_unchanged_keys_in_pages(self):
+        models = [TestComplexModel.objects.create(integer_field=i) for i in range(5)]
+        models[3].integer_field = 10
+
+        counts = bulk_update_models(models, skip_unchanged=True, return_counts=True)
+
+        self.assertEqual((counts.updated, counts.unchanged), (1, 4))
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", flat=True)),
+            [0, 1, 2, 4, 10],
+        )
+
+    def test_skip_unchanged_with_return_models_errors(self):
+        with self.assertRaises(ValueError):
+            bulk_update_models(
+                [TestComplexModel(id=1, integer_field=1)], skip_unchanged=True, return_models=True
+            )
+
+    def test_update_return_field_names(self):
+        saved_model = TestComplexModel(integer_field=1, string_field="a")
+        saved_model.save()
+        saved_model.string_field = "b"
+
+        [post_model] = bulk_update_models(
+            [saved_model], return_models=True, return_field_names=["string_field"]
+        )
+
+        self.assertEqual(post_model.id, saved_model.id)
+        self.assertEqual(post_model.string_field, "b")
+        self.assertIn("integer_field", post_model.get_deferred_fields())
+        # Deferred fields are loaded from the DB when accessed, like Django's QuerySet.only
+        self.assertEqual(post_model.integer_field, 1)
+
+    def test_update_return_format(self):
+        saved_model = TestComplexModel(integer_field=1, string_field="a")
+        saved_model.save()
+        saved_model.string_field = "b"
+
+        [row] = bulk_update_models(
+            [saved_model],
+            return_models=True,
+            return_field_names=["string_field"],
+            return_format="dicts",
+        )
+
+        self.assertEqual(row, dict(id=saved_model.id, string_field="b"))
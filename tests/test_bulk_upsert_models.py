@@ -1,7 +1,16 @@
 from datetime import datetime, timezone
+from unittest import mock, skipUnless
 
+from django.db import connection
 from django.test import TestCase
-from django_bulk_load import bulk_upsert_models, generate_greater_than_condition
+from django_bulk_load import (
+    BulkLoadCounts,
+    bulk_update_models,
+    bulk_upsert_models,
+    generate_greater_than_condition,
+)
+from django_bulk_load.bulk_load import _bulk_upsert_load_options
+from django_bulk_load.metrics import bulk_load_phase_finished
 from .test_project.models import (
     TestComplexModel,
     TestForeignKeyModel,
@@ -594,3 +603,463 @@ class E2ETestBulkUpsertModels(TestCase):
         # Second model should not be updated because 2 < 3
         saved_model2 = TestComplexModel.objects.get(integer_field=3)
         self.assertEqual(saved_model2.string_field, "c")
+
+    def test_upsert_from_generator(self):
+        model1 = TestComplexModel(integer_field=1)
+        model1.save()
+        model1.integer_field = 2
+
+        return_models = bulk_upsert_models(
+            iter([model1, TestComplexModel(integer_field=3)]), return_models=True
+        )
+
+        self.assertEqual(len(return_models), 2)
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", flat=True)),
+            [2, 3],
+        )
+
+    def test_upsert_binary_copy(self):
+        model1 = TestComplexModel(integer_field=1, json_field=dict(a="b"))
+        model1.save()
+        model1.json_field = dict(c="d")
+        model1.binary_field = b"hello"
+
+        bulk_upsert_models(
+            [model1, TestComplexModel(integer_field=2)], binary_copy=True
+        )
+
+        saved_model = TestComplexModel.objects.get(integer_field=1)
+        self.assertEqual(saved_model.json_field, dict(c="d"))
+        self.assertEqual(bytes(saved_model.binary_field), b"hello")
+        self.assertEqual(TestComplexModel.objects.count(), 2)
+
+    def test_upsert_pipeline_serialization(self):
+        model1 = TestComplexModel(integer_field=1)
+        model1.save()
+        model1.integer_field = 2
+
+        bulk_upsert_models(
+            (model for model in [model1, TestComplexModel(integer_field=3)]),
+            pipeline_serialization=True,
+        )
+
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", flat=True)),
+            [2, 3],
+        )
+
+    def test_upsert_pipeline_serialization_error(self):
+        def models():
+            yield TestComplexModel(integer_field=1)
+            raise KeyError("error")
+
+        with self.assertRaises(KeyError):
+            bulk_upsert_models(models(), pipeline_serialization=True)
+        self.assertEqual(TestComplexModel.objects.count(), 0)
+
+    def test_sends_query_metrics_with_operation(self):
+        existing_model = TestComplexModel.objects.create(integer_field=1)
+        existing_model.integer_field = 2
+        query_phases = []
+
+        def receiver(sender, phase, **kwargs):
+            if phase == "query":
+                query_phases.append(kwargs)
+
+        bulk_load_phase_finished.connect(receiver, sender=TestComplexModel)
+        self.addCleanup(bulk_load_phase_finished.disconnect, receiver, sender=TestComplexModel)
+
+        bulk_upsert_models(
+            [existing_model, TestComplexModel(integer_field=3), TestComplexModel(integer_field=4)],
+            upsert_strategy="update_then_insert",
+        )
+
+        self.assertEqual(
+            [(phase["query_index"], phase["rowcount"]) for phase in query_phases],
+            [(0, 1), (1, 2)],
+        )
+        for phase in query_phases:
+            self.assertEqual(phase["operation"], "upsert")
+            self.assertEqual(phase["table_name"], TestComplexModel._meta.db_table)
+
+    def test_return_counts(self):
+        changed_model = TestComplexModel.objects.create(integer_field=1)
+        changed_model.integer_field = 2
+        unchanged_model = TestComplexModel.objects.create(integer_field=3)
+
+        counts = bulk_upsert_models(
+            [changed_model, unchanged_model, TestComplexModel(integer_field=4)],
+            return_counts=True,
+        )
+
+        self.assertEqual(
+            counts,
+            BulkLoadCounts(loaded=3, inserted=1, updated=1, unchanged=1, query_rowcounts=(1, 1)),
+        )
+        self.assertEqual(TestComplexModel.objects.count(), 3)
+
+    def test_empty_upsert_return_counts(self):
+        self.assertEqual(
+            bulk_upsert_models([], return_counts=True),
+            BulkLoadCounts(loaded=0, inserted=0, updated=0, unchanged=0, query_rowcounts=()),
+        )
+
+    def test_return_counts_with_return_models_errors(self):
+        with self.assertRaises(ValueError):
+            bulk_upsert_models(
+                [TestComplexModel(integer_field=1)], return_models=True, return_counts=True
+            )
+
+    def test_on_conflict_upsert(self):
+        changed_model = TestComplexModel.objects.create(integer_field=1, string_field="a")
+        changed_model.string_field = "b"
+        unchanged_model = TestComplexModel.objects.create(integer_field=2, string_field="c")
+
+        bulk_upsert_models(
+            [changed_model, unchanged_model, TestComplexModel(integer_field=3, string_field="d")],
+            upsert_strategy="on_conflict",
+        )
+
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("id", "integer_field", "string_field")),
+            [
+                (changed_model.id, 1, "b"),
+                (unchanged_model.id, 2, "c"),
+                (unchanged_model.id + 1, 3, "d"),
+            ],
+        )
+
+    def test_on_conflict_upsert_with_pk_field_names(self):
+        existing_model = TestUUIDModel.objects.create()
+        new_model = TestUUIDModel()
+
+        return_models = bulk_upsert_models(
+            [existing_model, new_model],
+            pk_field_names=["id"],
+            insert_only_field_names=["created_on"],
+            upsert_strategy="on_conflict",
+            return_models=True,
+        )
+
+        self.assertEqual(
+            {model.id for model in return_models}, {existing_model.id, new_model.id}
+        )
+        self.assertEqual(
+            TestUUIDModel.objects.get(id=existing_model.id).created_on,
+            existing_model.created_on,
+        )
+
+    def test_on_conflict_upsert_update_if_null(self):
+        null_model = TestComplexModel.objects.create(integer_field=None, string_field="a")
+        null_model.integer_field = 1
+        set_model = TestComplexModel.objects.create(integer_field=2, string_field="b")
+        set_model.integer_field = 3
+
+        bulk_upsert_models(
+            [null_model, set_model],
+            update_if_null_field_names=["integer_field"],
+            upsert_strategy="on_conflict",
+        )
+
+        self.assertEqual(TestComplexModel.objects.get(id=null_model.id).integer_field, 1)
+        self.assertEqual(TestComplexModel.objects.get(id=set_model.id).integer_field, 2)
+
+    def test_on_conflict_upsert_custom_update_where(self):
+        model1 = TestComplexModel.objects.create(integer_field=1, string_field="a")
+        model1.integer_field = 5
+        model1.string_field = "b"
+        model2 = TestComplexModel.objects.create(integer_field=3, string_field="c")
+        model2.integer_field = 2
+        model2.string_field = "d"
+
+        def update_where(fields, source_table_name, destination_table_name):
+            return generate_greater_than_condition(
+                source_table_name=source_table_name,
+                destination_table_name=destination_table_name,
+                field=TestComplexModel._meta.get_field("integer_field"),
+            )
+
+        bulk_upsert_models(
+            [model1, model2], update_where=update_where, upsert_strategy="on_conflict"
+        )
+
+        self.assertEqual(TestComplexModel.objects.get(id=model1.id).string_field, "b")
+        self.assertEqual(TestComplexModel.objects.get(id=model2.id).string_field, "c")
+
+    def test_on_conflict_upsert_return_counts_errors(self):
+        with self.assertRaises(ValueError):
+            bulk_upsert_models(
+                [TestComplexModel(integer_field=1)],
+                upsert_strategy="on_conflict",
+                return_counts=True,
+            )
+
+    def test_invalid_upsert_strategy_errors(self):
+        with self.assertRaises(ValueError):
+            bulk_upsert_models([TestComplexModel(integer_field=1)], upsert_strategy="invalid")
+
+    @skipUnless(connection.pg_version >= 150000, "MERGE requires Postgres 15+")
+    def test_merge_upsert_non_unique_pk_field_names(self):
+        # integer_field isn't unique, so every matching row is updated
+        TestComplexModel.objects.create(integer_field=1, string_field="a")
+        TestComplexModel.objects.create(integer_field=1, string_field="b")
+
+        return_models = bulk_upsert_models(
+            [
+                TestComplexModel(integer_field=1, string_field="c"),
+                TestComplexModel(integer_field=2, string_field="d"),
+            ],
+            pk_field_names=["integer_field"],
+            upsert_strategy="merge",
+            return_models=True,
+        )
+
+        self.assertEqual(len(return_models), 3)
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", "string_field")),
+            [(1, "c"), (1, "c"), (2, "d")],
+        )
+
+    def test_merge_upsert_before_postgres_15_errors(self):
+        with mock.patch.object(connection, "pg_version", 140000), self.assertRaises(ValueError):
+            bulk_upsert_models([TestComplexModel(integer_field=1)], upsert_strategy="merge")
+
+    def test_merge_upsert_return_models_with_auto_field_errors(self):
+        with self.assertRaises(ValueError):
+            bulk_upsert_models(
+                [TestComplexModel(integer_field=1)],
+                upsert_strategy="merge",
+                return_models=True,
+            )
+
+    def test_upsert_reuses_cached_queries(self):
+        _bulk_upsert_load_options.cache_clear()
+        model = TestComplexModel.objects.create(integer_field=1)
+
+        for integer_field in [2, 3]:
+            model.integer_field = integer_field
+            bulk_upsert_models(
+                [model, TestComplexModel(integer_field=integer_field * 10)],
+                upsert_strategy="update_then_insert",
+            )
+
+        self.assertEqual(_bulk_upsert_load_options.cache_info().hits, 1)
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", flat=True)),
+            [3, 20, 30],
+        )
+
+    def test_upsert_reuse_loading_tables(self):
+        # Both loads run in the test transaction, so the second one must clear the rows loaded by the first
+        bulk_upsert_models([TestComplexModel(integer_field=1)], reuse_loading_tables=True)
+        bulk_upsert_models([TestComplexModel(integer_field=2)], reuse_loading_tables=True)
+        bulk_update_models(
+            [TestComplexModel.objects.get(integer_field=2)],
+            update_field_names=["string_field"],
+            reuse_loading_tables=True,
+        )
+
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", flat=True)), [1, 2]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_class WHERE relpersistence = 't' AND relname LIKE 'loading_%%'"
+            )
+            # One loading table for the upserts and one for the update's columns
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_upsert_analyzes_and_indexes_loading_table(self):
+        analyze_phases = []
+
+        def receiver(sender, phase, **kwargs):
+            if phase == "analyze":
+                analyze_phases.append(kwargs["rowcount"])
+
+        bulk_load_phase_finished.connect(receiver, sender=TestComplexModel)
+        self.addCleanup(bulk_load_phase_finished.disconnect, receiver, sender=TestComplexModel)
+
+        # The reused loading table is indexed by the first load, so the second one skips the existing index
+        for integer_fields in [[1], [2, 3], [3, 4]]:
+            bulk_upsert_models(
+                [TestComplexModel(integer_field=value) for value in integer_fields],
+                pk_field_names=["integer_field"],
+                analyze_threshold=2,
+                index_loading_table=True,
+                reuse_loading_tables=True,
+            )
+
+        self.assertEqual(analyze_phases, [2, 2])
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", flat=True)), [1, 2, 3, 4]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexdef FROM pg_indexes WHERE schemaname LIKE 'pg_temp%%' AND tablename LIKE 'loading_%%'"
+            )
+            index_definitions = [row[0] for row in cursor.fetchall()]
+        self.assertEqual(len(index_definitions), 1)
+        self.assertIn("(integer_field)", index_definitions[0])
+
+    def test_upsert_analyze_threshold_none(self):
+        phases = []
+
+        def receiver(sender, phase, **kwargs):
+            phases.append(phase)
+
+        bulk_load_phase_finished.connect(receiver, sender=TestComplexModel)
+        self.addCleanup(bulk_load_phase_finished.disconnect, receiver, sender=TestComplexModel)
+
+        bulk_upsert_models(
+            [TestComplexModel(integer_field=1), TestComplexModel(integer_field=2)],
+            analyze_threshold=None,
+            index_loading_table=True,
+        )
+
+        self.assertNotIn("analyze", phases)
+        self.assertEqual(TestComplexModel.objects.count(), 2)
+
+    def test_upsert_dedupe_last(self):
+        TestComplexModel.objects.create(integer_field=1, string_field="a")
+
+        bulk_upsert_models(
+            [
+                TestComplexModel(integer_field=1, string_field="b"),
+                TestComplexModel(integer_field=2, string_field="c"),
+                TestComplexModel(integer_field=1, string_field="d"),
+                TestComplexModel(integer_field=2, string_field="e"),
+            ],
+            pk_field_names=["integer_field"],
+            dedupe="last",
+        )
+
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", "string_field")),
+            [(1, "d"), (2, "e")],
+        )
+
+    def test_upsert_dedupe_first_from_generator(self):
+        models = (
+            TestComplexModel(integer_field=i % 2, string_field=str(i)) for i in range(4)
+        )
+
+        counts = bulk_upsert_models(
+            models, pk_field_names=["integer_field"], dedupe="first", return_counts=True
+        )
+
+        self.assertEqual((counts.loaded, counts.inserted), (2, 2))
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", "string_field")),
+            [(0, "0"), (1, "1")],
+        )
+
+    def test_upsert_dedupe_keeps_models_without_pk(self):
+        bulk_upsert_models(
+            [TestComplexModel(integer_field=1), TestComplexModel(integer_field=1)],
+            dedupe="last",
+        )
+
+        self.assertEqual(TestComplexModel.objects.count(), 2)
+
+    def test_upsert_invalid_dedupe_errors(self):
+        with self.assertRaises(ValueError):
+            bulk_upsert_models([TestComplexModel(integer_field=1)], dedupe="invalid")
+
+    def test_upsert_return_field_names(self):
+        saved_model = TestComplexModel(integer_field=1, string_field="a", json_field=dict(a=1))
+        saved_model.save()
+        saved_model.string_field = "b"
+        unsaved_model = TestComplexModel(integer_field=2, string_field="c")
+
+        post_models = bulk_upsert_models(
+            [saved_model, unsaved_model],
+            pk_field_names=["integer_field"],
+            return_models=True,
+            return_field_names=["string_field"],
+        )
+
+        load_queries = _bulk_upsert_load_options(
+            model_class=TestComplexModel,
+            pk_field_names=["integer_field"],
+            insert_only_field_names=None,
+            model_changed_field_names=None,
+            update_if_null_field_names=None,
+            update_where=None,
+            return_models=True,
+            return_field_names=["string_field"],
+        )["load_queries"]
+        load_sql = " ".join(query.string for query in load_queries)
+        self.assertIn("RETURNING", load_sql)
+        self.assertNotIn(".*", load_sql)
+        post_models = sorted(post_models, key=lambda model: model.string_field)
+        self.assertEqual([model.string_field for model in post_models], ["b", "c"])
+        self.assertEqual(post_models[0].id, saved_model.id)
+        self.assertIsNotNone(post_models[1].id)
+        self.assertEqual(
+            post_models[0].get_deferred_fields(),
+            {"integer_field", "datetime_field", "json_field", "test_foreign_id", "binary_field"},
+        )
+
+    def test_on_conflict_upsert_return_field_names(self):
+        existing_model = TestUUIDModel.objects.create()
+
+        [post_model] = bulk_upsert_models(
+            [existing_model],
+            pk_field_names=["id"],
+            insert_only_field_names=["created_on"],
+            upsert_strategy="on_conflict",
+            return_models=True,
+            return_field_names=["created_on"],
+        )
+
+        self.assertEqual(post_model.id, existing_model.id)
+        self.assertEqual(post_model.created_on, existing_model.created_on)
+        self.assertEqual(post_model.get_deferred_fields(), {"modified_on"})
+
+    def test_return_field_names_without_return_models_errors(self):
+        with self.assertRaises(ValueError):
+            bulk_upsert_models(
+                [TestComplexModel(integer_field=1)],
+                return_field_names=["string_field"],
+            )
+
+    def test_upsert_return_format(self):
+        saved_model = TestComplexModel(integer_field=1, string_field="a", json_field=dict(a=1))
+        saved_model.save()
+        saved_model.string_field = "b"
+
+        dicts = bulk_upsert_models(
+            [saved_model, TestComplexModel(integer_field=2, string_field="c")],
+            pk_field_names=["integer_field"],
+            return_models=True,
+            return_format="dicts",
+        )
+        dicts = sorted(dicts, key=lambda row: row["integer_field"])
+        self.assertEqual(dicts[0]["id"], saved_model.id)
+        self.assertEqual(dicts[0]["json_field"], dict(a=1))
+        self.assertEqual([row["string_field"] for row in dicts], ["b", "c"])
+        self.assertEqual(
+            set(dicts[0]),
+            {field.attname for field in TestComplexModel._meta.concrete_fields},
+        )
+
+        tuples = bulk_upsert_models(
+            [saved_model, TestComplexModel(integer_field=3, string_field="d")],
+            pk_field_names=["integer_field"],
+            return_models=True,
+            return_field_names=["integer_field"],
+            return_format="tuples",
+        )
+        self.assertEqual(
+            sorted(tuples, key=lambda row: row[1]),
+            [(saved_model.id, 1), (TestComplexModel.objects.get(integer_field=3).id, 3)],
+        )
+
+    def test_invalid_return_format_errors(self):
+        with self.assertRaises(ValueError):
+            bulk_upsert_models(
+                [TestComplexModel(integer_field=1)], return_models=True, return_format="rows"
+            )
+        with self.assertRaises(ValueError):
+            bulk_upsert_models([TestComplexModel(integer_field=1)], return_format="dicts")
@@ -0,0 +1,102 @@
+from django.db import DataError, OperationalError, connection, transaction
+from django.test import TransactionTestCase
+from django_bulk_load import bulk_upsert_models
+from .test_project.models import TestComplexModel
+
+
+class E2ETestBulkUpsertModelsNoTransaction(TransactionTestCase):
+    def test_parallel_upsert(self):
+        existing_models = [TestComplexModel(integer_field=i) for i in range(10)]
+        for model in existing_models:
+            model.save()
+            model.string_field = f"updated {model.integer_field}"
+
+        new_models = [TestComplexModel(integer_field=i) for i in range(10, 20)]
+        return_models = bulk_upsert_models(
+            existing_models + new_models, parallelism=3, return_models=True
+        )
+
+        self.assertEqual(len(return_models), 20)
+        self.assertEqual(TestComplexModel.objects.count(), 20)
+        for model in TestComplexModel.objects.filter(integer_field__lt=10):
+            self.assertEqual(model.string_field, f"updated {model.integer_field}")
+
+    def test_parallel_upsert_return_counts(self):
+        existing_models = [TestComplexModel(integer_field=i) for i in range(10)]
+        for model in existing_models:
+            model.save()
+            model.string_field = "updated"
+
+        new_models = [TestComplexModel(integer_field=i) for i in range(10, 15)]
+        counts = bulk_upsert_models(
+            existing_models + new_models, parallelism=3, return_counts=True
+        )
+
+        self.assertEqual(
+            (counts.loaded, counts.inserted, counts.updated, counts.unchanged), (15, 5, 10, 0)
+        )
+
+    def test_upsert_reuse_loading_tables_across_transactions(self):
+        for integer_field in range(3):
+            bulk_upsert_models(
+                [TestComplexModel(integer_field=integer_field)], reuse_loading_tables=True
+            )
+
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", flat=True)), [0, 1, 2]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_class WHERE relpersistence = 't' AND relname LIKE 'loading_%%'"
+            )
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_parallel_upsert_all_or_nothing_rolls_back(self):
+        # New models are spread round-robin, so the invalid model fails the first partition only
+        models = [TestComplexModel(integer_field=2**40)] + [
+            TestComplexModel(integer_field=i) for i in range(1, 10)
+        ]
+
+        with self.assertRaises(DataError):
+            bulk_upsert_models(models, parallelism=2)
+        self.assertEqual(TestComplexModel.objects.count(), 0)
+
+    def test_parallel_upsert_best_effort_commits_other_partitions(self):
+        models = [TestComplexModel(integer_field=2**40)] + [
+            TestComplexModel(integer_field=i) for i in range(1, 10)
+        ]
+
+        with self.assertRaises(DataError):
+            bulk_upsert_models(models, parallelism=2, commit_policy="best_effort")
+        self.assertEqual(
+            sorted(TestComplexModel.objects.values_list("integer_field", flat=True)),
+            [1, 3, 5, 7, 9],
+        )
+
+    def test_parallel_upsert_lock_timeout(self):
+        existing_model = TestComplexModel.objects.create(integer_field=1)
+        existing_model.integer_field = 2
+        other_connection = connection.copy()
+        self.addCleanup(other_connection.close)
+        other_connection.set_autocommit(False)
+        with other_connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT * FROM {TestComplexModel._meta.db_table} WHERE id = %s FOR UPDATE",
+                [existing_model.id],
+            )
+
+        # The row is locked by another session, which waits longer than lock_timeout_ms
+        with self.assertRaises(OperationalError):
+            bulk_upsert_models(
+                [existing_model, TestComplexModel(integer_field=3)],
+                parallelism=2,
+                lock_timeout_ms=100,
+            )
+        other_connection.rollback()
+        self.assertEqual(
+            list(TestComplexModel.objects.values_list("integer_field", flat=True)), [1]
+        )
+
+    def test_parallel_upsert_errors_in_transaction(self):
+        with self.assertRaises(ValueError), transaction.atomic():
+            bulk_upsert_models([TestComplexModel(integer_field=1)], parallelism=2)
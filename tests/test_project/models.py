@@ -21,4 +21,13 @@ class TestComplexModel(models.Model):
 class TestUUIDModel(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     created_on = models.DateTimeField(auto_now_add=True)
-    modified_on = models.DateTimeField(auto_now=True)
\ No newline at end of file
+    modified_on = models.DateTimeField(auto_now=True)
+
+class TestTypesModel(models.Model):
+    small_integer_field = models.SmallIntegerField(null=True)
+    boolean_field = models.BooleanField(null=True)
+    float_field = models.FloatField(null=True)
+    decimal_field = models.DecimalField(max_digits=30, decimal_places=10, null=True)
+    date_field = models.DateField(null=True)
+    char_field = models.CharField(max_length=100, null=True)
+    uuid_field = models.UUIDField(null=True)